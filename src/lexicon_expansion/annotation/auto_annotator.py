@@ -5,6 +5,8 @@ from dataclasses import dataclass
 import re
 from pathlib import Path
 
+from lexicon_expansion.config.lexicon_loader import load_lexicon
+
 @dataclass
 class AnnotationCandidate:
     text: str
@@ -22,8 +24,7 @@ class AutoAnnotator:
         if not lexicon_path.exists():
             raise FileNotFoundError(f"辞書ファイルが見つかりません: {lexicon_path}")
             
-        with open(lexicon_path, 'r', encoding='utf-8') as f:
-            self.lexicon = yaml.safe_load(f)
+        self.lexicon = load_lexicon(lexicon_path)
         self._build_phrase_index()
         
     def _build_phrase_index(self):
@@ -0,0 +1,29 @@
+# src/lexicon_expansion/config/lexicon_loader.py
+"""統合辞書の読み込み
+
+JAIML本体と同じく、コンパイル済み辞書（<stem>.lexc）が存在し元YAMLと内容ハッシュが
+一致する場合はそれを使用する。コンパイル済み辞書は JAIML本体の
+`python -m scripts.compile_lexicon` で作成する（YAML の全カテゴリが語のリストである場合のみ作成でき、
+値のないカテゴリは空のリストになる）。
+
+それ以外は YAML を yaml.safe_load の結果のまま返す。編集・マージ用のツールが扱う
+辞書の内容を、検証や型の変換で失わないようにするため。
+"""
+from pathlib import Path
+from typing import Dict, List, Union
+
+import yaml
+
+def load_lexicon(lexicon_path: Union[str, Path]) -> Dict[str, List[str]]:
+    """辞書を {カテゴリ: 語のリスト} として読み込む"""
+    try:
+        from model.jaiml_v3_3.lexicons.compiled import artifact_path, content_hash, read_artifact
+    except ImportError:
+        # JAIML本体が利用できない環境ではYAMLを直接読み込む
+        pass
+    else:
+        tables = read_artifact(artifact_path(lexicon_path), expected_hash=content_hash(lexicon_path))
+        if tables is not None:
+            return tables.lexicons
+    with open(lexicon_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
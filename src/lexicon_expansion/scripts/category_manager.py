@@ -3,6 +3,8 @@ import yaml
 from typing import Dict, List, Optional
 import re
 
+from lexicon_expansion.config.lexicon_loader import load_lexicon
+
 class CategoryManager:
     """カテゴリ別辞書の管理"""
     
@@ -23,8 +25,7 @@ class CategoryManager:
         if not master_path.exists():
             raise FileNotFoundError(f"マスター辞書が見つかりません: {master_path}")
             
-        with open(master_path, 'r', encoding='utf-8') as f:
-            master_data = yaml.safe_load(f)
+        master_data = load_lexicon(master_path)
             
         # カテゴリタイプ別に分割
         for category_type in ['pragmatic', 'lexical']:
@@ -3,14 +3,15 @@ from pathlib import Path
 from typing import Dict, List, Set
 from datetime import datetime
 
+from lexicon_expansion.config.lexicon_loader import load_lexicon
+
 class LexiconMerger:
     def __init__(self, base_lexicon_path: str):
         self.base_lexicon_path = Path(base_lexicon_path)
         if not self.base_lexicon_path.exists():
             raise FileNotFoundError(f"ベース辞書が見つかりません: {base_lexicon_path}")
             
-        with open(self.base_lexicon_path, 'r', encoding='utf-8') as f:
-            self.base_lexicon = yaml.safe_load(f) or {}
+        self.base_lexicon = load_lexicon(self.base_lexicon_path)
             
     def merge_reviewed_candidates(self, reviewed_dir: Path) -> Dict[str, List[str]]:
         """選別済み候補を統合"""
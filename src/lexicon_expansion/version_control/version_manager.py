@@ -4,6 +4,8 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
+from lexicon_expansion.config.lexicon_loader import load_lexicon
+
 class LexiconVersionManager:
     def __init__(self, lexicon_dir: str = "lexicons"):
         self.lexicon_dir = Path(lexicon_dir)
@@ -63,8 +65,7 @@ class LexiconVersionManager:
             return None
             
         # 最新ファイルを読み込み
-        with open(version_files[-1], 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return load_lexicon(version_files[-1])
     
     def _calculate_initial_stats(self, lexicon_data: Dict) -> Dict:
         """初期統計の計算"""
@@ -150,8 +151,7 @@ class LexiconVersionManager:
         if not version_path.exists():
             raise FileNotFoundError(f"バージョンファイルが見つかりません: {version_name}")
             
-        with open(version_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return load_lexicon(version_path)
     
     def generate_diff_report(self, version1: str, version2: str) -> str:
         """バージョン間の詳細差分レポート生成"""
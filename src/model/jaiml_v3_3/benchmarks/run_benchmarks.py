@@ -0,0 +1,264 @@
+# src/model/jaiml_v3_3/benchmarks/run_benchmarks.py
+"""特徴量抽出・推論経路のベンチマーク。
+
+合成対話コーパス（benchmarks.synthetic）を用いて、コーパスサイズ × 辞書サイズの各条件で
+以下を計測し、結果を JSON で書き出す。
+
+    - lexicon_load         : 辞書の読み込み（YAML / コンパイル済み辞書）
+    - analyze              : 形態素解析・文分割
+    - feature.<name>       : 12 特徴量の各関数（解析済みテキスト、照合キャッシュなし）
+    - extract_features     : 12 次元特徴ベクトルの抽出（未解析テキストから）
+    - sample_with_dropout  : MCDropout（1 ペアずつ / バッチ / NumPy バックエンドのバッチ）
+    - adaptive_sample      : 適応的サンプリング（NumPy バックエンドのバッチ）
+    - analytic_uncertainty : 解析的モード（torch / NumPy バックエンドのバッチ）
+    - process_file         : JSONL 入力から出力までの一連の処理
+
+    python -m benchmarks.run_benchmarks --sizes 100 1000 --lexicon-sizes 0 10000 \\
+        --output benchmarks/results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.run_benchmarks --sizes 100 --baseline benchmarks/results/old.json
+
+埋め込みキャッシュは無効化して計測する（繰り返し計測でキャッシュに当たらないようにするため）。
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from benchmarks.synthetic import DialogueGenerator, expand_lexicon, write_lexicon
+from core.features.corpus_based import TFIDFNoveltyCalculator
+from core.features.semantic import set_embedding_cache
+from core.utils import resources
+from core.utils.analysis import AnalyzedText, analyze
+from core.utils.paths import get_lexicon_path
+from lexicons.compiled import compile_lexicon, load_lexicon_tables
+from lexicons.matcher import LexiconMatcher
+from scripts.run_inference import (
+    FEATURE_FUNCS,
+    extract_features,
+    adaptive_sample_batch,
+    analytic_uncertainty_batch,
+    process_file,
+    sample_with_dropout,
+    sample_with_dropout_batch,
+)
+
+SCHEMA_VERSION = 1
+
+def _measure(func: Callable[[], Any], repeat: int) -> List[float]:
+    times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+def _record(name: str, times: Sequence[float], items: int, **params: Any) -> Dict[str, Any]:
+    median = statistics.median(times)
+    return {
+        "name": name,
+        **params,
+        "items": items,
+        "repeat": len(times),
+        "times_s": [round(t, 6) for t in times],
+        "median_s": round(median, 6),
+        "per_item_us": round(median / items * 1e6, 3) if items else None,
+        "items_per_s": round(items / median, 1) if median > 0 else None,
+    }
+
+def _clear_caches(texts: Sequence[AnalyzedText]) -> None:
+    # 照合行列などの派生キャッシュのみ破棄する（形態素解析結果は残す）
+    for text in texts:
+        text.cache.clear()
+
+def _environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    env = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "numpy": np.__version__,
+    }
+    try:
+        env["torch"] = resources.get("torch").__version__
+    except ImportError:
+        env["torch"] = None
+    return env
+
+def bench_lexicon(lexicon_path: Path, repeat: int, **params: Any) -> List[Dict[str, Any]]:
+    records = [_record("lexicon_load.yaml", _measure(lambda: LexiconMatcher(str(lexicon_path), use_compiled=False), repeat), 1, **params)]
+    compile_lexicon(lexicon_path)
+    records.append(_record("lexicon_load.artifact", _measure(lambda: LexiconMatcher(str(lexicon_path)), repeat), 1, **params))
+    return records
+
+def bench_corpus(pairs: List[Tuple[str, str]], matcher: LexiconMatcher, model: Any, tfidf_calc: TFIDFNoveltyCalculator,
+                 repeat: int, batch_size: int, workers: Sequence[int], **params: Any) -> List[Dict[str, Any]]:
+    n = len(pairs)
+    records: List[Dict[str, Any]] = []
+
+    records.append(_record("analyze", _measure(lambda: [(analyze(u), analyze(r)) for u, r in pairs], repeat), n, **params))
+
+    analyzed = [(analyze(u), analyze(r)) for u, r in pairs]
+    flat = [t for pair in analyzed for t in pair]
+    for name, func in FEATURE_FUNCS.items():
+        def run(func=func):
+            _clear_caches(flat)
+            for user_a, resp_a in analyzed:
+                func(user_a, resp_a, matcher, tfidf_calc)
+        records.append(_record(f"feature.{name}", _measure(run, repeat), n, **params))
+
+    records.append(_record(
+        "extract_features",
+        _measure(lambda: [extract_features(u, r, matcher, tfidf_calc) for u, r in pairs], repeat), n, **params,
+    ))
+
+    feats_list = [extract_features(u, r, matcher, tfidf_calc) for u, r in analyzed]
+    records.append(_record(
+        "sample_with_dropout",
+        _measure(lambda: [sample_with_dropout(model, f, n_samples=20) for f in feats_list], repeat), n, **params,
+    ))
+    records.append(_record(
+        "sample_with_dropout_batch",
+        _measure(lambda: [sample_with_dropout_batch(model, feats_list[i:i + batch_size], n_samples=20)
+                          for i in range(0, n, batch_size)], repeat), n, batch_size=batch_size, **params,
+    ))
+    np_model = model.to_numpy()
+    records.append(_record(
+        "sample_with_dropout_batch.numpy",
+        _measure(lambda: [sample_with_dropout_batch(np_model, feats_list[i:i + batch_size], n_samples=20)
+                          for i in range(0, n, batch_size)], repeat), n, batch_size=batch_size, **params,
+    ))
+    records.append(_record(
+        "adaptive_sample_batch.numpy",
+        _measure(lambda: [adaptive_sample_batch(np_model, feats_list[i:i + batch_size])
+                          for i in range(0, n, batch_size)], repeat), n, batch_size=batch_size, **params,
+    ))
+    for backend, m in (("torch", model), ("numpy", np_model)):
+        records.append(_record(
+            f"analytic_uncertainty_batch.{backend}",
+            _measure(lambda m=m: [analytic_uncertainty_batch(m, feats_list[i:i + batch_size])
+                                  for i in range(0, n, batch_size)], repeat), n, batch_size=batch_size, **params,
+        ))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = Path(tmp) / "input.jsonl"
+        output_path = Path(tmp) / "output.jsonl"
+        with input_path.open("w", encoding="utf-8") as f:
+            for user, resp in pairs:
+                f.write(json.dumps({"user": user, "response": resp}, ensure_ascii=False) + "\n")
+        for w in workers:
+            times = _measure(lambda: process_file(input_path, output_path, matcher, model, tfidf_calc,
+                                                  batch_size=batch_size, workers=w), repeat)
+            records.append(_record("process_file", times, n, workers=w, batch_size=batch_size, **params))
+    return records
+
+def compare(results: Dict[str, Any], baseline_path: Path, threshold: float) -> int:
+    """基準結果と比較し、threshold 倍を超えて遅くなった項目を表示する。該当件数を返す。"""
+    with baseline_path.open("r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def key(r: Dict[str, Any]) -> Tuple:
+        return tuple(sorted((k, v) for k, v in r.items()
+                            if k not in ("times_s", "median_s", "per_item_us", "items_per_s", "repeat")))
+
+    base = {key(r): r for r in baseline.get("results", [])}
+    regressions = 0
+    print(f"{'benchmark':<40} {'params':<42} {'base':>10} {'now':>10} {'ratio':>7}")
+    for r in results["results"]:
+        b = base.get(key(r))
+        if b is None or not b["median_s"]:
+            continue
+        ratio = r["median_s"] / b["median_s"]
+        flag = ""
+        if ratio > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        params = ",".join(f"{k}={v}" for k, v in r.items() if k in ("corpus_size", "lexicon_size", "workers"))
+        print(f"{r['name']:<40} {params:<42} {b['median_s']:>10.4f} {r['median_s']:>10.4f} {ratio:>7.2f}{flag}")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JAIML v3.3 feature / inference benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000], help="Corpus sizes (pairs)")
+    parser.add_argument("--lexicon-sizes", type=int, nargs="+", default=[0, 10000],
+                        help="Lexicon sizes in terms (0 = the bundled lexicon as is)")
+    parser.add_argument("--density", type=float, default=0.3, help="Lexicon phrase probability per slot")
+    parser.add_argument("--response-sentences", type=int, nargs=2, default=[2, 6], metavar=("MIN", "MAX"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="Worker counts for process_file")
+    parser.add_argument("--lexicon", type=str, default=str(get_lexicon_path()))
+    parser.add_argument("--tfidf-model", type=str, help="Pre-fitted TF-IDF model (.npz)")
+    parser.add_argument("--output", type=str, help="Write results as JSON")
+    parser.add_argument("--baseline", type=str, help="Compare with a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    from core.classifier.ingratiation_model import IngratiationModel
+
+    set_embedding_cache(None)
+    resources.warmup()
+    model = IngratiationModel()
+    tfidf_calc = TFIDFNoveltyCalculator(args.tfidf_model)
+    base_lexicons = load_lexicon_tables(args.lexicon, use_artifact=False).lexicons
+
+    results: Dict[str, Any] = {
+        "schema_version": SCHEMA_VERSION,
+        "environment": _environment(),
+        "config": vars(args),
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for lexicon_size in args.lexicon_sizes:
+            lexicons = expand_lexicon(base_lexicons, lexicon_size, seed=args.seed) if lexicon_size else base_lexicons
+            lexicon_path = Path(tmp) / f"lexicon_{lexicon_size}.yaml"
+            write_lexicon(lexicons, lexicon_path)
+            n_terms = sum(len(t) for t in lexicons.values())
+            print(f"lexicon_size={n_terms}", file=sys.stderr)
+            results["results"].extend(bench_lexicon(lexicon_path, args.repeat, lexicon_size=n_terms))
+            matcher = LexiconMatcher(str(lexicon_path))
+            for size in args.sizes:
+                print(f"  corpus_size={size}", file=sys.stderr)
+                # 辞書サイズによらず同じ文型の分布になるよう、元の辞書から語を選ぶ
+                generator = DialogueGenerator(base_lexicons, seed=args.seed, density=args.density,
+                                              response_sentences=tuple(args.response_sentences))
+                results["results"].extend(bench_corpus(
+                    generator.pairs(size), matcher, model, tfidf_calc, args.repeat, args.batch_size, args.workers,
+                    corpus_size=size, lexicon_size=n_terms,
+                ))
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with output.open("w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Benchmark results saved: {output}", file=sys.stderr)
+    else:
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+
+    if args.baseline:
+        regressions = compare(results, Path(args.baseline), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
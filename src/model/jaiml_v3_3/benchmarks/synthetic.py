@@ -0,0 +1,117 @@
+# src/model/jaiml_v3_3/benchmarks/synthetic.py
+"""ベンチマーク用の合成対話データ生成。
+
+辞書カテゴリの語句と中立的な文片を組み合わせて、日本語風の (ユーザー発話, AI応答) を生成する。
+乱数シードを固定すれば同じコーパスが再現される。意味的に自然な文である必要はなく、
+文数・文字数・辞書語の出現密度を制御できることを優先する。
+"""
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple, Union
+
+import yaml
+
+__all__ = [
+    "DialogueGenerator",
+    "expand_lexicon",
+    "write_lexicon",
+]
+
+# 辞書語を含まない文片（名詞 + 述部）
+_NOUNS = [
+    "今日", "天気", "会議", "資料", "説明", "質問", "計画", "結果", "問題", "方法",
+    "時間", "内容", "意見", "目標", "作業", "予定", "データ", "手順", "仕様", "確認",
+]
+_PREDICATES = [
+    "を確認します", "について説明します", "が必要です", "を検討しました", "があります",
+    "を共有します", "は順調です", "を整理しました", "に注意してください", "を進めています",
+]
+_CONNECTIVES = ["", "、", "また、", "そして", "ところで"]
+_TERMINATORS = ["。", "。", "。", "！", "？"]
+
+# 合成語句に使う文字（ひらがな・常用漢字の一部）
+_KANA = [chr(c) for c in range(0x3042, 0x3094)]
+_KANJI = [chr(c) for c in range(0x4E00, 0x4E00 + 800)]
+
+@dataclass
+class DialogueGenerator:
+    """辞書カテゴリに基づく合成対話ジェネレータ。
+
+    Args:
+        lexicons: カテゴリ名 → 語のリスト
+        seed: 乱数シード
+        density: 1 文あたりの辞書語の挿入確率（各スロットごと、0.0〜1.0）
+        phrase_slots: 1 文あたりの辞書語スロット数
+        response_sentences: 応答の文数の範囲 (最小, 最大)
+        user_sentences: ユーザー発話の文数の範囲 (最小, 最大)
+    """
+    lexicons: Dict[str, List[str]]
+    seed: int = 0
+    density: float = 0.3
+    phrase_slots: int = 3
+    response_sentences: Tuple[int, int] = (2, 6)
+    user_sentences: Tuple[int, int] = (1, 2)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+        self._categories = [c for c, terms in self.lexicons.items() if terms]
+
+    def sentence(self) -> str:
+        rng = self._rng
+        parts: List[str] = [rng.choice(_CONNECTIVES)]
+        for _ in range(self.phrase_slots):
+            if self._categories and rng.random() < self.density:
+                parts.append(rng.choice(self.lexicons[rng.choice(self._categories)]))
+            parts.append(rng.choice(_NOUNS))
+        parts.append(rng.choice(_PREDICATES))
+        parts.append(rng.choice(_TERMINATORS))
+        return "".join(parts)
+
+    def text(self, n_sentences: Tuple[int, int]) -> str:
+        return "".join(self.sentence() for _ in range(self._rng.randint(*n_sentences)))
+
+    def pairs(self, n: int) -> List[Tuple[str, str]]:
+        """(ユーザー発話, AI応答) を n 件生成する。"""
+        return [(self.text(self.user_sentences), self.text(self.response_sentences)) for _ in range(n)]
+
+    def write_jsonl(self, path: Union[str, Path], n: int) -> None:
+        """run_inference の入力形式 ({"user", "response"} の JSONL) で書き出す。"""
+        with open(path, "w", encoding="utf-8") as f:
+            for user, resp in self.pairs(n):
+                f.write(json.dumps({"user": user, "response": resp}, ensure_ascii=False) + "\n")
+
+def expand_lexicon(lexicons: Dict[str, List[str]], target_size: int, seed: int = 0) -> Dict[str, List[str]]:
+    """辞書を合成語句で target_size 語まで拡張する（大規模辞書の照合・読み込み性能の計測用）。
+
+    追加語句は既存語の比率に比例して各カテゴリへ配分する。target_size が現在の語数以下なら
+    元の辞書をそのまま返す。
+    """
+    current = sum(len(terms) for terms in lexicons.values())
+    if target_size <= current:
+        return {c: list(terms) for c, terms in lexicons.items()}
+    rng = random.Random(seed)
+    existing = {term for terms in lexicons.values() for term in terms}
+    expanded: Dict[str, List[str]] = {}
+    categories = list(lexicons)
+    remaining = target_size - current
+    for i, category in enumerate(categories):
+        terms = list(lexicons[category])
+        share = remaining if i == len(categories) - 1 else round((target_size - current) * len(terms) / max(current, 1))
+        share = min(share, remaining)
+        while share > 0:
+            alphabet: Sequence[str] = _KANJI if rng.random() < 0.5 else _KANA
+            phrase = "".join(rng.choice(alphabet) for _ in range(rng.randint(2, 6)))
+            if phrase in existing:
+                continue
+            existing.add(phrase)
+            terms.append(phrase)
+            share -= 1
+            remaining -= 1
+        expanded[category] = terms
+    return expanded
+
+def write_lexicon(lexicons: Dict[str, List[str]], path: Union[str, Path]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(lexicons, f, allow_unicode=True, sort_keys=False)
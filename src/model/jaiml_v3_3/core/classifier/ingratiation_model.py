@@ -1,7 +1,18 @@
 import torch
 import torch.nn as nn
 from itertools import repeat
-from typing import Dict
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple, Union
+
+from core.classifier.numpy_backend import GH_NODES, GH_WEIGHTS, NumpyIngratiationModel
+from core.classifier.schema import CATEGORIES, FEATURE_ORDER, HEAD_COLUMNS
+
+def features_to_tensor(features_list: Sequence[Dict[str, float]]) -> torch.Tensor:
+    """特徴量辞書の列を FEATURE_ORDER 順の (B, 12) float32 行列に変換する。"""
+    return torch.tensor(
+        [[f[name] for name in FEATURE_ORDER] for f in features_list],
+        dtype=torch.float32,
+    ).reshape(len(features_list), len(FEATURE_ORDER))
 
 class MLPHead(nn.Module):
     def __init__(self, input_dim: int = 3):
@@ -17,6 +28,15 @@ class MLPHead(nn.Module):
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         return self.model(x)
 
+    def logit_moments(self, x: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Dropout 下のロジットの平均と分散 (各 shape (...,)) を解析的に求める。"""
+        first, dropout, second = self.model[0], self.model[2], self.model[3]
+        hidden = torch.relu(first(x))
+        w2 = second.weight[0]
+        mean = hidden @ w2 + second.bias[0]
+        var = (hidden * hidden) @ (w2 * w2) * (dropout.p / (1.0 - dropout.p))
+        return mean, var
+
 class IngratiationModel(nn.Module):
     """12特徴量ベース MLP 分類器。Transformer 併用なし。"""
 
@@ -28,42 +48,92 @@ class IngratiationModel(nn.Module):
         self.mechanical_head = MLPHead(3)
         self.self_head = MLPHead(3)
 
-    def forward(self, features: Dict[str, float]) -> Dict[str, torch.Tensor]:
-        """特徴量辞書を受け取り、4カテゴリ soft score を Tensor で返す。"""
-        # 社会的
-        social_in = torch.tensor([
-            features["semantic_congruence"],
-            features["sentiment_emphasis_score"] / 3.0,  # 値域[0,3]を[0,1]に正規化
-            features["user_repetition_ratio"],
-        ], dtype=torch.float32)
-        # 回避的 (決定性は逆指標)
-        avoid_in = torch.tensor([
-            features["modal_expression_ratio"],
-            features["response_dependency"],
-            1.0 - features["assertiveness_score"],
-        ], dtype=torch.float32)
-        # 機械的 (情報加算率は逆指標)
-        mech_in = torch.tensor([
-            features["lexical_diversity_inverse"],
-            features["template_match_rate"],
-            1.0 - features["tfidf_novelty"],
-        ], dtype=torch.float32)
-        # 自己迎合 (自己呈示強度は 0.5 倍して 0‑1 射影)
-        self_in = torch.tensor([
-            features["self_ref_pos_score"],
-            features["ai_subject_ratio"],
-            min(features["self_promotion_intensity"] * 0.5, 1.0),
-        ], dtype=torch.float32)
-
-        scores = torch.stack([
+    @staticmethod
+    def normalize(x: torch.Tensor) -> torch.Tensor:
+        """特徴量行列 (..., 12) にヘッド入力用の正規化をベクトル演算で適用する。"""
+        x = x.clone()
+        x[..., 1] = x[..., 1] / 3.0                  # sentiment_emphasis_score: 値域[0,3]を[0,1]に正規化
+        x[..., 5] = 1.0 - x[..., 5]                  # assertiveness_score: 決定性は逆指標
+        x[..., 8] = 1.0 - x[..., 8]                  # tfidf_novelty: 情報加算率は逆指標
+        x[..., 11] = (x[..., 11] * 0.5).clamp(max=1.0)  # self_promotion_intensity: 0.5 倍して 0‑1 射影
+        return x
+
+    @staticmethod
+    def split_heads(x: torch.Tensor) -> List[torch.Tensor]:
+        """正規化済み特徴量行列 (..., 12) を 4 ヘッドの入力 (各 (..., 3)) に分割する。"""
+        return [x[..., list(cols)] for cols in HEAD_COLUMNS]
+
+    def forward_heads(self, social_in: torch.Tensor, avoid_in: torch.Tensor,
+                      mech_in: torch.Tensor, self_in: torch.Tensor) -> torch.Tensor:
+        """4 ヘッドの入力 (各 shape (..., 3)) から soft score (shape (..., 4)) を返す。
+
+        先頭次元はバッチ・MCDropout サンプル次元として任意に取れ、
+        train モードでは行ごとに独立した Dropout マスクが適用される。
+        """
+        return torch.cat([
             self.social_head(social_in),
             self.avoidant_head(avoid_in),
             self.mechanical_head(mech_in),
             self.self_head(self_in),
-        ]).squeeze()  # shape (4,)
-        return {
-            "social": scores[0],
-            "avoidant": scores[1],
-            "mechanical": scores[2],
-            "self": scores[3],
-        }
\ No newline at end of file
+        ], dim=-1)
+
+    def forward_matrix(self, x: torch.Tensor) -> torch.Tensor:
+        """FEATURE_ORDER 順の特徴量行列 (B, 12) から soft score 行列 (B, 4) を返す。
+
+        正規化 (/3.0, 1.0 - x, min(x*0.5, 1)) もテンソル演算で行うため、
+        数千ペアを 1 回の呼び出しで処理できる。先頭次元は任意 (..., 12) でもよい。
+        """
+        return self.forward_heads(*self.split_heads(self.normalize(x)))
+
+    def forward_moments(self, x: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """特徴量行列 (..., 12) から Dropout 下の soft score の平均と分散 (各 (..., 4)) を返す。
+
+        MCDropout のサンプリングを置き換える解析的モード。ロジットの平均・分散は厳密に求め、
+        Sigmoid のモーメントは正規近似のもとで Gauss–Hermite 求積により求める
+        （NumpyIngratiationModel.moments と同じ計算）。
+        """
+        logit_moments = [head.logit_moments(head_in)
+                         for head, head_in in zip(self._heads(), self.split_heads(self.normalize(x)))]
+        mean = torch.stack([m for m, _ in logit_moments], dim=-1).double().unsqueeze(-1)
+        std = torch.stack([v for _, v in logit_moments], dim=-1).double().mul(2.0).sqrt().unsqueeze(-1)
+        nodes = torch.from_numpy(GH_NODES)
+        weights = torch.from_numpy(GH_WEIGHTS) / torch.pi ** 0.5
+        s = torch.sigmoid(mean + std * nodes)
+        m1 = s @ weights
+        m2 = (s * s) @ weights
+        return m1, (m2 - m1 * m1).clamp(min=0.0)
+
+    def forward(self, features: Dict[str, float]) -> Dict[str, torch.Tensor]:
+        """特徴量辞書を受け取り、4カテゴリ soft score を Tensor で返す。"""
+        scores = self.forward_matrix(features_to_tensor([features]))[0]  # shape (4,)
+        return {cat: scores[i] for i, cat in enumerate(CATEGORIES)}
+
+    def _heads(self) -> List[MLPHead]:
+        return [self.social_head, self.avoidant_head, self.mechanical_head, self.self_head]
+
+    def to_numpy(self) -> NumpyIngratiationModel:
+        """4 ヘッドの重みを積み重ねた NumpyIngratiationModel を返す。"""
+        first = [head.model[0] for head in self._heads()]
+        second = [head.model[3] for head in self._heads()]
+        with torch.no_grad():
+            return NumpyIngratiationModel(
+                torch.stack([layer.weight for layer in first]).numpy(),          # (4, 128, 3)
+                torch.stack([layer.bias for layer in first]).numpy(),            # (4, 128)
+                torch.stack([layer.weight[0] for layer in second]).numpy(),      # (4, 128)
+                torch.cat([layer.bias for layer in second]).numpy(),             # (4,)
+                dropout_p=self.social_head.model[2].p,
+            )
+
+    def export_weights(self, path: Union[str, Path]) -> None:
+        """NumPy バックエンド用の重みファイル (.npz) を書き出す。"""
+        self.to_numpy().save(path)
+
+    def load_weights(self, path: Union[str, Path]) -> None:
+        """export_weights() で書き出した重みファイルを読み込む。"""
+        weights = NumpyIngratiationModel.load(path)
+        with torch.no_grad():
+            for h, head in enumerate(self._heads()):
+                head.model[0].weight.copy_(torch.from_numpy(weights.w1[h]))
+                head.model[0].bias.copy_(torch.from_numpy(weights.b1[h]))
+                head.model[3].weight.copy_(torch.from_numpy(weights.w2[h][None, :]))
+                head.model[3].bias.copy_(torch.from_numpy(weights.b2[h:h + 1]))
@@ -0,0 +1,177 @@
+# src/model/jaiml_v3_3/core/classifier/numpy_backend.py
+# IngratiationModel の NumPy 推論バックエンド（torch に依存しない）
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from core.classifier.schema import CATEGORIES, FEATURE_ORDER, HEAD_COLUMNS
+
+__all__ = [
+    "WEIGHTS_FORMAT_VERSION",
+    "GH_NODES",
+    "GH_WEIGHTS",
+    "NumpyIngratiationModel",
+    "features_to_array",
+    "sigmoid_moments",
+]
+
+# 書き出し形式のバージョン（配列名・形状を変える場合に更新する）
+WEIGHTS_FORMAT_VERSION = 1
+
+# ヘッド h が参照する特徴量列 (4, 3)
+_HEAD_INDEX = np.asarray(HEAD_COLUMNS, dtype=np.intp)
+
+# 解析的モードで Sigmoid 出力のモーメントを求める Gauss–Hermite 求積（8 点）の節点と重み
+GH_NODES, GH_WEIGHTS = np.polynomial.hermite.hermgauss(8)
+
+def features_to_array(features_list: Sequence[Dict[str, float]]) -> np.ndarray:
+    """特徴量辞書の列を FEATURE_ORDER 順の (B, 12) float32 行列に変換する。"""
+    return np.asarray(
+        [[f[name] for name in FEATURE_ORDER] for f in features_list],
+        dtype=np.float32,
+    ).reshape(len(features_list), len(FEATURE_ORDER))
+
+def sigmoid_moments(mean: np.ndarray, var: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """ロジット z ~ N(mean, var) に対する Sigmoid(z) の平均と分散を Gauss–Hermite 求積で求める。"""
+    mean = np.asarray(mean, dtype=np.float64)[..., None]
+    std = np.sqrt(2.0 * np.asarray(var, dtype=np.float64))[..., None]
+    s = 1.0 / (1.0 + np.exp(-(mean + std * GH_NODES)))
+    weights = GH_WEIGHTS / np.sqrt(np.pi)
+    m1 = s @ weights
+    m2 = (s * s) @ weights
+    return m1, np.maximum(m2 - m1 * m1, 0.0)
+
+class NumpyIngratiationModel:
+    """4 つの MLPHead (3→128→ReLU→Dropout→1→Sigmoid) を NumPy で計算する推論専用モデル。
+
+    重みは 4 ヘッド分を積み重ねた配列として保持し、全ヘッド・全サンプルを
+    1 回の einsum で計算する。MCDropout のマスクは (B, N, 4, 128) をまとめて生成する。
+    IngratiationModel.export_weights() で書き出した .npz から読み込む。
+
+    Args:
+        w1: 第 1 層の重み (4, 128, 3)
+        b1: 第 1 層のバイアス (4, 128)
+        w2: 第 2 層の重み (4, 128)
+        b2: 第 2 層のバイアス (4,)
+        dropout_p: Dropout 率
+        seed: MCDropout マスク生成の乱数シード
+    """
+
+    def __init__(self, w1: np.ndarray, b1: np.ndarray, w2: np.ndarray, b2: np.ndarray,
+                 dropout_p: float = 0.3, seed: Optional[int] = None):
+        self.w1 = np.ascontiguousarray(w1, dtype=np.float32)
+        self.b1 = np.ascontiguousarray(b1, dtype=np.float32)
+        self.w2 = np.ascontiguousarray(w2, dtype=np.float32)
+        self.b2 = np.ascontiguousarray(b2, dtype=np.float32)
+        n_heads, hidden, inputs = self.w1.shape
+        if (n_heads, inputs) != _HEAD_INDEX.shape or self.b1.shape != (n_heads, hidden) \
+                or self.w2.shape != (n_heads, hidden) or self.b2.shape != (n_heads,):
+            raise ValueError("Inconsistent MLP head weight shapes")
+        self.dropout_p = float(dropout_p)
+        self.rng = np.random.default_rng(seed)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], seed: Optional[int] = None) -> "NumpyIngratiationModel":
+        with np.load(Path(path), allow_pickle=False) as data:
+            version = int(data["format_version"])
+            if version != WEIGHTS_FORMAT_VERSION:
+                raise ValueError(f"Unsupported weights format version {version}: {path}")
+            if tuple(data["categories"].tolist()) != CATEGORIES or tuple(data["feature_order"].tolist()) != FEATURE_ORDER:
+                raise ValueError(f"Weights were exported for a different feature schema: {path}")
+            return cls(data["w1"], data["b1"], data["w2"], data["b2"], float(data["dropout_p"]), seed=seed)
+
+    @classmethod
+    def random(cls, seed: Optional[int] = None, dropout_p: float = 0.3, hidden: int = 128) -> "NumpyIngratiationModel":
+        """torch.nn.Linear の既定初期化 U(-1/√fan_in, 1/√fan_in) と同じ分布で重みを生成する。"""
+        rng = np.random.default_rng(seed)
+        n_heads, inputs = _HEAD_INDEX.shape
+        bound1, bound2 = 1.0 / np.sqrt(inputs), 1.0 / np.sqrt(hidden)
+        return cls(
+            rng.uniform(-bound1, bound1, (n_heads, hidden, inputs)),
+            rng.uniform(-bound1, bound1, (n_heads, hidden)),
+            rng.uniform(-bound2, bound2, (n_heads, hidden)),
+            rng.uniform(-bound2, bound2, (n_heads,)),
+            dropout_p=dropout_p,
+            seed=seed,
+        )
+
+    def save(self, path: Union[str, Path]) -> None:
+        np.savez(
+            Path(path),
+            format_version=np.int64(WEIGHTS_FORMAT_VERSION),
+            categories=np.array(CATEGORIES),
+            feature_order=np.array(FEATURE_ORDER),
+            dropout_p=np.float64(self.dropout_p),
+            w1=self.w1, b1=self.b1, w2=self.w2, b2=self.b2,
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """ワーカープロセスへ渡すための重み（pickle 可能）。"""
+        return {"w1": self.w1, "b1": self.b1, "w2": self.w2, "b2": self.b2, "dropout_p": self.dropout_p}
+
+    @staticmethod
+    def normalize(x: np.ndarray) -> np.ndarray:
+        """IngratiationModel.normalize と同じ正規化を (..., 12) 行列に適用する。"""
+        x = np.array(x, dtype=np.float32, copy=True)
+        x[..., 1] = x[..., 1] / 3.0
+        x[..., 5] = 1.0 - x[..., 5]
+        x[..., 8] = 1.0 - x[..., 8]
+        x[..., 11] = np.minimum(x[..., 11] * 0.5, 1.0)
+        return x
+
+    def _hidden(self, x: np.ndarray) -> np.ndarray:
+        """正規化前の特徴量 (..., 12) から ReLU 後の隠れ層 (..., 4, 128) を求める。"""
+        heads_in = self.normalize(x)[..., _HEAD_INDEX]  # (..., 4, 3)
+        hidden = np.einsum("...hi,hki->...hk", heads_in, self.w1) + self.b1
+        return np.maximum(hidden, 0.0, out=hidden)
+
+    def _output(self, hidden: np.ndarray) -> np.ndarray:
+        logits = np.einsum("...hk,hk->...h", hidden, self.w2) + self.b2
+        return (1.0 / (1.0 + np.exp(-logits))).astype(np.float32, copy=False)
+
+    def forward_matrix(self, x: np.ndarray, masks: Optional[np.ndarray] = None) -> np.ndarray:
+        """特徴量行列 (..., 12) から soft score (..., 4) を返す。
+
+        Args:
+            x: FEATURE_ORDER 順の特徴量行列
+            masks: Dropout のスケール済みマスク (..., 4, 128)（None なら Dropout なし = eval モード）
+        """
+        hidden = self._hidden(x)
+        if masks is not None:
+            hidden = hidden * masks
+        return self._output(hidden)
+
+    def dropout_masks(self, shape: Sequence[int]) -> np.ndarray:
+        """shape (..., 4, 128) の Dropout マスク（保持確率で割ってスケール済み）を一括生成する。"""
+        keep = 1.0 - self.dropout_p
+        return (self.rng.random(tuple(shape), dtype=np.float32) < keep).astype(np.float32) / np.float32(keep)
+
+    def mc_forward(self, x: np.ndarray, n_samples: int) -> np.ndarray:
+        """B ペア × N サンプルの MCDropout 推論を行い、shape (B, N, 4) を返す。
+
+        隠れ層はペアごとに 1 回だけ計算し、サンプル次元にはマスクのみを掛ける。
+        """
+        hidden = self._hidden(np.asarray(x, dtype=np.float32))  # (B, 4, 128)
+        masks = self.dropout_masks((hidden.shape[0], n_samples) + hidden.shape[1:])
+        return self._output(hidden[:, None] * masks)
+
+    def logit_moments(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Dropout 下の各ヘッドのロジットの平均と分散 (..., 4) を解析的に求める。
+
+        Dropout は ReLU 後の隠れ層 h に掛かるため、ロジット z = Σ_k w_k h_k m_k / (1-p) + b
+        （m_k ~ Bernoulli(1-p)）の平均は Σ w_k h_k + b、分散は p/(1-p) · Σ w_k² h_k² となる。
+        """
+        hidden = self._hidden(x).astype(np.float64)
+        w2 = self.w2.astype(np.float64)
+        mean = np.einsum("...hk,hk->...h", hidden, w2) + self.b2
+        var = np.einsum("...hk,hk->...h", hidden * hidden, w2 * w2) * (self.dropout_p / (1.0 - self.dropout_p))
+        return mean, var
+
+    def moments(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """MCDropout の代わりに、Dropout 下の soft score の平均と分散 (..., 4) を 1 回の計算で返す。
+
+        ロジットは 128 個の独立項の和なので正規分布で近似し、Sigmoid のモーメントは
+        Gauss–Hermite 求積で求める。乱数を使わないため結果は再現可能である。
+        """
+        return sigmoid_moments(*self.logit_moments(x))
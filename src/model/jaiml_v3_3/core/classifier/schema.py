@@ -0,0 +1,35 @@
+# src/model/jaiml_v3_3/core/classifier/schema.py
+# 分類器の入出力スキーマ（torch に依存しない定数のみを置く）
+
+__all__ = [
+    "CATEGORIES",
+    "FEATURE_ORDER",
+    "HEAD_COLUMNS",
+]
+
+# soft score の列順（forward_heads / forward_matrix の出力次元に対応）
+CATEGORIES = ("social", "avoidant", "mechanical", "self")
+
+# 特徴量行列 (B, 12) の列順
+FEATURE_ORDER = (
+    "semantic_congruence",
+    "sentiment_emphasis_score",
+    "user_repetition_ratio",
+    "modal_expression_ratio",
+    "response_dependency",
+    "assertiveness_score",
+    "lexical_diversity_inverse",
+    "template_match_rate",
+    "tfidf_novelty",
+    "self_ref_pos_score",
+    "ai_subject_ratio",
+    "self_promotion_intensity",
+)
+
+# 各ヘッドが参照する FEATURE_ORDER 上の列番号
+HEAD_COLUMNS = (
+    (0, 1, 2),    # 社会的: semantic_congruence, sentiment_emphasis_score, user_repetition_ratio
+    (3, 4, 5),    # 回避的: modal_expression_ratio, response_dependency, assertiveness_score
+    (6, 7, 8),    # 機械的: lexical_diversity_inverse, template_match_rate, tfidf_novelty
+    (9, 10, 11),  # 自己迎合: self_ref_pos_score, ai_subject_ratio, self_promotion_intensity
+)
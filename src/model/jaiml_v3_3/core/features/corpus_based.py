@@ -1,60 +1,204 @@
 # src/model/jaiml_v3_3/core/features/corpus_based.py
-from typing import List, Callable
-from sklearn.feature_extraction.text import TfidfVectorizer
+import hashlib
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
 import numpy as np
-from core.utils.tokenize import mecab_tokenize
+from core.utils import resources
+from core.utils.analysis import TextLike, as_analyzed
 
 __all__ = [
     "TFIDFNoveltyCalculator",
 ]
 
+# "新規情報" とみなす上位 TF-IDF 語の割合
+TOP_RATIO = 0.2
+
 class TFIDFNoveltyCalculator:
-    """TF-IDF に基づく情報加算率 (tfidf_novelty) を計算する簡易実装。
+    """TF-IDF に基づく情報加算率 (tfidf_novelty) を計算する。
 
     - 上位 20% TF-IDF 単語を "新規情報" とみなす。
-    - ユーザー発話と AI 応答のペアをコーパスとし、その TF-IDF を用いる（外部大規模コーパスがない前提）。
-    - 実運用では対話コーパスで vectorizer を事前学習させ、transform のみ行う想定。
+    - 事前学習済みモデル（語彙と IDF）があれば transform のみで計算する（推奨）。
+      fit() で対話コーパスから学習し、save()/load() で永続化する。
+    - モデルがない場合は、ユーザー発話と AI 応答のペアをコーパスとしてペアごとに fit する（従来動作）。
+
+    Args:
+        model_path: save() で保存した TF-IDF モデル（.npz）のパス
     """
 
-    def __init__(self):
-        # fugashiベースのトークナイザを使用
-        self.vectorizer = TfidfVectorizer(
-            tokenizer=self._fugashi_tokenize,
-            token_pattern=None,  # tokenizerを使用する場合は無効化
+    def __init__(self, model_path: Optional[Union[str, Path]] = None):
+        # scikit-learn は初回計算時に読み込む
+        self._vectorizer = None
+        self.model_path: Optional[str] = None
+        self.vocabulary: Optional[Dict[str, int]] = None
+        self.idf: Optional[np.ndarray] = None
+        if model_path is not None:
+            self._load(model_path)
+
+    @property
+    def vectorizer(self):
+        if self._vectorizer is None:
+            self._vectorizer = self._new_vectorizer()
+        return self._vectorizer
+
+    def _new_vectorizer(self):
+        TfidfVectorizer = resources.get("sklearn_tfidf")
+        # 解析済みテキストの形態素列をそのまま語彙とする analyzer を使用
+        return TfidfVectorizer(
+            analyzer=self._fugashi_tokenize,
             min_df=1,
             max_df=0.9
         )
-    
-    def _fugashi_tokenize(self, text: str) -> List[str]:
-        """TfidfVectorizer用のfugashiベースのトークナイザ関数。
-        
+
+    def _fugashi_tokenize(self, text: TextLike) -> List[str]:
+        """TfidfVectorizer用のfugashiベースの analyzer 関数。
+
+        AnalyzedText を受け取った場合は再解析せず、その形態素列を用いる。
+
         Args:
-            text: 入力テキスト
-            
+            text: 入力テキスト（または解析済みテキスト）
+
         Returns:
-            List[str]: 形態素のリスト
+            List[str]: 形態素のリスト（小文字化済み）
         """
-        return mecab_tokenize(text)
+        return [token.lower() for token in as_analyzed(text).surfaces]
 
-    def compute(self, user_text: str, response_text: str) -> float:
-        """情報加算率を算出する。
+    # --- 事前学習モデル ----------------------------------------------------
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.idf is not None
+
+    def fit(self, texts: Iterable[TextLike]) -> "TFIDFNoveltyCalculator":
+        """参照対話コーパスで語彙と IDF を学習する。
+
+        Args:
+            texts: コーパス文書（発話・応答を各 1 文書とする）
 
         Returns:
-            float: 値域 [0,1]。高値 = 新規情報が多い。
+            TFIDFNoveltyCalculator: self
+        """
+        vectorizer = self._new_vectorizer()
+        vectorizer.fit(texts)
+        self.vocabulary = {term: int(i) for term, i in vectorizer.vocabulary_.items()}
+        self.idf = np.asarray(vectorizer.idf_, dtype=np.float64)
+        return self
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """語彙と IDF を .npz として保存する。
+
+        np.savez と同じく、拡張子が .npz でなければ付け加える（model_path も同じパスにする）。
+
+        Returns:
+            Path: 保存したファイルのパス
+        """
+        if not self.is_fitted:
+            raise ValueError("TF-IDF model is not fitted")
+        path = Path(path)
+        if path.suffix != ".npz":
+            path = path.with_name(path.name + ".npz")
+        terms = [""] * len(self.vocabulary)
+        for term, i in self.vocabulary.items():
+            terms[i] = term
+        np.savez(path, terms=np.array(terms, dtype=str), idf=self.idf)
+        self.model_path = str(path)
+        return path
+
+    def _load(self, path: Union[str, Path]) -> None:
+        with np.load(Path(path), allow_pickle=False) as data:
+            terms = data["terms"].tolist()
+            self.idf = np.asarray(data["idf"], dtype=np.float64)
+        if len(terms) != len(self.idf):
+            raise ValueError(f"Corrupt TF-IDF model: {path}")
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        self.model_path = str(path)
+
+    @property
+    def fingerprint(self) -> str:
+        """モデル内容の識別子（未学習時は 'per-pair'）。"""
+        if not self.is_fitted:
+            return "per-pair"
+        h = hashlib.sha1()
+        h.update(json.dumps(sorted(self.vocabulary.items()), ensure_ascii=False).encode("utf-8"))
+        h.update(self.idf.tobytes())
+        return h.hexdigest()[:16]
+
+    def term_counts(self, text: TextLike) -> Counter:
+        """語彙内の語の出現回数（語 ID → 回数）。事前学習モデルがある場合のみ使用できる。
+
+        テキストを分けて求めた結果を足し合わせることができる（逐次計算で用いる）。
         """
-        # コーパスを構築
-        corpus: List[str] = [user_text, response_text]
-        tfidf_matrix = self.vectorizer.fit_transform(corpus)
-        # 行0: user, 行1: response
-        response_vec = tfidf_matrix[1].toarray()[0]
-        user_vec = tfidf_matrix[0].toarray()[0]
-        # 上位20%インデックス
-        non_zero_idx = response_vec.nonzero()[0]
-        if len(non_zero_idx) == 0:
+        return Counter(
+            idx for idx in map(self.vocabulary.get, self._fugashi_tokenize(text)) if idx is not None
+        )
+
+    def _transform(self, text: TextLike) -> Tuple[np.ndarray, np.ndarray]:
+        """語彙内の語について (語 ID, TF-IDF 重み) を返す（疎表現）。
+
+        L2 正規化は上位語の選択に影響しないため省略する。語彙外の語は無視する。
+        """
+        return self._weights(self.term_counts(text))
+
+    def _weights(self, counts: Counter) -> Tuple[np.ndarray, np.ndarray]:
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        ids = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        return ids, tf * self.idf[ids]
+
+    # --- 情報加算率 --------------------------------------------------------
+
+    @staticmethod
+    def _novelty(resp_ids: np.ndarray, resp_weights: np.ndarray, user_ids: np.ndarray) -> float:
+        """応答の上位 20% 語のうち、ユーザー側に現れない語の割合を求める。"""
+        if len(resp_ids) == 0:
             return 0.0
-        top_k = max(1, int(len(non_zero_idx) * 0.2))
-        top_indices = response_vec.argsort()[::-1][:top_k]
+        top_k = max(1, int(len(resp_ids) * TOP_RATIO))
+        # 全体のソートではなく部分選択で上位 top_k を得る
+        if top_k < len(resp_ids):
+            top = np.argpartition(-resp_weights, top_k - 1)[:top_k]
+            top_ids = resp_ids[top]
+        else:
+            top_ids = resp_ids
         # top 単語のうち user に存在しない単語割合
-        novel_mask = (user_vec[top_indices] == 0).astype(float)
-        novelty_ratio = float(novel_mask.sum() / top_k)
-        return novelty_ratio
\ No newline at end of file
+        novel = np.count_nonzero(~np.isin(top_ids, user_ids, assume_unique=True))
+        return float(novel / top_k)
+
+    def compute(self, user_text: TextLike, response_text: TextLike) -> float:
+        """情報加算率を算出する。
+
+        Returns:
+            float: 値域 [0,1]。高値 = 新規情報が多い。
+        """
+        if self.is_fitted:
+            user_ids, _ = self._transform(user_text)
+            resp_ids, resp_weights = self._transform(response_text)
+            return self._novelty(resp_ids, resp_weights, user_ids)
+
+        # 事前学習モデルがない場合はペアをコーパスとして fit する（解析済みテキストのまま渡す）
+        corpus: List[TextLike] = [as_analyzed(user_text), as_analyzed(response_text)]
+        tfidf_matrix = self.vectorizer.fit_transform(corpus).tocsr()
+        # 行0: user, 行1: response（疎行列のまま非ゼロ要素のみ参照する）
+        user_row, resp_row = tfidf_matrix[0], tfidf_matrix[1]
+        return self._novelty(resp_row.indices, resp_row.data, user_row.indices)
+
+    def novelty_from_counts(self, response_counts: Counter, user_counts: Counter) -> float:
+        """term_counts の結果から情報加算率を求める（事前学習モデルがある場合の compute と同じ値）。"""
+        resp_ids, resp_weights = self._weights(response_counts)
+        user_ids = np.fromiter(user_counts.keys(), dtype=np.int64, count=len(user_counts))
+        return self._novelty(resp_ids, resp_weights, user_ids)
+
+    def compute_batch(self, pairs: Sequence[Tuple[TextLike, TextLike]]) -> List[float]:
+        """compute のバッチ版。同一テキストの変換結果はバッチ内で再利用する。"""
+        if not self.is_fitted:
+            return [self.compute(user, resp) for user, resp in pairs]
+        transformed: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+        def transform(text: TextLike) -> Tuple[np.ndarray, np.ndarray]:
+            analyzed = as_analyzed(text)
+            if analyzed.text not in transformed:
+                transformed[analyzed.text] = self._transform(analyzed)
+            return transformed[analyzed.text]
+
+        return [self._novelty(*transform(resp), transform(user)[0]) for user, resp in pairs]
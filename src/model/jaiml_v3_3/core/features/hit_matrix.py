@@ -0,0 +1,194 @@
+# src/model/jaiml_v3_3/core/features/hit_matrix.py
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from core.utils.analysis import TextLike, as_analyzed
+from lexicons.matcher import LexiconHit, LexiconMatcher
+
+__all__ = [
+    "SentenceHitMatrix",
+    "HitMatrixBatch",
+    "contrast_near",
+    "hit_matrix",
+    "lexicon_feature_counts",
+    "lexicon_feature_values",
+    "lexicon_features_batch",
+]
+
+# 逆接助詞の前後何文字以内に謙遜語・実績語彙があれば謙遜装い自慢のスロット2とみなすか
+CONTRAST_WINDOW = 20
+
+@dataclass(frozen=True)
+class SentenceHitMatrix:
+    """1 応答分の 文 × カテゴリ 照合行列。
+
+    応答を一度だけ走査して構築し、辞書系特徴量はすべてこの行列の集約として計算する。
+
+    Attributes:
+        categories: 列に対応するカテゴリ名（辞書の記載順）
+        counts: 文内に完全に収まる照合の件数。shape (n_sentences, n_categories)
+        first: 文内で最初の照合の開始位置（文頭からの文字数、照合なしは -1）
+        last: 文内で最後の照合の開始位置（照合なしは -1）
+        contrast_near: 逆接助詞の前後 20 文字以内に謙遜語・実績語彙がある文。shape (n_sentences,)
+    """
+    categories: Sequence[str]
+    counts: np.ndarray
+    first: np.ndarray
+    last: np.ndarray
+    contrast_near: np.ndarray
+
+    @property
+    def n_sentences(self) -> int:
+        return self.counts.shape[0]
+
+    def has(self, category: str) -> np.ndarray:
+        """カテゴリの語を含む文の真偽配列（辞書にないカテゴリは全て False）。"""
+        try:
+            col = self.categories.index(category)
+        except ValueError:
+            return np.zeros(self.n_sentences, dtype=bool)
+        return self.counts[:, col] > 0
+
+def contrast_near(hits: Dict[str, List[LexiconHit]], sent_start: int, sent_len: int) -> bool:
+    """謙遜装い自慢のスロット2（逆接助詞 ±20 文字以内の謙遜語・実績語彙）を判定する。
+
+    各逆接助詞について文内での最初の出現位置を基準とし、窓内に完全に収まる照合があるかを見る。
+    """
+    nearby = [
+        hit
+        for category in ('humble_phrases', 'achievement_verbs', 'achievement_nouns')
+        for hit in hits.get(category, ())
+    ]
+    if not nearby:
+        return False
+    first_contrast: Dict[str, int] = {}
+    for hit in hits.get('contrastive_conjunctions', ()):
+        first_contrast.setdefault(hit.term, hit.start - sent_start)
+    for contrast, pos in first_contrast.items():
+        context_start = sent_start + max(0, pos - CONTRAST_WINDOW)
+        context_end = sent_start + min(sent_len, pos + len(contrast) + CONTRAST_WINDOW)
+        if any(context_start <= hit.start and hit.end <= context_end for hit in nearby):
+            return True
+    return False
+
+def hit_matrix(response_text: TextLike, lexicon_matcher: LexiconMatcher) -> SentenceHitMatrix:
+    """応答の照合行列を返す（AnalyzedText.cache に保持し、特徴量間で共有する）。"""
+    response = as_analyzed(response_text)
+    key = f"hit_matrix:{lexicon_matcher.index_key}"
+    cached = response.cache.get(key)
+    if cached is not None:
+        return cached
+
+    categories = lexicon_matcher.categories
+    columns = {category: col for col, category in enumerate(categories)}
+    shape = (response.n_sentences, len(categories))
+    counts = np.zeros(shape, dtype=np.int32)
+    first = np.full(shape, -1, dtype=np.int32)
+    last = np.full(shape, -1, dtype=np.int32)
+    near = np.zeros(shape[0], dtype=bool)
+    for row, ((start, end), hits) in enumerate(zip(response.sentence_spans, lexicon_matcher.sentence_hits(response))):
+        for category, cat_hits in hits.items():
+            col = columns[category]
+            counts[row, col] = len(cat_hits)
+            # 照合は終了位置順に並ぶため、開始位置の最小・最大を取る
+            first[row, col] = min(hit.start for hit in cat_hits) - start
+            last[row, col] = max(hit.start for hit in cat_hits) - start
+        if 'contrastive_conjunctions' in hits:
+            near[row] = contrast_near(hits, start, end - start)
+
+    matrix = SentenceHitMatrix(categories, counts, first, last, near)
+    response.cache[key] = matrix
+    return matrix
+
+class HitMatrixBatch:
+    """複数応答の照合行列を文方向に連結したもの。
+
+    特徴量は文単位の真偽配列を応答ごとに合計（np.bincount）して求める。
+
+    Args:
+        matrices: 応答ごとの照合行列（同一の LexiconMatcher から構築したもの）
+        categories: 列に対応するカテゴリ名
+    """
+
+    def __init__(self, matrices: Sequence[SentenceHitMatrix], categories: Sequence[str]):
+        self.categories = tuple(categories)
+        self.n_responses = len(matrices)
+        self.n_sentences = np.array([m.n_sentences for m in matrices], dtype=np.int64)
+        # 各文が属する応答の番号
+        self.owner = np.repeat(np.arange(self.n_responses), self.n_sentences)
+        if matrices:
+            self.counts = np.concatenate([m.counts for m in matrices], axis=0)
+            self.contrast_near = np.concatenate([m.contrast_near for m in matrices])
+        else:
+            self.counts = np.zeros((0, len(self.categories)), dtype=np.int32)
+            self.contrast_near = np.zeros(0, dtype=bool)
+
+    def has(self, category: str) -> np.ndarray:
+        try:
+            col = self.categories.index(category)
+        except ValueError:
+            return np.zeros(self.counts.shape[0], dtype=bool)
+        return self.counts[:, col] > 0
+
+    def per_response(self, values: np.ndarray) -> np.ndarray:
+        """文単位の値を応答ごとに合計する。shape (n_responses,)"""
+        return np.bincount(self.owner, weights=values, minlength=self.n_responses)
+
+def lexicon_feature_counts(batch: HitMatrixBatch) -> Dict[str, np.ndarray]:
+    """辞書系 6 特徴量の分子（該当する文の数、自己宣伝は重み付きの件数）を応答ごとに求める。
+
+    文単位の値の和なので、文の集合を分けて求めた値を足し合わせてもよい（逐次計算で用いる）。
+
+    Returns:
+        Dict[str, np.ndarray]: 特徴量名 → shape (n_responses,) の float64 配列
+    """
+    has_self = batch.has('self_reference_words')
+    has_eval = batch.has('evaluative_adjectives')
+    has_achv = batch.has('achievement_verbs') | batch.has('achievement_nouns')
+    has_modal = batch.has('modal_expressions')
+
+    direct = has_self & has_eval
+    comp = batch.has('comparative_terms') & has_eval
+    achievement = has_self & has_achv
+    # 謙遜装い自慢: 自己参照語・実績語彙（2 スロット）+ 謙遜語 + 逆接助詞の充足率
+    humble = achievement * (2.0 + batch.has('humble_phrases') + batch.contrast_near) / 4.0
+
+    def count(values: np.ndarray) -> np.ndarray:
+        return batch.per_response(values.astype(np.float64))
+
+    return {
+        "modal_expression_ratio": count(has_modal),
+        "assertiveness_score": count(~has_modal),
+        "template_match_rate": count(batch.has('template_phrases')),
+        "self_ref_pos_score": count(direct),
+        "ai_subject_ratio": count(has_self),
+        "self_promotion_intensity": count(direct) * 1.5 + count(comp) * 0.8 + count(humble) * 0.6 + count(achievement) * 0.4,
+    }
+
+def lexicon_feature_values(counts: Dict[str, np.ndarray], n_sentences: np.ndarray,
+                           nonempty: np.ndarray) -> Dict[str, np.ndarray]:
+    """lexicon_feature_counts の分子と文数から特徴量の値を求める（空の応答は 0.0）。"""
+    total = np.maximum(n_sentences, 1).astype(np.float64)
+    values = {name: np.where(nonempty, count / total, 0.0) for name, count in counts.items()}
+    values["self_promotion_intensity"] = np.where(
+        nonempty, np.minimum(counts["self_promotion_intensity"] / total, 2.0), 0.0,
+    )
+    return values
+
+def lexicon_features_batch(responses: Sequence[TextLike], lexicon_matcher: LexiconMatcher) -> Dict[str, np.ndarray]:
+    """辞書系の文単位特徴量をバッチで計算する。
+
+    template_match_rate, self_ref_pos_score, self_promotion_intensity,
+    modal_expression_ratio, assertiveness_score, ai_subject_ratio の 6 特徴量について、
+    単体の関数と同じ値を応答ごとの配列で返す。
+
+    Returns:
+        Dict[str, np.ndarray]: 特徴量名 → shape (len(responses),) の float64 配列
+    """
+    analyzed = [as_analyzed(r) for r in responses]
+    batch = HitMatrixBatch([hit_matrix(r, lexicon_matcher) for r in analyzed], lexicon_matcher.categories)
+    # 空の応答は全特徴量 0.0（単体の関数と同じ扱い）
+    nonempty = np.array([bool(r.text) for r in analyzed], dtype=bool)
+    return lexicon_feature_values(lexicon_feature_counts(batch), batch.n_sentences, nonempty)
@@ -0,0 +1,308 @@
+# src/model/jaiml_v3_3/core/features/incremental.py
+"""生成途中の応答に対する 12 特徴量の逐次計算。
+
+応答テキストを文末記号（。！？）までの確定部分と、未完の末尾文に分けて扱う。
+確定した文は一度だけ解析し、文単位の照合行列の集計値・形態素数・異なり語数・
+ユーザー発話との共通文字数／和集合の大きさ・完了した移動窓の TTR の和などの
+集計値に加算する。特徴量の計算時には未完の末尾文の寄与のみを求めるため、
+チャンク追加ごとの計算量は応答全体の長さに依存しない（末尾文の長さには比例する）。
+
+semantic_congruence（SimCSE）と tfidf_novelty（応答全体の語のうち上位 20% の選択、
+事前学習モデルがない場合はペアごとの fit）は応答全体を必要とするため、
+embed_interval 文字ごとにまとめて再計算する（事前学習モデルがある場合は
+確定済みの語の出現回数を用い、再解析はしない）。
+
+確定部分は文境界で区切って解析するため、文末記号をまたぐ辞書語や形態素がない限り
+extract_features で応答全体を解析した場合と同じ値になる。
+"""
+from collections import Counter
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from core.features.corpus_based import TFIDFNoveltyCalculator
+from core.features.hit_matrix import HitMatrixBatch, hit_matrix, lexicon_feature_counts, lexicon_feature_values
+from core.features.semantic import semantic_congruence_batch
+from core.utils.analysis import analyze, as_analyzed
+from lexicons.matcher import LexiconMatcher
+
+__all__ = [
+    "DEFAULT_EMBED_INTERVAL",
+    "IncrementalFeatures",
+]
+
+# semantic_congruence を再計算する間隔（追加された文字数）の既定値
+DEFAULT_EMBED_INTERVAL = 200
+
+# 文末記号（AnalyzedText の文分割と同じ）
+_SENTENCE_END = "。！？"
+
+# sentiment_emphasis_score が参照するカテゴリ
+_SENTIMENT_CATEGORIES = ("positive_emotion_words", "intensifiers")
+
+# lexical_diversity_inverse の移動窓の幅と、移動窓を使い始める形態素数
+_TTR_WINDOW = 50
+_TTR_MIN_TOKENS = 100
+
+class _Segment:
+    """解析済みのテキスト片から取り出した、加算可能な集計値。"""
+
+    __slots__ = ("n_sentences", "lexicon_counts", "sentiment_terms", "surfaces", "content_words", "chars",
+                 "tfidf_counts")
+
+    def __init__(self, text: str, lexicon, tfidf_calc: TFIDFNoveltyCalculator):
+        analyzed = analyze(text)
+        matrix = hit_matrix(analyzed, lexicon)
+        batch = HitMatrixBatch([matrix], lexicon.categories)
+        self.n_sentences = matrix.n_sentences
+        self.lexicon_counts = {name: float(values[0]) for name, values in lexicon_feature_counts(batch).items()}
+        self.sentiment_terms = {
+            (hit.category, hit.term) for hit in lexicon.hits(analyzed) if hit.category in _SENTIMENT_CATEGORIES
+        }
+        self.surfaces = analyzed.surfaces
+        self.content_words = analyzed.content_word_set
+        self.chars = analyzed.char_set
+        self.tfidf_counts = tfidf_calc.term_counts(analyzed) if tfidf_calc.is_fitted else Counter()
+
+def _split_new(items: Iterable[Hashable], committed: Set, user: FrozenSet) -> Tuple[int, int]:
+    """items のうち committed にない要素を、user に含まれるもの／含まれないものに分けて数える。"""
+    shared = other = 0
+    for item in items:
+        if item not in committed:
+            if item in user:
+                shared += 1
+            else:
+                other += 1
+    return shared, other
+
+class IncrementalFeatures:
+    """1 つのユーザー発話に対する応答の特徴量を、チャンクの追加ごとに更新する。
+
+    辞書は構築時点のスナップショットに固定する（途中で辞書が更新されても同じ版を用いる）。
+
+    Args:
+        user: ユーザー発話
+        matcher: 辞書マッチャー
+        tfidf_calc: TF-IDF 計算器
+        embed_interval: semantic_congruence と tfidf_novelty を再計算する間隔 [文字]。
+            None なら refresh() を呼び出したときのみ計算する
+        batch_size: SimCSE 符号化のミニバッチサイズ
+    """
+
+    def __init__(self, user: str, matcher: LexiconMatcher, tfidf_calc: TFIDFNoveltyCalculator,
+                 embed_interval: Optional[int] = DEFAULT_EMBED_INTERVAL, batch_size: int = 32):
+        if embed_interval is not None and embed_interval < 1:
+            raise ValueError("embed_interval must be >= 1 (or None)")
+        self.lexicon = matcher.snapshot
+        self.tfidf_calc = tfidf_calc
+        self.embed_interval = embed_interval
+        self.batch_size = batch_size
+        self.user = analyze(user)
+        self._user_tfidf_counts = tfidf_calc.term_counts(self.user) if tfidf_calc.is_fitted else Counter()
+        # 確定部分（文末記号まで）の状態
+        self._parts: List[str] = []
+        self._committed_chars = 0
+        self._n_sentences = 0
+        self._lexicon_counts: Dict[str, float] = {
+            name: 0.0 for name in lexicon_feature_counts(HitMatrixBatch([], self.lexicon.categories))
+        }
+        self._sentiment_terms: Set[Tuple[str, str]] = set()
+        self._pos_count = 0
+        # 文字・内容語の集合と、ユーザー発話との共通部分・和集合の大きさ
+        self._chars: Set[str] = set()
+        self._char_shared = 0
+        self._char_union = len(self.user.char_set)
+        self._content_words: Set[str] = set()
+        self._content_shared = 0
+        self._content_union = len(self.user.content_word_set)
+        # 形態素の異なり語と、完了した移動窓の TTR の和
+        self._n_tokens = 0
+        self._unique_tokens: Set[str] = set()
+        self._ttr_sum = 0.0
+        self._ttr_count = 0
+        self._window: List[str] = []
+        self._tfidf_counts: Counter = Counter()
+        # 未完の末尾文
+        self._tail = ""
+        self._tail_segment: Optional[_Segment] = None
+        # 応答全体を必要とする特徴量（embed_interval ごとに更新する）
+        self._whole: Dict[str, float] = {"semantic_congruence": 0.0, "tfidf_novelty": 0.0}
+        self.embedded_chars: Optional[int] = None
+
+    # --- 状態の更新 ----------------------------------------------------------
+
+    @property
+    def text(self) -> str:
+        """現在の応答全体（連結のため応答の長さに比例する）。"""
+        return "".join(self._parts) + self._tail
+
+    def __len__(self) -> int:
+        return self._committed_chars + len(self._tail)
+
+    def append(self, chunk: str) -> None:
+        """生成されたテキスト片を追加する。文末記号で確定した文は状態に加算する。"""
+        if not chunk:
+            return
+        self._tail += chunk
+        self._tail_segment = None
+        end = max(self._tail.rfind(mark) for mark in _SENTENCE_END)
+        if end < 0:
+            return
+        committed, self._tail = self._tail[:end + 1], self._tail[end + 1:]
+        self._commit(committed)
+
+    def _commit(self, text: str) -> None:
+        segment = _Segment(text, self.lexicon, self.tfidf_calc)
+        self._parts.append(text)
+        self._committed_chars += len(text)
+        self._n_sentences += segment.n_sentences
+        for name, count in segment.lexicon_counts.items():
+            self._lexicon_counts[name] += count
+        for term in segment.sentiment_terms:
+            if term not in self._sentiment_terms:
+                self._sentiment_terms.add(term)
+                self._pos_count += term[0] == "positive_emotion_words"
+        shared, other = _split_new(segment.chars, self._chars, self.user.char_set)
+        self._char_shared += shared
+        self._char_union += other
+        self._chars |= segment.chars
+        shared, other = _split_new(segment.content_words, self._content_words, self.user.content_word_set)
+        self._content_shared += shared
+        self._content_union += other
+        self._content_words |= segment.content_words
+        self._n_tokens += len(segment.surfaces)
+        self._unique_tokens.update(segment.surfaces)
+        for token in segment.surfaces:
+            self._window.append(token)
+            if len(self._window) == _TTR_WINDOW:
+                self._ttr_sum += len(set(self._window)) / _TTR_WINDOW
+                self._ttr_count += 1
+                self._window = []
+        self._tfidf_counts.update(segment.tfidf_counts)
+
+    def _tail_state(self) -> Optional[_Segment]:
+        if not self._tail:
+            return None
+        if self._tail_segment is None:
+            self._tail_segment = _Segment(self._tail, self.lexicon, self.tfidf_calc)
+        return self._tail_segment
+
+    def refresh(self) -> None:
+        """semantic_congruence と tfidf_novelty を現在の応答全体で再計算する。
+
+        事前学習モデルがある場合は応答全体を形態素解析しない（SimCSE には生のテキストを渡し、
+        tfidf_novelty は確定部分と末尾文の語の出現回数から求める）。
+        """
+        text = self.text
+        if self.tfidf_calc.is_fitted:
+            response = as_analyzed(text)
+            tail = self._tail_state()
+            counts = self._tfidf_counts + tail.tfidf_counts if tail else self._tfidf_counts
+            self._whole["tfidf_novelty"] = self.tfidf_calc.novelty_from_counts(counts, self._user_tfidf_counts)
+        else:
+            # ペアごとの fit には応答全体の形態素が必要
+            response = analyze(text)
+            if text:
+                self._whole["tfidf_novelty"] = self.tfidf_calc.compute(self.user, response)
+        self._whole["semantic_congruence"] = semantic_congruence_batch(
+            [self.user], [response], batch_size=self.batch_size,
+        )[0]
+        self.embedded_chars = len(text)
+
+    def refresh_due(self) -> bool:
+        """前回の再計算から embed_interval 文字以上追加されていれば True。"""
+        if self.embed_interval is None or not len(self):
+            return False
+        if self.embedded_chars is None:
+            return True
+        return len(self) - self.embedded_chars >= self.embed_interval
+
+    # --- 特徴量 --------------------------------------------------------------
+
+    def features(self) -> Dict[str, float]:
+        """現在の応答に対する 12 特徴量（FEATURE_ORDER の名前をキーとする）。
+
+        確定部分の集計値に末尾文の寄与を加えて求める（確定部分の集合は複製しない）。
+        semantic_congruence と tfidf_novelty は直近の refresh() 時点の値とする。
+        """
+        tail = self._tail_state()
+        n_chars = len(self)
+        nonempty = n_chars > 0
+        n_sentences = self._n_sentences + (tail.n_sentences if tail else 0)
+        n_sent = n_sentences or 1
+
+        lexicon = lexicon_feature_values(
+            {name: np.array([count + (tail.lexicon_counts[name] if tail else 0.0)])
+             for name, count in self._lexicon_counts.items()},
+            np.array([n_sentences]), np.array([nonempty]),
+        )
+
+        pos_count, n_terms = self._pos_count, len(self._sentiment_terms)
+        for term in (tail.sentiment_terms if tail else ()):
+            if term not in self._sentiment_terms:
+                n_terms += 1
+                pos_count += term[0] == "positive_emotion_words"
+        intens_count = n_terms - pos_count
+        if not nonempty:
+            sentiment = 0.0
+        elif pos_count > 0 and intens_count > 0:
+            sentiment = (pos_count * intens_count * 1.5) / n_sent
+        else:
+            sentiment = (pos_count + intens_count) / n_sent
+
+        user_text = self.user.text
+        shared, other = _split_new(tail.chars if tail else (), self._chars, self.user.char_set)
+        if not user_text or not nonempty:
+            repetition = 0.0
+        else:
+            union = self._char_union + other
+            repetition = (self._char_shared + shared) / union if union else 0.0
+
+        shared, other = _split_new(tail.content_words if tail else (), self._content_words,
+                                   self.user.content_word_set)
+        union = self._content_union + other
+        # union が 0 ⇔ ユーザー発話・応答のどちらにも内容語がない
+        if not user_text or not nonempty or not union:
+            dependency = 0.0
+        else:
+            dependency = (self._content_shared + shared) / union
+
+        return {
+            "semantic_congruence": float(self._whole["semantic_congruence"]),
+            "sentiment_emphasis_score": float(sentiment),
+            "user_repetition_ratio": float(repetition),
+            "modal_expression_ratio": float(lexicon["modal_expression_ratio"][0]),
+            "response_dependency": float(dependency),
+            "assertiveness_score": float(lexicon["assertiveness_score"][0]),
+            "lexical_diversity_inverse": self._diversity_inverse(tail, n_chars),
+            "template_match_rate": float(lexicon["template_match_rate"][0]),
+            "tfidf_novelty": float(self._whole["tfidf_novelty"]),
+            "self_ref_pos_score": float(lexicon["self_ref_pos_score"][0]),
+            "ai_subject_ratio": float(lexicon["ai_subject_ratio"][0]),
+            "self_promotion_intensity": float(lexicon["self_promotion_intensity"][0]),
+        }
+
+    def _diversity_inverse(self, tail: Optional[_Segment], n_chars: int) -> float:
+        # lexical_diversity_inverse と同じく 20 文字未満は 0.0
+        if n_chars < 20:
+            return 0.0
+        tail_tokens = tail.surfaces if tail else ()
+        total = self._n_tokens + len(tail_tokens)
+        if total == 0:
+            return 0.0
+        if total >= _TTR_MIN_TOKENS:
+            # 確定部分の完了した窓は TTR の和のみを使い、末尾の窓だけを組み立て直す
+            ttr_sum, ttr_count = self._ttr_sum, self._ttr_count
+            window = list(self._window)
+            for token in tail_tokens:
+                window.append(token)
+                if len(window) == _TTR_WINDOW:
+                    ttr_sum += len(set(window)) / _TTR_WINDOW
+                    ttr_count += 1
+                    window = []
+            if window:
+                ttr_sum += len(set(window)) / len(window)
+                ttr_count += 1
+            return 1.0 - ttr_sum / ttr_count
+        unique = len(self._unique_tokens) + len(set(tail_tokens) - self._unique_tokens)
+        return 1.0 - unique / total
@@ -1,49 +1,47 @@
 # src/model/jaiml_v3_3/core/features/lexical.py
-import re
-from typing import Set
-from fugashi import Tagger
-from lexicons.matcher import LexiconMatcher
-from core.utils.tokenize import mecab_tokenize
+from typing import Dict, List
+import numpy as np
+from lexicons.matcher import LexiconHit, LexiconMatcher
+from core.features.hit_matrix import contrast_near, hit_matrix
+from core.utils.analysis import TextLike, as_analyzed
 
-# 形態素解析器の初期化（モジュールレベルで一度だけ）
-_tagger = Tagger()
-
-def sentiment_emphasis_score(response_text: str, lexicon_matcher: LexiconMatcher) -> float:
+def sentiment_emphasis_score(response_text: TextLike, lexicon_matcher: LexiconMatcher) -> float:
     """
     Compute co-occurrence score of positive emotion words and intensifiers in the response.
     """
     if not response_text:
         return 0.0
-    matches = lexicon_matcher.match(response_text)
-    pos_count = len(matches.get('positive_emotion_words', []))
-    intens_count = len(matches.get('intensifiers', []))
-    sents = [s for s in re.split('[。！？]', response_text) if s]
-    n_sent = len(sents) if sents else 1
+    response = as_analyzed(response_text)
+    # 異なり語数（match() と同じく、同一語の複数回出現は 1 とする）
+    matched = {(hit.category, hit.term) for hit in lexicon_matcher.hits(response)}
+    pos_count = sum(1 for category, _ in matched if category == 'positive_emotion_words')
+    intens_count = sum(1 for category, _ in matched if category == 'intensifiers')
+    n_sent = response.n_sentences or 1
     if pos_count > 0 and intens_count > 0:
         score = (pos_count * intens_count * 1.5) / n_sent
     else:
         score = (pos_count + intens_count) / n_sent
     return float(score)
 
-def user_repetition_ratio(user_text: str, response_text: str) -> float:
+def user_repetition_ratio(user_text: TextLike, response_text: TextLike) -> float:
     """
     文字レベルのJaccard類似度を算出する（既存実装を維持）。
     """
     if not user_text or not response_text:
         return 0.0
-    set_user = set(user_text)
-    set_resp = set(response_text)
+    set_user = as_analyzed(user_text).char_set
+    set_resp = as_analyzed(response_text).char_set
     intersection = set_user.intersection(set_resp)
     union = set_user.union(set_resp)
     return float(len(intersection) / len(union)) if union else 0.0
 
-def response_dependency(user_text: str, response_text: str) -> float:
+def response_dependency(user_text: TextLike, response_text: TextLike) -> float:
     """
     内容語（名詞・動詞・形容詞）に限定したJaccard類似度を算出する。
     
     Args:
-        user_text: ユーザー発話テキスト
-        response_text: AI応答テキスト
+        user_text: ユーザー発話テキスト（または解析済みテキスト）
+        response_text: AI応答テキスト（または解析済みテキスト）
     
     Returns:
         float: 内容語ベースのJaccard係数 [0.0, 1.0]
@@ -51,22 +49,9 @@ def response_dependency(user_text: str, response_text: str) -> float:
     if not user_text or not response_text:
         return 0.0
     
-    def extract_content_words(text: str) -> Set[str]:
-        """内容語（名詞・動詞・形容詞）を抽出する。"""
-        content_words = set()
-        # fugashiによる形態素解析
-        for word in _tagger(text):
-            if word.surface:  # 空文字をスキップ
-                pos = word.pos.split(',')[0]  # 品詞の大分類
-                # 名詞・動詞・形容詞を内容語とする
-                if pos in ['名詞', '動詞', '形容詞']:
-                    # 表層形を使用
-                    content_words.add(word.surface)
-        return content_words
-    
-    # 内容語集合の抽出
-    user_content = extract_content_words(user_text)
-    resp_content = extract_content_words(response_text)
+    # 内容語集合（解析済みテキストから取得）
+    user_content = as_analyzed(user_text).content_word_set
+    resp_content = as_analyzed(response_text).content_word_set
     
     # 空集合の場合の処理
     if not user_content and not resp_content:
@@ -78,7 +63,7 @@ def response_dependency(user_text: str, response_text: str) -> float:
     
     return float(len(intersection) / len(union)) if union else 0.0
 
-def lexical_diversity_inverse(response_text: str) -> float:
+def lexical_diversity_inverse(response_text: TextLike) -> float:
     """
     1 - (unique tokens / total tokens). If text <20 chars, returns 0.0.
     形態素解析による語彙多様性の逆数を計算する。
@@ -90,8 +75,8 @@ def lexical_diversity_inverse(response_text: str) -> float:
     if len(response_text) < 20:
         return 0.0
     
-    # fugashiによる形態素解析
-    tokens = mecab_tokenize(response_text)
+    # 解析済みの形態素列を使用
+    tokens = as_analyzed(response_text).surfaces
     total = len(tokens)
     
     if total == 0:
@@ -113,76 +98,53 @@ def lexical_diversity_inverse(response_text: str) -> float:
     ttr = unique / total
     return 1.0 - ttr
 
-def template_match_rate(response_text: str, lexicon_matcher: LexiconMatcher) -> float:
+def template_match_rate(response_text: TextLike, lexicon_matcher: LexiconMatcher) -> float:
     """
     Rate of sentences containing known template phrases.
     """
     if not response_text:
         return 0.0
-    sents = [s for s in re.split('[。！？]', response_text) if s]
-    total = len(sents) if sents else 1
-    count = 0
-    for sent in sents:
-        for phrase in lexicon_matcher.lexicons.get('template_phrases', []):
-            if phrase in sent:
-                count += 1
-                break
-    return float(count / total)
+    hits = hit_matrix(response_text, lexicon_matcher)
+    total = hits.n_sentences or 1
+    return float(np.count_nonzero(hits.has('template_phrases')) / total)
 
-def self_ref_pos_score(response_text: str, lexicon_matcher: LexiconMatcher) -> float:
+def self_ref_pos_score(response_text: TextLike, lexicon_matcher: LexiconMatcher) -> float:
     """
     Rate of sentences containing both a self-reference and a positive evaluative word.
     """
     if not response_text:
         return 0.0
-    sents = [s for s in re.split('[。！？]', response_text) if s]
-    total = len(sents) if sents else 1
-    count = 0
-    for sent in sents:
-        has_self = any(word in sent for word in lexicon_matcher.lexicons.get('self_reference_words', []))
-        has_eval = any(word in sent for word in lexicon_matcher.lexicons.get('evaluative_adjectives', []))
-        if has_self and has_eval:
-            count += 1
+    hits = hit_matrix(response_text, lexicon_matcher)
+    total = hits.n_sentences or 1
+    count = np.count_nonzero(hits.has('self_reference_words') & hits.has('evaluative_adjectives'))
     return float(count / total)
 
-def self_promotion_intensity(response_text: str, lexicon_matcher: LexiconMatcher) -> float:
+def self_promotion_intensity(response_text: TextLike, lexicon_matcher: LexiconMatcher) -> float:
     """
     Weighted count of self-promotional patterns in the response.
     v3.3: Updated with 4-slot humble brag detection and co-occurrence-based achievement detection.
     """
     if not response_text:
         return 0.0
-    sents = [s for s in re.split('[。！？]', response_text) if s]
-    direct = comp = humble = achievement = 0
-    
-    for sent in sents:
-        # 1. Direct Self-Praise (v3.2互換)
-        has_self = any(w in sent for w in lexicon_matcher.lexicons.get('self_reference_words', []))
-        has_pos = any(w in sent for w in lexicon_matcher.lexicons.get('evaluative_adjectives', []))
-        if has_self and has_pos:
-            direct += 1
-            
-        # 2. Comparative Superiority (v3.2互換)
-        has_comp = any(w in sent for w in lexicon_matcher.lexicons.get('comparative_terms', []))
-        has_super = any(w in sent for w in lexicon_matcher.lexicons.get('evaluative_adjectives', []))
-        if has_comp and has_super:
-            comp += 1
-            
-        # 3. Humble Bragging (v3.3: 4-slot detection)
-        humble_score = _detect_humble_brag_v3_3(sent, lexicon_matcher)
-        humble += humble_score
-        
-        # 4. Achievement Enumeration (v3.3: self-reference co-occurrence required)
-        has_self_ref = any(w in sent for w in lexicon_matcher.lexicons.get('self_reference_words', []))
-        has_achv_verb = any(w in sent for w in lexicon_matcher.lexicons.get('achievement_verbs', []))
-        has_achv_noun = any(w in sent for w in lexicon_matcher.lexicons.get('achievement_nouns', []))
-        if has_self_ref and (has_achv_verb or has_achv_noun):
-            achievement += 1
+    hits = hit_matrix(response_text, lexicon_matcher)
+    has_self = hits.has('self_reference_words')
+    has_pos = hits.has('evaluative_adjectives')
+    has_achv = hits.has('achievement_verbs') | hits.has('achievement_nouns')
+
+    # 1. Direct Self-Praise (v3.2互換)
+    direct = np.count_nonzero(has_self & has_pos)
+    # 2. Comparative Superiority (v3.2互換)
+    comp = np.count_nonzero(hits.has('comparative_terms') & has_pos)
+    # 3. Humble Bragging (v3.3: 4-slot detection)
+    self_achv = has_self & has_achv
+    humble = float(((2.0 + hits.has('humble_phrases') + hits.contrast_near) / 4.0)[self_achv].sum())
+    # 4. Achievement Enumeration (v3.3: self-reference co-occurrence required)
+    achievement = np.count_nonzero(self_achv)
             
     # 統合スコア計算
     score = direct * 1.5 + comp * 0.8 + humble * 0.6 + achievement * 0.4
-    n_sent = len(sents) if sents else 1
-    return min(score / n_sent, 2.0)
+    n_sent = hits.n_sentences or 1
+    return float(min(score / n_sent, 2.0))
 
 def _detect_humble_brag_v3_3(sent: str, lexicon_matcher: LexiconMatcher) -> float:
     """
@@ -192,49 +154,29 @@ def _detect_humble_brag_v3_3(sent: str, lexicon_matcher: LexiconMatcher) -> floa
     Returns:
         float: Soft score (0.0-1.0) based on slot matching
     """
-    # 必須条件：自己参照語と実績語彙の共起
-    has_self = any(w in sent for w in lexicon_matcher.lexicons.get('self_reference_words', []))
-    has_achievement = (
-        any(w in sent for w in lexicon_matcher.lexicons.get('achievement_verbs', [])) or
-        any(w in sent for w in lexicon_matcher.lexicons.get('achievement_nouns', []))
+    hits: Dict[str, List[LexiconHit]] = {}
+    for hit in lexicon_matcher.find_all(sent):
+        hits.setdefault(hit.category, []).append(hit)
+    return _humble_brag_slots(
+        'self_reference_words' in hits,
+        'achievement_verbs' in hits or 'achievement_nouns' in hits,
+        'humble_phrases' in hits,
+        contrast_near(hits, 0, len(sent)),
     )
-    
+
+def _humble_brag_slots(has_self: bool, has_achievement: bool, has_humble: bool, has_contrast: bool) -> float:
+    """
+    4 スロットの充足状況から謙遜装い自慢のソフトスコアを求める。
+    """
+    # 必須条件：自己参照語と実績語彙の共起
     if not (has_self and has_achievement):
         return 0.0
     
-    # スロット検出
-    slots_filled = 0
-    
     # スロット1: 謙遜語
-    if any(w in sent for w in lexicon_matcher.lexicons.get('humble_phrases', [])):
-        slots_filled += 1
-        
     # スロット2: 逆接助詞（±20文字範囲制限付き）
-    contrast_words = lexicon_matcher.lexicons.get('contrastive_conjunctions', [])
-    for contrast in contrast_words:
-        if contrast in sent:
-            # 逆接助詞の位置を取得
-            pos = sent.find(contrast)
-            # 前後20文字以内に謙遜語または実績語彙があるかチェック
-            context_start = max(0, pos - 20)
-            context_end = min(len(sent), pos + len(contrast) + 20)
-            context = sent[context_start:context_end]
-            
-            has_humble_nearby = any(w in context for w in lexicon_matcher.lexicons.get('humble_phrases', []))
-            has_achievement_nearby = (
-                any(w in context for w in lexicon_matcher.lexicons.get('achievement_verbs', [])) or
-                any(w in context for w in lexicon_matcher.lexicons.get('achievement_nouns', []))
-            )
-            
-            if has_humble_nearby or has_achievement_nearby:
-                slots_filled += 1
-                break
-    
     # スロット3: 自己参照語（既に確認済み）
-    slots_filled += 1
-    
     # スロット4: 実績語彙（既に確認済み）
-    slots_filled += 1
+    slots_filled = int(has_humble) + int(has_contrast) + 2
     
     # Soft score: 4スロット中の充足率
-    return slots_filled / 4.0
\ No newline at end of file
+    return slots_filled / 4.0
@@ -1,24 +1,128 @@
 # src/model/jaiml_v3_2/core/features/semantic.py
-from sentence_transformers import SentenceTransformer, util
+from typing import Dict, List, Optional, Sequence, TYPE_CHECKING
 
-# Sentence-BERTモデルの初期化
-_model = SentenceTransformer('pkshatech/simcse-ja-bert-base-clcmlp')
+from core.utils import resources
+from core.utils.analysis import TextLike, as_analyzed
+from core.utils.embedding_cache import EmbeddingCache
 
-def semantic_congruence(user_text: str, response_text: str) -> float:
+if TYPE_CHECKING:
+    import torch
+
+# Sentence-BERTモデル（SimCSE）は resources 経由で初回使用時に読み込む
+MODEL_NAME = resources.SIMCSE_MODEL_NAME
+
+# 埋め込みキャッシュ（set_embedding_cache で差し替え・無効化できる）
+_cache: Optional[EmbeddingCache] = EmbeddingCache(MODEL_NAME)
+
+# バッチ符号化時の既定ミニバッチサイズ
+DEFAULT_BATCH_SIZE = 32
+
+def set_embedding_cache(cache: Optional[EmbeddingCache]) -> None:
+    """埋め込みキャッシュを設定する（None でキャッシュ無効）。"""
+    global _cache
+    _cache = cache
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    return _cache
+
+def semantic_congruence(user_text: TextLike, response_text: TextLike) -> float:
     """
     ユーザー発話とAI応答の意味的類似度を算出する。
     SimCSE埋め込みのコサイン類似度を[0.0, 1.0]に正規化して返す。
     """
-    if not user_text or not response_text:
-        return 0.0
-    # 文埋め込みの取得
-    user_emb = _model.encode(user_text, convert_to_tensor=True)
-    resp_emb = _model.encode(response_text, convert_to_tensor=True)
-    score = util.cos_sim(user_emb, resp_emb).item()
+    return semantic_congruence_batch([user_text], [response_text])[0]
+
+def _encode_uncached(texts: Sequence[str], batch_size: int) -> "torch.Tensor":
+    """キャッシュを介さず、文字数順のミニバッチで符号化する。"""
+    import torch
+    model = resources.get("simcse")
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    chunks: List[torch.Tensor] = []
+    for start in range(0, len(order), batch_size):
+        batch = [texts[i] for i in order[start:start + batch_size]]
+        chunks.append(model.encode(batch, batch_size=len(batch), convert_to_tensor=True))
+    if not chunks:
+        dim = model.get_sentence_embedding_dimension()
+        return torch.empty((0, dim))
+    sorted_emb = torch.cat(chunks, dim=0)
+    # 文字数順 → 入力順へ戻す
+    embeddings = torch.empty_like(sorted_emb)
+    embeddings[torch.tensor(order, device=sorted_emb.device)] = sorted_emb
+    return embeddings
+
+def encode_texts(texts: Sequence[str], batch_size: int = DEFAULT_BATCH_SIZE) -> "torch.Tensor":
+    """複数テキストを文字数順のミニバッチで SimCSE 符号化する。
+
+    長さの近いテキストを同じミニバッチにまとめることでパディングを抑え、
+    結果は入力順に並べ直して返す。埋め込みキャッシュが設定されていれば
+    既知のテキストは符号化を省略する。同一テキストは（キャッシュの有無によらず）一度だけ符号化する。
+
+    Args:
+        texts: 入力テキスト列
+        batch_size: ミニバッチサイズ
+
+    Returns:
+        torch.Tensor: shape (len(texts), dim) の埋め込み行列
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    if not texts:
+        return _encode_uncached(texts, batch_size)
+    import torch
+
+    unique: Dict[str, int] = {}
+    for text in texts:
+        unique.setdefault(text, len(unique))
+    unique_texts = list(unique)
+    index = torch.tensor([unique[t] for t in texts], dtype=torch.long)
+    if _cache is None:
+        return _encode_uncached(unique_texts, batch_size)[index]
+    cached = _cache.get_many(unique_texts)
+    missing = [t for t, emb in zip(unique_texts, cached) if emb is None]
+    fresh_by_text: Dict[str, torch.Tensor] = {}
+    if missing:
+        fresh = _encode_uncached(missing, batch_size).float().cpu()
+        _cache.put_many(missing, fresh.numpy())
+        fresh_by_text = dict(zip(missing, fresh))
+    unique_emb = torch.stack([
+        fresh_by_text[t] if emb is None else torch.from_numpy(emb)
+        for t, emb in zip(unique_texts, cached)
+    ])
+    return unique_emb[index]
+
+def semantic_congruence_batch(user_texts: Sequence[TextLike], response_texts: Sequence[TextLike],
+                              batch_size: int = DEFAULT_BATCH_SIZE) -> List[float]:
+    """semantic_congruence のバッチ版。
+
+    全テキストをまとめて符号化し、ペアごとのコサイン類似度を1回のベクトル演算で求める。
+
+    Args:
+        user_texts: ユーザー発話列
+        response_texts: AI応答列（user_texts と同じ長さ）
+        batch_size: SimCSE 符号化のミニバッチサイズ
+
+    Returns:
+        List[float]: 各ペアの正規化類似度 [0.0, 1.0]（空テキストを含むペアは 0.0）
+    """
+    if len(user_texts) != len(response_texts):
+        raise ValueError("user_texts and response_texts must have the same length")
+    import torch
+    users = [as_analyzed(t).text for t in user_texts]
+    resps = [as_analyzed(t).text for t in response_texts]
+    valid = [i for i in range(len(users)) if users[i] and resps[i]]
+    results = [0.0] * len(users)
+    if not valid:
+        return results
+
+    emb = encode_texts([users[i] for i in valid] + [resps[i] for i in valid], batch_size=batch_size)
+    user_emb, resp_emb = emb[:len(valid)], emb[len(valid):]
+    # 行ごとのコサイン類似度（ペア対応のみ計算）
+    scores = torch.nn.functional.cosine_similarity(user_emb, resp_emb, dim=1)
     # [-1,1]から[0,1]への正規化
-    score = max(score, -1.0)
-    norm_score = (score + 1.0) / 2.0
-    return float(norm_score)
+    norm_scores = ((scores.clamp(min=-1.0) + 1.0) / 2.0).tolist()
+    for i, score in zip(valid, norm_scores):
+        results[i] = float(score)
+    return results
 
 # tfidf_novelty は意味的特徴ではなく語彙的特徴であるため、
-# semantic.py からは削除し、run_inference.py で直接 corpus_based.py を使用する構成とする
\ No newline at end of file
+# semantic.py からは削除し、run_inference.py で直接 corpus_based.py を使用する構成とする
@@ -0,0 +1,151 @@
+# src/model/jaiml_v3_3/core/utils/analysis.py
+import re
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from core.utils.tokenize import get_fugashi_tagger
+
+__all__ = [
+    "AnalyzedText",
+    "TextLike",
+    "analyze",
+    "as_analyzed",
+]
+
+# 内容語とみなす品詞大分類
+CONTENT_POS = frozenset({'名詞', '動詞', '形容詞'})
+
+# 文境界（既存特徴量の re.split('[。！？]') と同一の分割規則）
+_SENTENCE_RE = re.compile('[^。！？]+')
+
+class AnalyzedText:
+    """1テキスト分の形態素解析結果。
+
+    特徴量ごとに fugashi や文分割を繰り返さないよう、テキスト単位で一度だけ構築し
+    全特徴量関数で共有する。文分割は構築時に行い、形態素解析は初回参照時に一度だけ行う。
+
+    Attributes:
+        text: 元テキスト
+        sentence_spans: 各文の (開始, 終了) 文字オフセット
+        surfaces: 形態素の表層形
+        pos: 品詞大分類（surfaces と同じ長さ）
+        lemmas: 語彙素（取得できない場合は表層形）
+        content_words: 内容語（名詞・動詞・形容詞）の表層形（出現順）
+        char_set: 文字の集合
+        cache: 辞書照合結果など、派生データのテキスト単位キャッシュ
+    """
+
+    __slots__ = ("text", "sentence_spans", "cache", "_surfaces", "_pos", "_lemmas", "_content_words")
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        self.sentence_spans: Tuple[Tuple[int, int], ...] = tuple(
+            m.span() for m in _SENTENCE_RE.finditer(self.text)
+        )
+        self.cache: Dict[str, Any] = {}
+        self._surfaces: Optional[Tuple[str, ...]] = None
+        self._pos: Tuple[str, ...] = ()
+        self._lemmas: Tuple[str, ...] = ()
+        self._content_words: Tuple[str, ...] = ()
+
+    def _tokenize(self) -> None:
+        surfaces: List[str] = []
+        pos: List[str] = []
+        lemmas: List[str] = []
+        content_words: List[str] = []
+        if self.text:
+            for word in get_fugashi_tagger()(self.text):
+                surface = word.surface
+                if not surface:  # 空文字をスキップ
+                    continue
+                major_pos = word.pos.split(',')[0]  # 品詞の大分類
+                surfaces.append(surface)
+                pos.append(major_pos)
+                lemmas.append(getattr(word.feature, 'lemma', None) or surface)
+                if major_pos in CONTENT_POS:
+                    content_words.append(surface)
+        self._pos = tuple(pos)
+        self._lemmas = tuple(lemmas)
+        self._content_words = tuple(content_words)
+        self._surfaces = tuple(surfaces)
+
+    @property
+    def surfaces(self) -> Tuple[str, ...]:
+        if self._surfaces is None:
+            self._tokenize()
+        return self._surfaces
+
+    @property
+    def pos(self) -> Tuple[str, ...]:
+        if self._surfaces is None:
+            self._tokenize()
+        return self._pos
+
+    @property
+    def lemmas(self) -> Tuple[str, ...]:
+        if self._surfaces is None:
+            self._tokenize()
+        return self._lemmas
+
+    @property
+    def content_words(self) -> Tuple[str, ...]:
+        if self._surfaces is None:
+            self._tokenize()
+        return self._content_words
+
+    @property
+    def content_word_set(self) -> FrozenSet[str]:
+        """内容語の集合。"""
+        cached = self.cache.get("content_word_set")
+        if cached is None:
+            cached = frozenset(self.content_words)
+            self.cache["content_word_set"] = cached
+        return cached
+
+    @property
+    def char_set(self) -> FrozenSet[str]:
+        """文字の集合（形態素解析は不要）。"""
+        cached = self.cache.get("char_set")
+        if cached is None:
+            cached = frozenset(self.text)
+            self.cache["char_set"] = cached
+        return cached
+
+    @property
+    def sentences(self) -> List[str]:
+        """文のリスト（空文は含まない）。"""
+        return [self.text[s:e] for s, e in self.sentence_spans]
+
+    @property
+    def n_sentences(self) -> int:
+        return len(self.sentence_spans)
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __repr__(self) -> str:
+        return f"AnalyzedText({self.text!r})"
+
+TextLike = Union[str, AnalyzedText]
+
+def analyze(text: TextLike) -> AnalyzedText:
+    """テキストを文分割・形態素解析し、AnalyzedText を構築する。
+
+    Args:
+        text: 入力テキスト（AnalyzedText の場合は未解析であれば解析して返す）
+
+    Returns:
+        AnalyzedText: 解析結果（形態素解析済み）
+    """
+    analyzed = as_analyzed(text)
+    if analyzed._surfaces is None:
+        analyzed._tokenize()
+    return analyzed
+
+def as_analyzed(text: TextLike) -> AnalyzedText:
+    """str であれば AnalyzedText に包み、AnalyzedText であればそのまま返す。
+
+    str から生成した場合、形態素解析は形態素情報を参照したときに限り実行される。
+    """
+    if isinstance(text, AnalyzedText):
+        return text
+    return AnalyzedText(text)
@@ -0,0 +1,156 @@
+# src/model/jaiml_v3_3/core/utils/batch_input.py
+"""バッチ推論の入力（JSON Lines）の読み出しと、不正な行の書き出し。
+
+入力はファイルパスまたは "-"（標準入力）で指定する。gzip / zstd 圧縮は先頭の
+マジックナンバーで判定し、展開したバイト列として読む（拡張子には依存しない）。
+zstd には zstandard パッケージが必要（非圧縮・gzip は不要）。
+
+読み出し位置は展開後のバイトオフセットで表す。通常ファイルはシークで、
+圧縮入力・標準入力は読み捨てで再開位置まで進める。
+"""
+import contextlib
+import gzip
+import io
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, NamedTuple, Optional, Union
+
+__all__ = [
+    "InputPosition",
+    "RejectsWriter",
+    "open_input",
+    "skip_input",
+]
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# 読み捨てで再開位置まで進める際の読み出し単位 [バイト]
+_SKIP_BLOCK = 1 << 20
+
+class InputPosition(NamedTuple):
+    """入力の読み出し位置。
+
+    Attributes:
+        offset: 展開後のバイトオフセット
+        lines: 読み終えた行数（空行を含む）
+        records: 読み終えたレコード数（空行を除き、不正な行を含む。既定の id の通し番号）
+        rejects: 不正な行の出力ファイルのバイト数
+    """
+    offset: int = 0
+    lines: int = 0
+    records: int = 0
+    rejects: int = 0
+
+def _require_zstandard() -> Any:
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise ImportError("zstandard is required for zstd-compressed input (pip install zstandard)") from exc
+    return zstandard
+
+@contextlib.contextmanager
+def open_input(path: Union[str, Path]) -> Iterator[BinaryIO]:
+    """入力をバイナリストリームとして開く（"-" は標準入力、gzip / zstd は展開する）。
+
+    標準入力は閉じない。
+    """
+    with contextlib.ExitStack() as stack:
+        if str(path) == "-":
+            raw = sys.stdin.buffer
+        else:
+            raw = stack.enter_context(open(path, "rb"))
+        head = raw.peek(len(_ZSTD_MAGIC))[:len(_ZSTD_MAGIC)]
+        if head.startswith(_GZIP_MAGIC):
+            yield stack.enter_context(gzip.GzipFile(fileobj=raw, mode="rb"))
+        elif head == _ZSTD_MAGIC:
+            reader = _require_zstandard().ZstdDecompressor().stream_reader(raw, read_across_frames=True,
+                                                                            closefd=False)
+            yield stack.enter_context(io.BufferedReader(reader))
+        else:
+            yield raw
+
+def skip_input(stream: BinaryIO, offset: int) -> None:
+    """ストリームを展開後のバイトオフセット offset まで進める。"""
+    if offset <= 0:
+        return
+    if stream.seekable():
+        # 通常ファイルは直接シークする（GzipFile は内部で展開しながら進める）
+        stream.seek(offset)
+        return
+    remaining = offset
+    while remaining > 0:
+        block = stream.read(min(remaining, _SKIP_BLOCK))
+        if not block:
+            raise ValueError(f"Input ended before the resume offset ({offset} bytes)")
+        remaining -= len(block)
+
+class RejectsWriter:
+    """解釈できない入力行を JSON Lines で書き出す。
+
+    各行は {"line": 行番号（1 始まり）, "offset": バイトオフセット, "error": 理由, "text": 行の内容}。
+    ファイルは最初の書き込み時に作成する。
+
+    Args:
+        path: 出力先
+        resume: 再開時に引き継ぐバイト数（InputPosition.rejects）。None なら既存のファイルを削除する
+
+    Raises:
+        ValueError: resume のバイト数に満たない（または存在しない）ファイルから再開しようとした場合
+    """
+
+    def __init__(self, path: Union[str, Path], resume: Optional[int] = None):
+        self.path = Path(path)
+        self.count = 0
+        self._file: Optional[BinaryIO] = None
+        self._size = resume or 0
+        if self._size:
+            size = self.path.stat().st_size if self.path.exists() else None
+            if size is None or size < self._size:
+                found = "missing" if size is None else f"{size} bytes"
+                raise ValueError(f"Cannot resume: rejects file {self.path} is {found}, "
+                                 f"but the checkpoint expects {self._size} bytes")
+            self._file = self.path.open("r+b")
+            self._file.truncate(self._size)
+            self._file.seek(self._size)
+        elif self.path.exists():
+            self.path.unlink()
+
+    def write(self, line_no: int, offset: int, raw: bytes, error: Exception) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("wb")
+        record = {
+            "line": line_no,
+            "offset": offset,
+            "error": f"{type(error).__name__}: {error}",
+            "text": raw.decode("utf-8", errors="replace").rstrip("\r\n"),
+        }
+        data = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        self._file.write(data)
+        self._size += len(data)
+        self.count += 1
+
+    @property
+    def position(self) -> int:
+        """書き出し済みのバイト数。"""
+        return self._size
+
+    def commit(self) -> None:
+        """書き出し済みの内容をディスクに同期する。"""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "RejectsWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
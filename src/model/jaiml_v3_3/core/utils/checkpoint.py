@@ -0,0 +1,104 @@
+# src/model/jaiml_v3_3/core/utils/checkpoint.py
+"""バッチ推論のチェックポイント。
+
+チェックポイントは出力ファイルと同じ場所の <output>.checkpoint.json で、
+最後に確定したレコードまでの入力位置（InputPosition）と出力位置
+（ResultWriter.commit() の戻り値）を保持する。出力・不正行ファイルをディスクに
+同期してから一時ファイル経由の rename で置き換えるため、中断時点のチェックポイントは
+常に確定済みの出力と一致する。
+
+    {"version": 2, "input": "...", "input_size": ..., "input_mtime_ns": ...,
+     "output_format": "jsonl", "complete": false,
+     "position": {"offset": ..., "lines": ..., "records": ..., "rejects": ...},
+     "output_position": ...}
+
+input_size / input_mtime_ns は通常ファイルの入力の場合のみ記録する（標準入力では省略）。
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from core.utils.batch_input import InputPosition, RejectsWriter
+
+__all__ = [
+    "CHECKPOINT_VERSION",
+    "Checkpointer",
+    "checkpoint_path",
+    "load_checkpoint",
+    "save_checkpoint",
+]
+
+# チェックポイントの形式を変更した場合に更新する（異なる版からは再開しない）
+CHECKPOINT_VERSION = 2
+
+def checkpoint_path(output_path: Union[str, Path]) -> Path:
+    output_path = Path(output_path)
+    return output_path.with_name(output_path.name + ".checkpoint.json")
+
+def load_checkpoint(path: Union[str, Path]) -> Optional[Dict[str, Any]]:
+    """チェックポイントを読む（存在しなければ None）。"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with path.open("r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version in {path}: {state.get('version')}")
+    return state
+
+def save_checkpoint(path: Union[str, Path], state: Dict[str, Any]) -> None:
+    """チェックポイントを一時ファイルに書き出し、rename で置き換える。"""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(dict(state, version=CHECKPOINT_VERSION), f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class Checkpointer:
+    """書き出したレコード数を数え、every 件ごとに出力を確定してチェックポイントを更新する。
+
+    Args:
+        path: チェックポイントのパス
+        writer: commit() で出力を確定し、出力位置を返すもの（ResultWriter）
+        rejects: 不正な行の出力
+        every: チェックポイントの間隔 [レコード]
+        meta: チェックポイントに含める入力・出力形式の情報
+        position: 開始時の入力位置（再開時はチェックポイントの位置）
+    """
+
+    def __init__(self, path: Union[str, Path], writer: Any, rejects: RejectsWriter, every: int,
+                 meta: Dict[str, Any], position: InputPosition = InputPosition()):
+        if every < 1:
+            raise ValueError("checkpoint interval must be >= 1")
+        self.path = Path(path)
+        self.writer = writer
+        self.rejects = rejects
+        self.every = every
+        self.meta = meta
+        self.position = position
+        self._pending = 0
+
+    def written(self, n_records: int, position: InputPosition) -> None:
+        """入力位置 position までの n_records 件の結果を書き出した後に呼び出す。"""
+        self.position = position
+        self._pending += n_records
+        if self._pending >= self.every:
+            self.commit()
+
+    def commit(self, complete: bool = False) -> None:
+        """書き出し済みの出力を確定し、チェックポイントを更新する。
+
+        complete=True は writer を閉じた後に呼び出し、処理の完了を記録する。
+        """
+        output_position = self.writer.position if complete else self.writer.commit()
+        self.rejects.commit()
+        save_checkpoint(self.path, dict(
+            self.meta,
+            complete=complete,
+            position=self.position._asdict(),
+            output_position=output_position,
+        ))
+        self._pending = 0
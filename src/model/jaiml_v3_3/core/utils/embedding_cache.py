@@ -0,0 +1,174 @@
+# src/model/jaiml_v3_3/core/utils/embedding_cache.py
+import fcntl
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+__all__ = [
+    "DEFAULT_CAPACITY",
+    "EmbeddingCache",
+]
+
+# メモリ層の既定の最大件数。SimCSE（768 次元 float32）では 1 件あたり約 3 KB で、
+# 既定値では約 30 MB となる。並列処理ではワーカーごとに別のメモリ層を持つ
+DEFAULT_CAPACITY = 10_000
+
+class EmbeddingCache:
+    """文埋め込みのキャッシュ（メモリ LRU 層 + 任意のディスク層）。
+
+    キーはモデル名とテキストのハッシュ。ディスク層はモデルごとのディレクトリに
+    float16 の埋め込み行列（追記型・memmap 読み出し）と、キー→行番号の索引を保持する。
+    複数プロセスからの追記は flock で直列化する。
+
+    Args:
+        model_name: 埋め込みモデル名（キーに含め、モデル更新時の取り違えを防ぐ）
+        capacity: メモリ層に保持する最大件数（プロセスごと。1 件あたり 次元数 × 4 バイト）
+        disk_dir: ディスク層のルートディレクトリ（None ならメモリ層のみ）
+    """
+
+    def __init__(self, model_name: str, capacity: int = DEFAULT_CAPACITY, disk_dir: Optional[Union[str, Path]] = None):
+        self.model_name = model_name
+        self.capacity = capacity
+        self.disk_dir = None if disk_dir is None else str(disk_dir)
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        self._disk_root: Optional[Path] = None
+        self._index: Dict[str, int] = {}
+        self._matrix: Optional[np.memmap] = None
+        self._dim: Optional[int] = None
+        if disk_dir is not None:
+            slug = hashlib.sha1(model_name.encode("utf-8")).hexdigest()[:12]
+            self._disk_root = Path(disk_dir) / slug
+            self._disk_root.mkdir(parents=True, exist_ok=True)
+            self._load_index()
+
+    # --- キー ------------------------------------------------------------
+
+    def key(self, text: str) -> str:
+        return hashlib.blake2b(f"{self.model_name}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+    # --- ディスク層 ------------------------------------------------------
+
+    @property
+    def _matrix_path(self) -> Path:
+        return self._disk_root / "embeddings.f16"
+
+    @property
+    def _index_path(self) -> Path:
+        return self._disk_root / "index.tsv"
+
+    @property
+    def _dim_path(self) -> Path:
+        return self._disk_root / "dim"
+
+    def _load_index(self) -> None:
+        if self._dim_path.exists():
+            self._dim = int(self._dim_path.read_text().strip())
+        if self._index_path.exists():
+            with self._index_path.open("r", encoding="ascii") as f:
+                for line in f:
+                    key, _, row = line.rstrip("\n").partition("\t")
+                    if row:
+                        self._index[key] = int(row)
+        self._remap()
+
+    def _remap(self) -> None:
+        """追記後の行数に合わせて埋め込み行列を memmap し直す。"""
+        if self._dim is None or not self._matrix_path.exists():
+            self._matrix = None
+            return
+        n_rows = self._matrix_path.stat().st_size // (self._dim * 2)
+        if n_rows == 0:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(self._matrix_path, dtype=np.float16, mode="r", shape=(n_rows, self._dim))
+
+    def _disk_get(self, key: str) -> Optional[np.ndarray]:
+        row = self._index.get(key)
+        if row is None:
+            return None
+        if self._matrix is None or row >= self._matrix.shape[0]:
+            self._remap()
+            if self._matrix is None or row >= self._matrix.shape[0]:
+                return None
+        return np.asarray(self._matrix[row], dtype=np.float32)
+
+    def _disk_put(self, keys: Sequence[str], embeddings: np.ndarray) -> None:
+        new = [(k, e) for k, e in zip(keys, embeddings) if k not in self._index]
+        if not new:
+            return
+        rows = np.stack([e for _, e in new]).astype(np.float16)
+        with self._index_path.open("a", encoding="ascii") as index_f:
+            fcntl.flock(index_f, fcntl.LOCK_EX)
+            try:
+                # 次元数は最初に書き込んだプロセスのものに従う（ロック下で確認する）
+                if self._dim_path.exists():
+                    self._dim = int(self._dim_path.read_text().strip())
+                else:
+                    self._dim = int(rows.shape[1])
+                    self._dim_path.write_text(str(self._dim))
+                if rows.shape[1] != self._dim:
+                    raise ValueError(f"Embedding dimension {rows.shape[1]} does not match the cache ({self._dim})")
+                row_bytes = self._dim * 2
+                with self._matrix_path.open("ab") as matrix_f:
+                    # 中断された追記の端数（索引から参照されない）を切り詰め、行の境界から書き込む
+                    size = matrix_f.tell()
+                    if size % row_bytes:
+                        matrix_f.truncate(size - size % row_bytes)
+                        matrix_f.seek(0, os.SEEK_END)
+                    first_row = matrix_f.tell() // row_bytes
+                    matrix_f.write(rows.tobytes())
+                    matrix_f.flush()
+                    os.fsync(matrix_f.fileno())
+                # 行を書き終えてから索引を追記する（索引は常に書き込み済みの行のみを指す）
+                index_f.write("".join(f"{k}\t{first_row + i}\n" for i, (k, _) in enumerate(new)))
+                index_f.flush()
+            finally:
+                fcntl.flock(index_f, fcntl.LOCK_UN)
+        for i, (k, _) in enumerate(new):
+            self._index[k] = first_row + i
+
+    # --- 公開 API ----------------------------------------------------------
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """各テキストの埋め込み（float32）を返す。未登録のものは None。"""
+        results: List[Optional[np.ndarray]] = []
+        for text in texts:
+            key = self.key(text)
+            emb = self._lru.get(key)
+            if emb is not None:
+                self._lru.move_to_end(key)
+            elif self._disk_root is not None:
+                emb = self._disk_get(key)
+                if emb is not None:
+                    self._remember(key, emb)
+            if emb is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            results.append(emb)
+        return results
+
+    def put_many(self, texts: Sequence[str], embeddings: np.ndarray) -> None:
+        """埋め込み行列 (len(texts), dim) を登録する。"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        keys = [self.key(t) for t in texts]
+        for key, emb in zip(keys, embeddings):
+            self._remember(key, emb)
+        if self._disk_root is not None:
+            self._disk_put(keys, embeddings)
+
+    def _remember(self, key: str, emb: np.ndarray) -> None:
+        self._lru[key] = emb
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.capacity:
+            self._lru.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._index) if self._disk_root is not None else len(self._lru)
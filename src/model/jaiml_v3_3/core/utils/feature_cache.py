@@ -0,0 +1,175 @@
+# src/model/jaiml_v3_3/core/utils/feature_cache.py
+"""特徴量の永続キャッシュ（SQLite）。
+
+キーは (ユーザー発話, AI応答) の内容ハッシュと特徴量名。各値には、その特徴量が
+依存する資源（辞書のうち参照するカテゴリの内容・形態素解析器・SimCSE モデル・
+TF-IDF モデル）の指紋を併せて保存し、照会時の指紋と一致する値だけを有効とする。
+
+辞書の 1 カテゴリだけを更新した場合は、そのカテゴリを参照する特徴量だけが
+再計算の対象となる。分類器はキャッシュの対象外で、毎回適用し直す。
+"""
+import hashlib
+import importlib.metadata
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from core.classifier.schema import FEATURE_ORDER
+
+__all__ = [
+    "FEATURE_CACHE_VERSION",
+    "FEATURE_LEXICON_CATEGORIES",
+    "TOKENIZER_FEATURES",
+    "FeatureCache",
+    "feature_fingerprints",
+    "pair_key",
+]
+
+# 特徴量の実装（文分割・集計式など）を変更した場合に更新し、既存の値を無効化する
+FEATURE_CACHE_VERSION = 1
+
+# 特徴量 → 参照する辞書カテゴリ（core/features の実装と対応させる）
+FEATURE_LEXICON_CATEGORIES: Dict[str, Tuple[str, ...]] = {
+    "sentiment_emphasis_score": ("positive_emotion_words", "intensifiers"),
+    "modal_expression_ratio": ("modal_expressions",),
+    "assertiveness_score": ("modal_expressions",),
+    "template_match_rate": ("template_phrases",),
+    "self_ref_pos_score": ("self_reference_words", "evaluative_adjectives"),
+    "ai_subject_ratio": ("self_reference_words",),
+    "self_promotion_intensity": (
+        "self_reference_words", "evaluative_adjectives", "comparative_terms", "achievement_verbs",
+        "achievement_nouns", "humble_phrases", "contrastive_conjunctions",
+    ),
+}
+
+# 形態素解析の結果に依存する特徴量
+TOKENIZER_FEATURES = ("response_dependency", "lexical_diversity_inverse", "tfidf_novelty")
+
+# 形態素解析器の指紋に含めるパッケージ（インストールされているもののみ）
+_TOKENIZER_PACKAGES = ("fugashi", "unidic-lite", "unidic", "ipadic")
+
+# SQLite の 1 文で渡すプレースホルダ数の上限
+_QUERY_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    pair_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (pair_key, name)
+) WITHOUT ROWID
+"""
+
+def pair_key(user: str, response: str) -> str:
+    """(ユーザー発話, AI応答) の内容ハッシュ。"""
+    return hashlib.blake2b(f"{user}\0{response}".encode("utf-8"), digest_size=16).hexdigest()
+
+def _digest(*parts: str) -> str:
+    return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+def _tokenizer_fingerprint() -> str:
+    versions = []
+    for package in _TOKENIZER_PACKAGES:
+        try:
+            versions.append(f"{package}={importlib.metadata.version(package)}")
+        except importlib.metadata.PackageNotFoundError:
+            continue
+    return _digest(*versions)
+
+def feature_fingerprints(lexicons: Dict[str, List[str]], embedding_model: str, tfidf_fingerprint: str) -> Dict[str, str]:
+    """特徴量ごとの依存資源の指紋を返す。
+
+    Args:
+        lexicons: カテゴリ名 → 語のリスト（LexiconMatcher.lexicons）
+        embedding_model: semantic_congruence の SimCSE モデル名
+        tfidf_fingerprint: TFIDFNoveltyCalculator.fingerprint
+    """
+    tokenizer = _tokenizer_fingerprint()
+    fingerprints: Dict[str, str] = {}
+    for name in FEATURE_ORDER:
+        parts = [f"v{FEATURE_CACHE_VERSION}", name]
+        for category in FEATURE_LEXICON_CATEGORIES.get(name, ()):
+            # 辞書にないカテゴリは空として扱う（特徴量側と同じ）
+            terms = sorted(set(lexicons.get(category, ())))
+            parts.append(f"{category}:{_digest(json.dumps(terms, ensure_ascii=False))}")
+        if name in TOKENIZER_FEATURES:
+            parts.append(f"tokenizer:{tokenizer}")
+        if name == "semantic_congruence":
+            parts.append(f"embedding:{embedding_model}")
+        if name == "tfidf_novelty":
+            parts.append(f"tfidf:{tfidf_fingerprint}")
+        fingerprints[name] = _digest(*parts)
+    return fingerprints
+
+class FeatureCache:
+    """ペアごとの特徴量を SQLite ファイルに保持する。
+
+    複数のワーカープロセスから同じファイルを開けるよう WAL モードで接続する。
+    同じペア・特徴量の値は最後に書き込んだ指紋のものだけを保持する。
+
+    Args:
+        path: SQLite ファイルのパス（親ディレクトリは自動作成する）
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = str(path)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=60.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._fingerprints: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprints(self, lexicon, embedding_model: str, tfidf_calc) -> Dict[str, str]:
+        """辞書スナップショット・TF-IDF モデルに対する feature_fingerprints（辞書の版ごとに再利用する）。"""
+        key = (lexicon.content_hash, f"{id(tfidf_calc)}:{tfidf_calc.model_path}:{tfidf_calc.is_fitted}")
+        cached = self._fingerprints.get(key)
+        if cached is None:
+            cached = feature_fingerprints(lexicon.lexicons, embedding_model, tfidf_calc.fingerprint)
+            self._fingerprints[key] = cached
+        return cached
+
+    def get_many(self, keys: Sequence[str], fingerprints: Dict[str, str]) -> List[Dict[str, float]]:
+        """各ペアについて、指紋が一致する特徴量の値を返す（なければ空の辞書）。"""
+        found: Dict[str, Dict[str, float]] = {}
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), _QUERY_CHUNK):
+            chunk = unique[start:start + _QUERY_CHUNK]
+            rows = self._conn.execute(
+                f"SELECT pair_key, name, fingerprint, value FROM features "
+                f"WHERE pair_key IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for key, name, fingerprint, value in rows:
+                if fingerprints.get(name) == fingerprint:
+                    found.setdefault(key, {})[name] = value
+        results = [dict(found.get(key, {})) for key in keys]
+        n_found = sum(len(values) for values in results)
+        self.hits += n_found
+        self.misses += len(keys) * len(fingerprints) - n_found
+        return results
+
+    def put_many(self, keys: Sequence[str], values: Sequence[Dict[str, float]], fingerprints: Dict[str, str]) -> None:
+        """各ペアの特徴量の値を現在の指紋とともに書き込む。"""
+        rows = [
+            (key, name, fingerprints[name], float(value))
+            for key, features in zip(keys, values)
+            for name, value in features.items()
+        ]
+        if not rows:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO features (pair_key, name, fingerprint, value) VALUES (?, ?, ?, ?)", rows,
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM features").fetchone()[0]
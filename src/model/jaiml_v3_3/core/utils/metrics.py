@@ -1,21 +1,33 @@
-import torch
-import torch.nn.functional as F
+from typing import TYPE_CHECKING, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import torch
 
 __all__ = [
     "compute_confidence",
+    "confidence_from_variance",
 ]
 
-def compute_confidence(score_samples: torch.Tensor) -> float:
+def compute_confidence(score_samples: Union["torch.Tensor", np.ndarray]) -> float:
     """MCDropout サンプリング結果 (N×4) から信頼度を算出する。
 
     Args:
-        score_samples: torch.Tensor, shape (N, 4), 各列は social, avoidant, mechanical, self の soft score。
+        score_samples: torch.Tensor または np.ndarray, shape (N, 4), 各列は social, avoidant, mechanical, self の soft score。
 
     Returns:
         float: Confidence ∈ [0,1]  (1 − 平均分散)。
     """
     # 分散 (列ごと) → 平均
-    variance = torch.var(score_samples, dim=0, unbiased=False)
-    mean_var = torch.mean(variance).item()
+    if isinstance(score_samples, np.ndarray):
+        mean_var = float(score_samples.var(axis=0).mean())
+    else:
+        variance = score_samples.var(dim=0, unbiased=False)
+        mean_var = variance.mean().item()
     confidence = max(0.0, 1.0 - mean_var)
-    return confidence
\ No newline at end of file
+    return confidence
+
+def confidence_from_variance(variance: np.ndarray) -> float:
+    """カテゴリごとの出力分散 (4,) から信頼度 (1 − 平均分散) を算出する（解析的モード用）。"""
+    return max(0.0, 1.0 - float(np.mean(variance)))
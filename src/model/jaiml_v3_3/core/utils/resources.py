@@ -0,0 +1,84 @@
+# src/model/jaiml_v3_3/core/utils/resources.py
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+__all__ = [
+    "SIMCSE_MODEL_NAME",
+    "register",
+    "get",
+    "is_loaded",
+    "warmup",
+]
+
+SIMCSE_MODEL_NAME = 'pkshatech/simcse-ja-bert-base-clcmlp'
+
+# 重量リソースのレジストリ。モジュール import 時には何も読み込まず、
+# get() の初回呼び出し時に factory を一度だけ実行する。
+_factories: Dict[str, Callable[[], Any]] = {}
+_instances: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+def register(name: str, factory: Callable[[], Any]) -> None:
+    """リソース factory を登録する（同名の読み込み済みインスタンスは破棄する）。"""
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+def get(name: str) -> Any:
+    """リソースを返す。未読み込みであればここで読み込む。
+
+    Raises:
+        KeyError: 未登録のリソース名
+    """
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+    with _lock:
+        if name not in _instances:
+            if name not in _factories:
+                raise KeyError(f"Unknown resource: {name}")
+            _instances[name] = _factories[name]()
+        return _instances[name]
+
+def is_loaded(name: str) -> bool:
+    return name in _instances
+
+def warmup(names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """リソースを事前に読み込む（常駐サービス・ワーカーの起動時用）。
+
+    Args:
+        names: 読み込むリソース名（None なら登録済みの全リソース）
+
+    Returns:
+        Dict[str, float]: リソース名 → 読み込み時間 [ms]（読み込み済みは 0.0）
+    """
+    timings: Dict[str, float] = {}
+    for name in list(names if names is not None else _factories):
+        start = time.perf_counter()
+        get(name)
+        timings[name] = (time.perf_counter() - start) * 1000.0
+    return timings
+
+# --- 標準リソース -----------------------------------------------------------
+
+def _load_fugashi() -> Any:
+    from fugashi import Tagger
+    return Tagger()
+
+def _load_simcse() -> Any:
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(SIMCSE_MODEL_NAME)
+
+def _load_torch() -> Any:
+    import torch
+    return torch
+
+def _load_sklearn_tfidf() -> Any:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer
+
+register("fugashi", _load_fugashi)
+register("simcse", _load_simcse)
+register("torch", _load_torch)
+register("sklearn_tfidf", _load_sklearn_tfidf)
@@ -0,0 +1,285 @@
+# src/model/jaiml_v3_3/core/utils/result_writer.py
+"""バッチ推論結果の書き出し形式。
+
+    jsonl   : 1 ペア 1 行の JSON（入力テキストを含む従来形式）
+    compact : 入力テキストを省き id のみを残した JSON Lines（区切りの空白なし）
+    parquet : 列指向の Parquet ファイル
+    arrow   : 列指向の Arrow IPC ファイル
+
+列指向形式では features・scores を struct 列（各特徴量・カテゴリが子列）、
+meta.timings を map<string, double> 列として保持し、入力テキストは含めない。
+特徴量の列だけを読む場合もテキストの解析は不要である。
+
+    pyarrow.parquet.read_table("out.parquet", columns=["id", "features"])
+
+parquet / arrow には pyarrow が必要（jsonl / compact は不要）。
+
+ResultWriter は書き出し済みの結果を commit() で確定でき、中断したバッチ推論を
+確定済みの位置から再開できる（core.utils.checkpoint）。
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Union
+
+from core.classifier.schema import CATEGORIES, FEATURE_ORDER
+
+__all__ = [
+    "OUTPUT_FORMATS",
+    "ResultWriter",
+    "compact_result",
+    "encode_results",
+    "result_schema",
+]
+
+OUTPUT_FORMATS = ("jsonl", "compact", "parquet", "arrow")
+
+# 列指向形式で 1 つの row group / record batch にまとめる行数
+ROWS_PER_GROUP = 65536
+
+def _require_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise ImportError("pyarrow is required for --output-format parquet / arrow (pip install pyarrow)") from exc
+    return pyarrow
+
+def compact_result(result: Dict[str, Any], record_id: Any) -> Dict[str, Any]:
+    """推論結果から入力テキストを除き、先頭に id を付ける。"""
+    compact: Dict[str, Any] = {"id": record_id}
+    compact.update((key, value) for key, value in result.items() if key != "input")
+    return compact
+
+def result_schema() -> Any:
+    """列指向形式のスキーマ（pyarrow.Schema）。"""
+    pa = _require_pyarrow()
+    return pa.schema([
+        pa.field("id", pa.string()),
+        pa.field("predicted_category", pa.string()),
+        pa.field("index", pa.float64()),
+        pa.field("confidence", pa.float64()),
+        pa.field("scores", pa.struct([pa.field(cat, pa.float64()) for cat in CATEGORIES])),
+        pa.field("features", pa.struct([pa.field(name, pa.float64()) for name in FEATURE_ORDER])),
+        pa.field("n_samples", pa.int64()),
+        pa.field("token_length", pa.int64()),
+        pa.field("processing_time_ms", pa.int64()),
+        pa.field("lexicon_version", pa.string()),
+        pa.field("timings", pa.map_(pa.string(), pa.float64())),
+    ])
+
+def _record_batch(results: Sequence[Dict[str, Any]], ids: Sequence[Any]) -> Any:
+    pa = _require_pyarrow()
+    schema = result_schema()
+    metas = [result["meta"] for result in results]
+    columns = {
+        "id": [str(record_id) for record_id in ids],
+        "predicted_category": [result["predicted_category"] for result in results],
+        "index": [result["index"] for result in results],
+        "confidence": [meta["confidence"] for meta in metas],
+        "scores": [result["scores"] for result in results],
+        "features": [result["features"] for result in results],
+        "n_samples": [meta.get("n_samples") for meta in metas],
+        "token_length": [meta["token_length"] for meta in metas],
+        "processing_time_ms": [meta["processing_time_ms"] for meta in metas],
+        "lexicon_version": [meta["lexicon_version"] for meta in metas],
+        "timings": [None if meta.get("timings") is None else list(meta["timings"].items()) for meta in metas],
+    }
+    return pa.RecordBatch.from_arrays(
+        [pa.array(columns[field.name], type=field.type) for field in schema], schema=schema,
+    )
+
+def encode_results(results: Sequence[Dict[str, Any]], ids: Sequence[Any], output_format: str) -> Any:
+    """推論結果を書き出し形式に変換する（並列処理ではワーカー側で呼び出す）。
+
+    Returns:
+        jsonl / compact では JSON Lines の文字列、parquet / arrow では pyarrow.RecordBatch
+    """
+    if output_format == "jsonl":
+        return "".join(json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+    if output_format == "compact":
+        return "".join(
+            json.dumps(compact_result(result, record_id), ensure_ascii=False, separators=(",", ":")) + "\n"
+            for result, record_id in zip(results, ids)
+        )
+    if output_format in ("parquet", "arrow"):
+        return _record_batch(results, ids)
+    raise ValueError(f"Unknown output format: {output_format}")
+
+class ResultWriter:
+    """encode_results の出力を入力順にファイルへ書き出す。
+
+    commit() で書き出し済みの結果を確定し、その出力位置を返す。resume に出力位置を渡すと、
+    確定済みの結果を残して続きから書き出す（確定後に書き出した分は破棄する）。
+
+    jsonl / compact は出力ファイルに直接追記し、出力位置は確定済みのバイト数とする。
+    列指向形式は確定の単位ごとに <output>.segments/ 以下の Arrow IPC セグメントへ書き出し
+    （一時ファイルからの rename で確定する）、出力位置は確定済みのセグメント数とする。
+    close() でセグメントを連結して出力ファイルを作成し、セグメントを削除する。
+    連結時はセグメントの境界（確定の単位）によらず ROWS_PER_GROUP 行ごとの
+    row group / record batch に組み直す（チャンク・チェックポイントごとの小さな row group を避けるため）。
+
+    Args:
+        path: 出力先
+        output_format: OUTPUT_FORMATS のいずれか
+        resume: 再開時に引き継ぐ出力位置（commit() の戻り値）。None なら新規に書き出す
+
+    Raises:
+        ValueError: 出力ファイルが resume のバイト数に満たない、または確定済みのセグメントが
+            欠けている場合（チェックポイントより後に出力が削除・変更された）
+    """
+
+    def __init__(self, path: Union[str, Path], output_format: str = "jsonl", resume: Optional[int] = None):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.path = Path(path)
+        self.output_format = output_format
+        self.position = resume or 0
+        self._file: Optional[BinaryIO] = None
+        self._segment: Any = None
+        self._sink: Any = None
+        self._pending: List[Any] = []
+        self._pending_rows = 0
+        self._closed = False
+        if output_format in ("jsonl", "compact"):
+            if not resume:
+                self._file = self.path.open("wb")
+                return
+            size = self.path.stat().st_size if self.path.exists() else None
+            if size is None or size < resume:
+                found = "missing" if size is None else f"{size} bytes"
+                raise ValueError(f"Cannot resume: output {self.path} is {found}, "
+                                 f"but the checkpoint expects {resume} bytes")
+            self._file = self.path.open("r+b")
+            self._file.truncate(resume)
+            self._file.seek(resume)
+            return
+        _require_pyarrow()
+        self.segments_dir = self.path.with_name(self.path.name + ".segments")
+        if resume is None and self.segments_dir.exists():
+            shutil.rmtree(self.segments_dir)
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        missing = [index for index in range(self.position) if not self._segment_path(index).exists()]
+        if missing:
+            raise ValueError(f"Cannot resume: {len(missing)} committed segment(s) missing from {self.segments_dir} "
+                             f"(first: {self._segment_path(missing[0]).name})")
+        # 確定していないセグメント（中断時の書きかけ・確定後に作られたもの）を削除する
+        for stale in self.segments_dir.iterdir():
+            if stale.suffix == ".tmp" or stale.name >= self._segment_path(self.position).name:
+                stale.unlink()
+
+    def _segment_path(self, index: int) -> Path:
+        return self.segments_dir / f"part-{index:06d}.arrow"
+
+    def write(self, encoded: Any) -> None:
+        if self._file is not None:
+            self._file.write(encoded.encode("utf-8"))
+            return
+        if encoded.num_rows == 0:
+            return
+        self._pending.append(encoded)
+        self._pending_rows += encoded.num_rows
+        if self._pending_rows >= ROWS_PER_GROUP:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        pa = _require_pyarrow()
+        if self._segment is None:
+            tmp = self._segment_path(self.position).with_suffix(".tmp")
+            self._sink = pa.OSFile(str(tmp), "wb")
+            self._segment = pa.ipc.new_file(self._sink, result_schema())
+        self._segment.write_table(pa.Table.from_batches(self._pending).combine_chunks())
+        self._pending = []
+        self._pending_rows = 0
+
+    def commit(self) -> int:
+        """書き出し済みの結果をディスクに確定し、出力位置を返す。"""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.position = self._file.tell()
+            return self.position
+        self._flush()
+        if self._segment is not None:
+            self._segment.close()
+            self._sink.close()
+            self._segment = self._sink = None
+            tmp = self._segment_path(self.position).with_suffix(".tmp")
+            os.replace(tmp, self._segment_path(self.position))
+            self.position += 1
+        return self.position
+
+    def _row_groups(self) -> Iterator[Any]:
+        """確定済みのセグメントを順に読み、ROWS_PER_GROUP 行ずつの表に組み直して返す（最後は端数）。"""
+        pa = _require_pyarrow()
+        schema = result_schema()
+        pending: List[Any] = []
+        pending_rows = 0
+        for index in range(self.position):
+            # record batch 単位で読む（セグメントを閉じた後も参照できるようメモリに読み込む）
+            with pa.OSFile(str(self._segment_path(index)), "rb") as source:
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    batch = reader.get_batch(i)
+                    pending.append(batch)
+                    pending_rows += batch.num_rows
+                    while pending_rows >= ROWS_PER_GROUP:
+                        table = pa.Table.from_batches(pending, schema)
+                        yield table.slice(0, ROWS_PER_GROUP).combine_chunks()
+                        pending = table.slice(ROWS_PER_GROUP).to_batches()
+                        pending_rows -= ROWS_PER_GROUP
+        if pending_rows:
+            yield pa.Table.from_batches(pending, schema).combine_chunks()
+
+    def _assemble(self) -> None:
+        """確定済みのセグメントを連結して出力ファイルを作成する。"""
+        pa = _require_pyarrow()
+        schema = result_schema()
+        if self.output_format == "parquet":
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(str(self.path), schema)
+            sink = None
+        else:
+            sink = pa.OSFile(str(self.path), "wb")
+            writer = pa.ipc.new_file(sink, schema)
+        for table in self._row_groups():
+            if self.output_format == "parquet":
+                writer.write_table(table, row_group_size=ROWS_PER_GROUP)
+            else:
+                writer.write_table(table, max_chunksize=ROWS_PER_GROUP)
+        writer.close()
+        if sink is not None:
+            sink.close()
+        shutil.rmtree(self.segments_dir)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._file is not None:
+            self._file.close()
+            return
+        self.commit()
+        self._assemble()
+
+    def abort(self) -> None:
+        """確定していない結果を破棄して閉じる（確定済みの出力は再開のために残す）。"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._file is not None:
+            self._file.close()
+        elif self._segment is not None:
+            self._segment.close()
+            self._sink.close()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
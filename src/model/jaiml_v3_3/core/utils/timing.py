@@ -0,0 +1,110 @@
+# src/model/jaiml_v3_3/core/utils/timing.py
+import json
+import math
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Union
+
+__all__ = [
+    "TimingHistogram",
+    "TimingAggregator",
+    "elapsed_ms",
+]
+
+# 対数等間隔のバケット境界 [ms]: 0.01 ms 〜 100 s を 1 桁あたり 10 分割（相対誤差 約 26% 以内）
+_BUCKETS_PER_DECADE = 10
+_MIN_EXP, _MAX_EXP = -2, 5
+_BOUNDS: List[float] = [
+    10 ** (e / _BUCKETS_PER_DECADE)
+    for e in range(_MIN_EXP * _BUCKETS_PER_DECADE, _MAX_EXP * _BUCKETS_PER_DECADE + 1)
+]
+
+def elapsed_ms(start: float) -> float:
+    """time.perf_counter() の開始時刻からの経過時間 [ms]。"""
+    return (time.perf_counter() - start) * 1000.0
+
+class TimingHistogram:
+    """固定バケットのレイテンシヒストグラム。
+
+    件数によらずメモリは一定で、ワーカー間の集計は merge() で加算するだけでよい。
+    パーセンタイルは該当バケットの上限値で近似する。
+    """
+
+    def __init__(self):
+        self.counts: List[int] = [0] * (len(_BOUNDS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect_left(_BOUNDS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def merge(self, other: "TimingHistogram") -> None:
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, p: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(p * self.count))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(_BOUNDS[i], self.max_ms) if i < len(_BOUNDS) else self.max_ms
+        return self.max_ms
+
+    def summary(self) -> Dict[str, float]:
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3),
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p90_ms": round(self.percentile(0.90), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "total_ms": round(self.total_ms, 3),
+        }
+
+class TimingAggregator:
+    """区間名ごとのヒストグラム（バッチ実行全体の meta.timings を集計する）。"""
+
+    def __init__(self):
+        self.histograms: Dict[str, TimingHistogram] = {}
+
+    def add(self, timings: Mapping[str, float]) -> None:
+        for name, ms in timings.items():
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = TimingHistogram()
+            hist.add(ms)
+
+    def add_all(self, timings_list: Iterable[Optional[Mapping[str, float]]]) -> None:
+        for timings in timings_list:
+            if timings:
+                self.add(timings)
+
+    def merge(self, other: "TimingAggregator") -> None:
+        for name, hist in other.histograms.items():
+            if name not in self.histograms:
+                self.histograms[name] = TimingHistogram()
+            self.histograms[name].merge(hist)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """区間名 → 統計量。合計時間の大きい順に並べる。"""
+        ordered = sorted(self.histograms.items(), key=lambda kv: kv[1].total_ms, reverse=True)
+        return {name: hist.summary() for name, hist in ordered}
+
+    def write(self, path: Union[str, Path]) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+            f.write("\n")
@@ -1,21 +1,19 @@
 # src/model/jaiml_v3_3/core/utils/tokenize.py
-from fugashi import Tagger
 import re
-from typing import List
+from typing import List, TYPE_CHECKING
 
-# fugashiタガーのグローバルインスタンス
-_tagger = None
+from core.utils import resources
 
-def get_fugashi_tagger() -> Tagger:
-    """fugashiタガーのシングルトンインスタンスを返す。
+if TYPE_CHECKING:
+    from fugashi import Tagger
+
+def get_fugashi_tagger() -> "Tagger":
+    """fugashiタガーのシングルトンインスタンスを返す（初回呼び出し時に読み込む）。
     
     Returns:
         Tagger: 形態素解析器インスタンス
     """
-    global _tagger
-    if _tagger is None:
-        _tagger = Tagger()
-    return _tagger
+    return resources.get("fugashi")
 
 def mecab_tokenize(text: str) -> List[str]:
     """fugashiによる日本語形態素解析を行い、表層形のリストを返す。
@@ -0,0 +1,85 @@
+# src/model/jaiml_v3_3/core/utils/windowing.py
+"""長文応答の文単位の窓分割。
+
+応答を文末記号（。！？）の直後で区切り、max_chars 文字を超えない範囲で連続する文を
+1 つの窓にまとめる。窓を連結すると元のテキストに一致する（空白・改行も落とさない）。
+
+max_chars を超える 1 文は読点・改行の直後（なければ max_chars 文字ごと）で分割する。
+MIN_WINDOW_CHARS 文字に満たない窓（末尾の「はい。」など）は直前の窓に連結する。
+連結すると max_chars を超える場合は、短い窓が MIN_WINDOW_CHARS 文字になるよう
+隣の窓との境界をずらす（文の途中で区切ることになる）。どの窓も max_chars 文字を超えない。
+"""
+import re
+from typing import List, Tuple
+
+__all__ = [
+    "DEFAULT_WINDOW_CHARS",
+    "MIN_WINDOW_CHARS",
+    "split_windows",
+]
+
+# 既定の窓の大きさ [文字]。SimCSE（BERT、最大 512 トークン）で切り捨てが起きない長さとする
+DEFAULT_WINDOW_CHARS = 512
+
+# 窓の最小文字数（run_inference.validate の下限と同じ）
+MIN_WINDOW_CHARS = 5
+
+# 文末記号の連続までを 1 文とする（末尾の記号のない文も含む）
+_SENTENCE_RE = re.compile(r".*?[。！？]+|.+", re.S)
+
+# 1 文が max_chars を超える場合の分割候補
+_SOFT_BREAKS = "、\n"
+
+def _split_sentence(sentence: str, max_chars: int) -> List[str]:
+    pieces: List[str] = []
+    while len(sentence) > max_chars:
+        head = sentence[:max_chars]
+        cut = max(head.rfind(mark) for mark in _SOFT_BREAKS) + 1
+        # 区切りが窓の前半にしかない場合は文字数で分割する
+        if cut <= max_chars // 2:
+            cut = max_chars
+        pieces.append(sentence[:cut])
+        sentence = sentence[cut:]
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+def split_windows(text: str, max_chars: int = DEFAULT_WINDOW_CHARS) -> List[Tuple[int, str]]:
+    """テキストを文境界で max_chars 文字以下の窓に分割する。
+
+    Args:
+        text: 分割するテキスト
+        max_chars: 窓の最大文字数（MIN_WINDOW_CHARS 以上）
+
+    Returns:
+        List[Tuple[int, str]]: (元テキストでの開始オフセット, 窓のテキスト) の列
+    """
+    if max_chars < MIN_WINDOW_CHARS:
+        raise ValueError(f"max_chars must be >= {MIN_WINDOW_CHARS}")
+    windows: List[Tuple[int, str]] = []
+    start, current = 0, ""
+    for match in _SENTENCE_RE.finditer(text):
+        for piece in _split_sentence(match.group(), max_chars):
+            if current and len(current) + len(piece) > max_chars:
+                windows.append((start, current))
+                start, current = start + len(current), ""
+            current += piece
+    if current:
+        windows.append((start, current))
+    # 短すぎる窓は直前の窓に連結する（先頭の窓なら直後の窓を連結する）
+    merged: List[Tuple[int, str]] = []
+    for offset, window in windows:
+        if not merged or (len(window) >= MIN_WINDOW_CHARS and len(merged[-1][1]) >= MIN_WINDOW_CHARS):
+            merged.append((offset, window))
+            continue
+        start, combined = merged[-1][0], merged[-1][1] + window
+        if len(combined) <= max_chars:
+            merged[-1] = (start, combined)
+            continue
+        # 連結すると max_chars を超える場合は、短い側が MIN_WINDOW_CHARS 文字になるよう境界をずらす
+        # （max_chars が小さく両立しない場合も max_chars は超えない）
+        cut = len(combined) - MIN_WINDOW_CHARS if len(window) < MIN_WINDOW_CHARS else MIN_WINDOW_CHARS
+        cut = min(max(cut, len(combined) - max_chars), max_chars)
+        merged[-1] = (start, combined[:cut])
+        merged.append((start + cut, combined[cut:]))
+    return merged
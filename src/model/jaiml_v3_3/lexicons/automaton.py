@@ -0,0 +1,140 @@
+# src/model/jaiml_v3_3/lexicons/automaton.py
+from collections import deque
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+__all__ = [
+    "AhoCorasick",
+]
+
+# 遷移表のキー: (状態番号 << _CHAR_BITS) | 文字コード
+_CHAR_BITS = 21  # Unicode のコードポイントは 21 bit に収まる
+
+class AhoCorasick:
+    """全語彙を 1 つにまとめた Aho-Corasick 多パターン照合オートマトン。
+
+    テキストを 1 回走査するだけで、全パターンの全出現位置（重なりを含む）を返す。
+    遷移表は (状態, 文字) をまとめた整数キーの単一 dict、出力は失敗リンク先の出力を
+    構築時にマージ済みのタプルとして保持する。
+
+    Args:
+        patterns: パターン文字列（空文字列は無視する）。パターン ID はこの列の添字。
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns: List[str] = list(patterns)
+        self.goto: Dict[int, int] = {}
+        self.fail: List[int] = [0]
+        self.output: List[Tuple[int, ...]] = [()]
+        self._build()
+
+    def _build(self) -> None:
+        goto = self.goto
+        own_output: List[List[int]] = [[]]
+        children: List[List[Tuple[int, int]]] = [[]]  # 状態 → [(文字コード, 子状態)]
+
+        # 1. トライの構築
+        for pid, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                key = (state << _CHAR_BITS) | ord(ch)
+                nxt = goto.get(key)
+                if nxt is None:
+                    nxt = len(own_output)
+                    goto[key] = nxt
+                    own_output.append([])
+                    children.append([])
+                    children[state].append((ord(ch), nxt))
+                state = nxt
+            own_output[state].append(pid)
+
+        # 2. 幅優先で失敗リンクと出力を計算
+        n_states = len(own_output)
+        fail = [0] * n_states
+        output: List[Tuple[int, ...]] = [()] * n_states
+        output[0] = tuple(own_output[0])
+        queue = deque()
+        for _, child in children[0]:
+            output[child] = tuple(own_output[child])
+            queue.append(child)
+        while queue:
+            state = queue.popleft()
+            for code, child in children[state]:
+                f = fail[state]
+                while True:
+                    nxt = goto.get((f << _CHAR_BITS) | code)
+                    if nxt is not None:
+                        fail[child] = nxt
+                        break
+                    if f == 0:
+                        break
+                    f = fail[f]
+                output[child] = tuple(own_output[child]) + output[fail[child]]
+                queue.append(child)
+        self.fail = fail
+        self.output = output
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """構築済みの遷移表・失敗リンク・出力を平坦な配列として返す（コンパイル済み辞書用）。
+
+        Returns:
+            Dict[str, np.ndarray]: goto_keys（昇順）, goto_values, fail, out_offsets, out_ids
+        """
+        keys = np.fromiter(self.goto.keys(), dtype=np.int64, count=len(self.goto))
+        values = np.fromiter(self.goto.values(), dtype=np.int32, count=len(self.goto))
+        order = np.argsort(keys, kind="stable")
+        lengths = np.fromiter((len(out) for out in self.output), dtype=np.int64, count=len(self.output))
+        out_offsets = np.zeros(len(self.output) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=out_offsets[1:])
+        out_ids = np.fromiter((pid for out in self.output for pid in out), dtype=np.int32, count=int(out_offsets[-1]))
+        return {
+            "goto_keys": keys[order],
+            "goto_values": values[order],
+            "fail": np.asarray(self.fail, dtype=np.int32),
+            "out_offsets": out_offsets,
+            "out_ids": out_ids,
+        }
+
+    @classmethod
+    def from_arrays(cls, patterns: Sequence[str], arrays: Dict[str, np.ndarray]) -> "AhoCorasick":
+        """to_arrays() の結果から再構築する（トライ構築・幅優先探索を行わない）。"""
+        ac = cls.__new__(cls)
+        ac.patterns = list(patterns)
+        ac.goto = dict(zip(arrays["goto_keys"].tolist(), arrays["goto_values"].tolist()))
+        ac.fail = arrays["fail"].tolist()
+        offsets = arrays["out_offsets"].tolist()
+        out_ids = arrays["out_ids"].tolist()
+        output: List[Tuple[int, ...]] = [()] * len(ac.fail)
+        for state in np.flatnonzero(np.diff(arrays["out_offsets"])).tolist():
+            output[state] = tuple(out_ids[offsets[state]:offsets[state + 1]])
+        ac.output = output
+        return ac
+
+    @property
+    def n_states(self) -> int:
+        return len(self.fail)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """テキスト中の全出現を (開始, 終了, パターン ID) で返す（終了位置の昇順）。"""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        patterns = self.patterns
+        state = 0
+        for i, ch in enumerate(text):
+            code = ord(ch)
+            while True:
+                nxt = goto.get((state << _CHAR_BITS) | code)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            if output[state]:
+                end = i + 1
+                for pid in output[state]:
+                    yield end - len(patterns[pid]), end, pid
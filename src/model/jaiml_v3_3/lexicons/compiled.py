@@ -0,0 +1,246 @@
+# src/model/jaiml_v3_3/lexicons/compiled.py
+"""コンパイル済み辞書（.lexc）の作成と読み込み。
+
+YAML 辞書を解析・索引化した結果（カテゴリ表・語句表・Aho-Corasick オートマトン）を
+単一のバイナリファイルに保存する。ファイルは np.memmap で読み込むため、
+複数のワーカープロセスが同じ物理ページを共有する。
+
+ファイル構成:
+    MAGIC (8 bytes) | ヘッダ長 (uint32 LE) | ヘッダ JSON | 8 バイト境界に揃えた配列データ
+
+ヘッダには形式バージョンと元 YAML の内容ハッシュ (SHA-256) を記録する。
+成果物が存在しない・形式が古い・YAML と内容ハッシュが一致しない場合は YAML から読み込む。
+"""
+import hashlib
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import yaml
+
+from .automaton import AhoCorasick
+
+__all__ = [
+    "FORMAT_VERSION",
+    "ARTIFACT_SUFFIX",
+    "LexiconTables",
+    "artifact_path",
+    "content_hash",
+    "compile_lexicon",
+    "read_artifact",
+    "load_lexicon_tables",
+]
+
+MAGIC = b"JAIMLLEX"
+FORMAT_VERSION = 1
+ARTIFACT_SUFFIX = ".lexc"
+_ALIGN = 8
+
+PathLike = Union[str, Path]
+
+class LexiconTables:
+    """辞書の カテゴリ表・語句表・照合オートマトン。
+
+    YAML からでもコンパイル済み成果物からでも同じ形で構築する。
+    オートマトンは初回参照時に構築（成果物からは配列の読み込みのみ）する。
+
+    Attributes:
+        lexicons: カテゴリ名 → 語のリスト（YAML の記載順）
+        terms: 重複のない語句表。パターン ID はこの列の添字
+        term_ranks: パターン ID → [(カテゴリ, カテゴリ内の語順)]
+        content_hash: 元 YAML の内容ハッシュ
+        source: 'artifact' または 'yaml'
+    """
+
+    def __init__(self, lexicons: Dict[str, List[str]], terms: List[str],
+                 term_ranks: List[List[Tuple[str, int]]], content_hash: str, source: str,
+                 automaton_arrays: Optional[Dict[str, np.ndarray]] = None):
+        self.lexicons = lexicons
+        self.terms = terms
+        self.term_ranks = term_ranks
+        self.content_hash = content_hash
+        self.source = source
+        self._automaton_arrays = automaton_arrays
+        self._automaton: Optional[AhoCorasick] = None
+
+    @classmethod
+    def from_lexicons(cls, lexicons: Dict[str, List[str]], content_hash: str, source: str = "yaml") -> "LexiconTables":
+        terms: List[str] = []
+        term_ids: Dict[str, int] = {}
+        term_ranks: List[List[Tuple[str, int]]] = []
+        for category, entries in lexicons.items():
+            for rank, term in enumerate(entries or []):
+                pid = term_ids.get(term)
+                if pid is None:
+                    pid = term_ids[term] = len(terms)
+                    terms.append(term)
+                    term_ranks.append([])
+                term_ranks[pid].append((category, rank))
+        return cls(lexicons, terms, term_ranks, content_hash, source)
+
+    @property
+    def automaton(self) -> AhoCorasick:
+        if self._automaton is None:
+            if self._automaton_arrays is not None:
+                self._automaton = AhoCorasick.from_arrays(self.terms, self._automaton_arrays)
+            else:
+                # 空文字列の語はオートマトン側で無視される
+                self._automaton = AhoCorasick(self.terms)
+        return self._automaton
+
+def content_hash(yaml_path: PathLike) -> str:
+    with open(yaml_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def artifact_path(yaml_path: PathLike) -> Path:
+    """YAML 辞書に対応する成果物のパス（同じディレクトリの <stem>.lexc）。"""
+    return Path(yaml_path).with_suffix(ARTIFACT_SUFFIX)
+
+def _parse_yaml(yaml_path: PathLike) -> Dict[str, List[str]]:
+    """YAML 辞書を {カテゴリ: 語のリスト} として読む。
+
+    値のないカテゴリ（`category:` のみ）は空のリストとする。リストでないカテゴリ・
+    文字列でない語（空の項目を含む）は読み飛ばさずに ValueError とする。
+    """
+    with open(yaml_path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{yaml_path}: lexicon must be a mapping of categories, got {type(data).__name__}")
+    lexicons: Dict[str, List[str]] = {}
+    for category, entries in data.items():
+        if entries is None:
+            entries = []
+        if not isinstance(entries, list):
+            raise ValueError(f"{yaml_path}: category '{category}' must be a list of terms, "
+                             f"got {type(entries).__name__}")
+        for rank, term in enumerate(entries):
+            if not isinstance(term, str):
+                raise ValueError(f"{yaml_path}: category '{category}' has a non-string term at position {rank}: {term!r}")
+        lexicons[category] = entries
+    return lexicons
+
+def compile_lexicon(yaml_path: PathLike, output_path: Optional[PathLike] = None) -> Path:
+    """YAML 辞書をコンパイル済み成果物に変換する。
+
+    一時ファイルに書き出してから置き換えるため、読み込み中のプロセスは古い版を参照し続ける。
+
+    Args:
+        yaml_path: YAML 辞書のパス
+        output_path: 出力先（省略時は artifact_path(yaml_path)）
+
+    Returns:
+        Path: 書き出した成果物のパス
+    """
+    digest = content_hash(yaml_path)
+    tables = LexiconTables.from_lexicons(_parse_yaml(yaml_path), digest)
+    categories = list(tables.lexicons)
+
+    encoded = [term.encode("utf-8") for term in tables.terms]
+    term_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=term_offsets[1:])
+    term_ids = {term: pid for pid, term in enumerate(tables.terms)}
+    cat_offsets = np.zeros(len(categories) + 1, dtype=np.int64)
+    np.cumsum([len(tables.lexicons[c]) for c in categories], out=cat_offsets[1:])
+    cat_terms = np.array(
+        [term_ids[term] for c in categories for term in tables.lexicons[c]], dtype=np.int32
+    )
+
+    arrays: Dict[str, np.ndarray] = {
+        "term_blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "term_offsets": term_offsets,
+        "cat_offsets": cat_offsets,
+        "cat_terms": cat_terms,
+    }
+    arrays.update(tables.automaton.to_arrays())
+
+    layout: Dict[str, Dict[str, object]] = {}
+    offset = 0
+    for name, arr in arrays.items():
+        layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({
+        "format_version": FORMAT_VERSION,
+        "content_hash": digest,
+        "categories": categories,
+        "arrays": layout,
+    }, ensure_ascii=False).encode("utf-8")
+    prefix = len(MAGIC) + 4 + len(header)
+    header += b" " * (-prefix % _ALIGN)
+
+    output_path = Path(output_path) if output_path is not None else artifact_path(yaml_path)
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for name, arr in arrays.items():
+            data = np.ascontiguousarray(arr).tobytes()
+            f.write(data)
+            f.write(b"\0" * (-len(data) % _ALIGN))
+    os.replace(tmp_path, output_path)
+    return output_path
+
+def read_artifact(path: PathLike, expected_hash: Optional[str] = None) -> Optional[LexiconTables]:
+    """成果物を memmap で読み込む。
+
+    Args:
+        path: 成果物のパス
+        expected_hash: 元 YAML の内容ハッシュ（一致しなければ古い成果物とみなす）
+
+    Returns:
+        Optional[LexiconTables]: 存在しない・形式が異なる・古い場合は None
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        (header_len,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_len))
+    if header.get("format_version") != FORMAT_VERSION:
+        return None
+    if expected_hash is not None and header.get("content_hash") != expected_hash:
+        return None
+
+    data_start = len(MAGIC) + 4 + header_len
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays: Dict[str, np.ndarray] = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        start = data_start + spec["offset"]
+        arrays[name] = mm[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+
+    blob = arrays["term_blob"].tobytes()
+    offsets = arrays["term_offsets"].tolist()
+    terms = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+    categories: Sequence[str] = header["categories"]
+    cat_offsets = arrays["cat_offsets"].tolist()
+    cat_terms = arrays["cat_terms"].tolist()
+    lexicons: Dict[str, List[str]] = {}
+    term_ranks: List[List[Tuple[str, int]]] = [[] for _ in terms]
+    for c, category in enumerate(categories):
+        ids = cat_terms[cat_offsets[c]:cat_offsets[c + 1]]
+        lexicons[category] = [terms[pid] for pid in ids]
+        for rank, pid in enumerate(ids):
+            term_ranks[pid].append((category, rank))
+    automaton_arrays = {name: arrays[name] for name in ("goto_keys", "goto_values", "fail", "out_offsets", "out_ids")}
+    return LexiconTables(lexicons, terms, term_ranks, header["content_hash"], "artifact", automaton_arrays)
+
+def load_lexicon_tables(yaml_path: PathLike, use_artifact: bool = True) -> LexiconTables:
+    """辞書を読み込む。新しい成果物があればそれを使い、なければ YAML を解析する。
+
+    Args:
+        yaml_path: YAML 辞書のパス
+        use_artifact: False の場合は常に YAML から読み込む
+    """
+    digest = content_hash(yaml_path)
+    if use_artifact:
+        tables = read_artifact(artifact_path(yaml_path), expected_hash=digest)
+        if tables is not None:
+            return tables
+    return LexiconTables.from_lexicons(_parse_yaml(yaml_path), digest)
@@ -1,23 +1,226 @@
 # src/model/jaiml_v3_2/lexicons/matcher.py
-import re
-import yaml
+import os
+import sys
+import threading
+from bisect import bisect_right
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
 
-class LexiconMatcher:
-    def __init__(self, lexicon_path: str):
-        # Load lexicons from YAML file
-        with open(lexicon_path, 'r', encoding='utf-8') as f:
-            self.lexicons = yaml.safe_load(f)
+from lexicons.compiled import LexiconTables, content_hash, load_lexicon_tables
+
+class LexiconHit(NamedTuple):
+    """辞書照合の 1 件（カテゴリ・語・テキスト上の文字オフセット）。"""
+    category: str
+    term: str
+    start: int
+    end: int
+
+class LexiconSnapshot:
+    """ある時点の辞書と照合索引（構築後は変更しない）。
+
+    LexiconMatcher は現在のスナップショットへの参照を差し替えることで辞書を更新する。
+    処理中の要求は開始時に取得したスナップショットで最後まで照合するため、
+    更新の前後で辞書が混在しない。LexiconMatcher と同じ照合メソッドを持つ。
+
+    Attributes:
+        lexicons: カテゴリ名 → 語のリスト
+        categories: カテゴリ名（辞書の記載順）
+        content_hash: 元 YAML の内容ハッシュ
+        version: 辞書バージョン（内容ハッシュの先頭 12 桁）
+        source: 'artifact' または 'yaml'
+        index_key: 照合結果をテキスト側にキャッシュする際のキー（辞書内容ごとに異なる）
+    """
+
+    def __init__(self, tables: LexiconTables):
+        self.lexicons = tables.lexicons
+        self.categories: Tuple[str, ...] = tuple(self.lexicons)
+        self.content_hash = tables.content_hash
+        self.version = tables.content_hash[:12]
+        self.source = tables.source
+        self.index_key = tables.content_hash[:16]
+        self._term_ranks = tables.term_ranks
+        # パターン ID → 重複のないカテゴリ列（同一語が複数カテゴリに属しうる）
+        self._term_categories: List[Tuple[str, ...]] = [
+            tuple(dict.fromkeys(category for category, _ in ranks)) for ranks in tables.term_ranks
+        ]
+        self._automaton = tables.automaton
+
+    @property
+    def snapshot(self) -> "LexiconSnapshot":
+        return self
+
+    def find_all(self, text: str) -> List[LexiconHit]:
+        """テキストを 1 回走査し、全カテゴリの全出現をオフセット付きで返す。"""
+        hits: List[LexiconHit] = []
+        if not text:
+            return hits
+        term_categories = self._term_categories
+        patterns = self._automaton.patterns
+        for start, end, pid in self._automaton.iter_matches(text):
+            term = patterns[pid]
+            for category in term_categories[pid]:
+                hits.append(LexiconHit(category, term, start, end))
+        return hits
+
+    def hits(self, analyzed) -> List[LexiconHit]:
+        """解析済みテキストの照合結果（AnalyzedText.cache に保持し再利用する）。"""
+        key = f"lexicon_hits:{self.index_key}"
+        cached = analyzed.cache.get(key)
+        if cached is None:
+            cached = self.find_all(analyzed.text)
+            analyzed.cache[key] = cached
+        return cached
+
+    def sentence_hits(self, analyzed) -> List[Dict[str, List[LexiconHit]]]:
+        """文ごとに {カテゴリ: [文内に完全に収まる照合]} を返す。
+
+        各文について `term in sentence` と同じ判定になるよう、文境界をまたぐ照合は除外する。
+        """
+        key = f"sentence_hits:{self.index_key}"
+        cached = analyzed.cache.get(key)
+        if cached is not None:
+            return cached
+        spans: Sequence[Tuple[int, int]] = analyzed.sentence_spans
+        starts = [s for s, _ in spans]
+        per_sentence: List[Dict[str, List[LexiconHit]]] = [{} for _ in spans]
+        for hit in self.hits(analyzed):
+            idx = bisect_right(starts, hit.start) - 1
+            if idx < 0 or hit.end > spans[idx][1]:
+                continue
+            per_sentence[idx].setdefault(hit.category, []).append(hit)
+        analyzed.cache[key] = per_sentence
+        return per_sentence
 
     def match(self, sentence: str):
         """
         Match lexicon categories against the given sentence.
         Returns a dict: {category_name: [matched_strings]}
         """
+        matched: Dict[str, set] = {}
+        for _, _, pid in self._automaton.iter_matches(sentence or ""):
+            for category, rank in self._term_ranks[pid]:
+                matched.setdefault(category, set()).add(rank)
         results = {}
         for category, terms in self.lexicons.items():
-            matches = []
-            for term in terms:
-                if re.search(re.escape(term), sentence):
-                    matches.append(term)
-            results[category] = matches
+            # 辞書内の記載順で返す
+            results[category] = [terms[rank] for rank in sorted(matched.get(category, ()))]
         return results
+
+class LexiconMatcher:
+    """辞書照合器。辞書ファイルの更新を再起動なしで取り込める。
+
+    照合は現在の LexiconSnapshot に委譲する。reload() は新しい索引を構築してから
+    参照を差し替えるだけなので、照合中の呼び出しを止めない。watch() でファイル更新を
+    監視し、変更があればバックグラウンドスレッドで reload() する。
+
+    Args:
+        lexicon_path: YAML 辞書のパス
+        use_compiled: コンパイル済み辞書（.lexc）が新しければそれを使う
+    """
+
+    def __init__(self, lexicon_path: str, use_compiled: bool = True):
+        self.lexicon_path = lexicon_path
+        self.use_compiled = use_compiled
+        # コンパイル済み辞書（.lexc）が新しければそれを、なければ YAML を読み込む
+        self._snapshot = LexiconSnapshot(load_lexicon_tables(lexicon_path, use_artifact=use_compiled))
+        self._reload_lock = threading.Lock()
+        self._watch_stop: Optional[threading.Event] = None
+        self.watch_interval: Optional[float] = None
+        self.reloads = 0
+
+    @property
+    def snapshot(self) -> LexiconSnapshot:
+        """現在のスナップショット（1 要求・1 バッチの間はこれを保持して使う）。"""
+        return self._snapshot
+
+    @property
+    def lexicons(self) -> Dict[str, List[str]]:
+        return self._snapshot.lexicons
+
+    @property
+    def categories(self) -> Tuple[str, ...]:
+        return self._snapshot.categories
+
+    @property
+    def content_hash(self) -> str:
+        return self._snapshot.content_hash
+
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+
+    @property
+    def source(self) -> str:
+        return self._snapshot.source
+
+    @property
+    def index_key(self) -> str:
+        return self._snapshot.index_key
+
+    def find_all(self, text: str) -> List[LexiconHit]:
+        return self._snapshot.find_all(text)
+
+    def hits(self, analyzed) -> List[LexiconHit]:
+        return self._snapshot.hits(analyzed)
+
+    def sentence_hits(self, analyzed) -> List[Dict[str, List[LexiconHit]]]:
+        return self._snapshot.sentence_hits(analyzed)
+
+    def match(self, sentence: str):
+        return self._snapshot.match(sentence)
+
+    # --- 辞書の更新 ---------------------------------------------------------
+
+    def reload(self, force: bool = False) -> bool:
+        """辞書ファイルを読み直し、内容が変わっていればスナップショットを差し替える。
+
+        新しい索引の構築中も、照合は古いスナップショットで継続する。
+
+        Args:
+            force: 内容ハッシュが同じでも再構築する
+
+        Returns:
+            bool: 差し替えた場合 True
+        """
+        with self._reload_lock:
+            if not force and content_hash(self.lexicon_path) == self._snapshot.content_hash:
+                return False
+            snapshot = LexiconSnapshot(load_lexicon_tables(self.lexicon_path, use_artifact=self.use_compiled))
+            # 参照の代入は不可分のため、照合側にロックは不要
+            self._snapshot = snapshot
+            self.reloads += 1
+            return True
+
+    def watch(self, interval: float = 5.0) -> None:
+        """辞書ファイルの更新（mtime・サイズの変化）を interval 秒ごとに確認し、自動で reload() する。"""
+        if self._watch_stop is not None:
+            return
+        stop = self._watch_stop = threading.Event()
+        self.watch_interval = interval
+
+        def file_state() -> Optional[Tuple[int, int]]:
+            try:
+                st = os.stat(self.lexicon_path)
+            except OSError:
+                return None
+            return st.st_mtime_ns, st.st_size
+
+        def run() -> None:
+            last = file_state()
+            while not stop.wait(interval):
+                state = file_state()
+                if state is None or state == last:
+                    continue
+                try:
+                    if self.reload():
+                        print(f"Lexicon reloaded: {self.lexicon_path} (version={self.version})", file=sys.stderr)
+                    last = state
+                except Exception as exc:  # 書き込み途中の YAML などは次回の確認で再試行する
+                    print(f"Failed to reload lexicon: {self.lexicon_path}: {exc}", file=sys.stderr)
+
+        threading.Thread(target=run, name="jaiml-lexicon-watch", daemon=True).start()
+
+    def stop_watching(self) -> None:
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+            self.watch_interval = None
@@ -0,0 +1,34 @@
+# src/model/jaiml_v3_3/scripts/compile_lexicon.py
+"""YAML 辞書をコンパイル済み辞書（.lexc）に変換する。
+
+    python -m scripts.compile_lexicon
+    python -m scripts.compile_lexicon --lexicon path/to/lexicons.yaml --output path/to/lexicons.lexc
+
+出力先を省略すると YAML と同じディレクトリに <stem>.lexc を書き出す。LexiconMatcher など
+辞書の読み込み側はこのパスを自動的に参照し、YAML の内容ハッシュが一致する場合のみ使用する。
+辞書を更新した後は再度実行すること（実行しなくても YAML からの読み込みで動作する）。
+"""
+import argparse
+import time
+
+from core.utils.paths import get_lexicon_path
+from lexicons.compiled import compile_lexicon, read_artifact
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compile the YAML lexicon into a memory-mappable artifact")
+    parser.add_argument("--lexicon", type=str, default=str(get_lexicon_path()), help="Source YAML lexicon")
+    parser.add_argument("--output", type=str, help="Output artifact path (default: <lexicon>.lexc)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    output = compile_lexicon(args.lexicon, args.output)
+    elapsed = (time.perf_counter() - start) * 1000.0
+    tables = read_artifact(output)
+    n_terms = sum(len(terms) for terms in tables.lexicons.values())
+    print(
+        f"Compiled lexicon saved: {output} "
+        f"(categories={len(tables.lexicons)}, terms={n_terms}, hash={tables.content_hash[:12]}, {elapsed:.0f} ms)"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# src/model/jaiml_v3_3/scripts/export_weights.py
+"""IngratiationModel の重みを NumPy バックエンド用の .npz に書き出す。
+
+    python -m scripts.export_weights --output model.npz
+    python -m scripts.export_weights --state-dict model.pt --output model.npz
+
+書き出した重みは run_inference / serve の --backend numpy --weights で読み込む
+（--backend torch --weights でも同じ重みを IngratiationModel に読み込める）。
+--state-dict を省略した場合は --seed で初期化した重みを書き出す。
+"""
+import argparse
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export IngratiationModel weights for the NumPy backend")
+    parser.add_argument("--state-dict", type=str, help="PyTorch state_dict (.pt) to export")
+    parser.add_argument("--seed", type=int, default=0, help="Initialization seed when --state-dict is omitted")
+    parser.add_argument("--output", type=str, required=True, help="Output weights path (.npz)")
+    args = parser.parse_args()
+
+    import torch
+    from core.classifier.ingratiation_model import IngratiationModel
+
+    torch.manual_seed(args.seed)
+    model = IngratiationModel()
+    if args.state_dict:
+        model.load_state_dict(torch.load(args.state_dict, map_location="cpu"))
+    model.export_weights(args.output)
+    print(f"Model weights saved: {args.output}")
+
+if __name__ == "__main__":
+    main()
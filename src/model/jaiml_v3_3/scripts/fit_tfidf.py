@@ -0,0 +1,40 @@
+# src/model/jaiml_v3_3/scripts/fit_tfidf.py
+"""参照対話コーパスから tfidf_novelty 用の TF-IDF モデル（語彙・IDF）を学習する。
+
+    python -m scripts.fit_tfidf --corpus data/dev.jsonl --output models/tfidf.npz
+
+入力は run_inference と同じ {"user": ..., "response": ...} 形式の JSONL で、
+発話・応答をそれぞれ 1 文書として扱う。
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Iterator, List
+
+from core.features.corpus_based import TFIDFNoveltyCalculator
+
+def iter_documents(paths: List[Path]) -> Iterator[str]:
+    for path in paths:
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                for key in ("user", "response"):
+                    if record.get(key):
+                        yield record[key]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fit the TF-IDF model used by tfidf_novelty")
+    parser.add_argument("--corpus", type=str, nargs="+", required=True, help="Reference dialogue JSONL file(s)")
+    parser.add_argument("--output", type=str, required=True, help="Output model path (.npz)")
+    args = parser.parse_args()
+
+    calc = TFIDFNoveltyCalculator().fit(iter_documents([Path(p) for p in args.corpus]))
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output = calc.save(output)
+    print(f"TF-IDF model saved: {output} (vocabulary={len(calc.vocabulary)}, fingerprint={calc.fingerprint})")
+
+if __name__ == "__main__":
+    main()
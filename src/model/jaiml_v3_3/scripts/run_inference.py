@@ -1,14 +1,26 @@
 # src/model/jaiml_v3_2/scripts/run_inference.py
 import argparse
+import importlib.util
 import json
+import multiprocessing as mp
+import os
 import time
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
-from core.utils.paths import get_lexicon_path
+from typing import BinaryIO, Callable, Dict, Any, Iterator, List, Optional, Sequence, Tuple, Union, TYPE_CHECKING
 
-import torch
+import numpy as np
+from core.utils.paths import get_lexicon_path
 
-from core.features.semantic import semantic_congruence
+from core.features.semantic import (
+    semantic_congruence,
+    semantic_congruence_batch,
+    set_embedding_cache,
+    get_embedding_cache,
+    DEFAULT_BATCH_SIZE,
+    MODEL_NAME,
+)
 from core.features.lexical import (
     sentiment_emphasis_score,
     user_repetition_ratio,
@@ -23,93 +35,328 @@ from core.features.syntactic import (
     assertiveness_score,
     ai_subject_ratio,
 )
+from core.features.hit_matrix import hit_matrix, lexicon_features_batch
 # corpus_based から直接インポート（モジュール構成の整理）
 from core.features.corpus_based import TFIDFNoveltyCalculator
-from core.classifier.ingratiation_model import IngratiationModel
-from core.utils.metrics import compute_confidence
+from core.features.incremental import DEFAULT_EMBED_INTERVAL, IncrementalFeatures
+from core.classifier.numpy_backend import NumpyIngratiationModel, features_to_array
+from core.classifier.schema import CATEGORIES
+from core.utils import resources
+from core.utils.metrics import compute_confidence, confidence_from_variance
+from core.utils.embedding_cache import DEFAULT_CAPACITY, EmbeddingCache
+from core.utils.feature_cache import TOKENIZER_FEATURES, FeatureCache, pair_key
+from core.utils.result_writer import OUTPUT_FORMATS, ResultWriter, encode_results
+from core.utils.timing import TimingAggregator, elapsed_ms
+from core.utils.windowing import DEFAULT_WINDOW_CHARS, MIN_WINDOW_CHARS, split_windows
+from core.utils.analysis import AnalyzedText, TextLike, analyze, as_analyzed
+from core.utils.batch_input import InputPosition, RejectsWriter, open_input, skip_input
+from core.utils.checkpoint import Checkpointer, checkpoint_path, load_checkpoint
 from lexicons.matcher import LexiconMatcher
 
+# torch / IngratiationModel は初回使用時に読み込む（--help や辞書系ツールの起動を軽くするため）
+if TYPE_CHECKING:
+    import torch
+    from core.classifier.ingratiation_model import IngratiationModel
+
+# MCDropout 推論に使うモデル（torch 版または NumPy 版）
+ScoringModel = Union["IngratiationModel", NumpyIngratiationModel]
+
+BACKENDS = ("torch", "numpy")
+
+# 不確実性推定の方式: MCDropout サンプリング（固定回数 / 分散の収束まで）/ Dropout 下の出力モーメントの解析的計算
+UNCERTAINTY_MODES = ("sampling", "adaptive", "analytic")
+
+@dataclass(frozen=True)
+class SamplingConfig:
+    """MCDropout のサンプル数の設定。
+
+    Attributes:
+        n_samples: uncertainty="sampling" のサンプル数
+        min_samples: uncertainty="adaptive" のサンプル数の下限
+        max_samples: uncertainty="adaptive" のサンプル数の上限
+        block_size: uncertainty="adaptive" で min_samples 以降に 1 回で追加するサンプル数
+        tolerance: uncertainty="adaptive" の停止条件。平均分散（= 1 − 信頼度）の推定値の
+            標準誤差がこの値以下になったペアはサンプリングを打ち切る
+    """
+    n_samples: int = 20
+    min_samples: int = 8
+    max_samples: int = 64
+    block_size: int = 4
+    tolerance: float = 1e-4
+
+DEFAULT_SAMPLING = SamplingConfig()
+
+# バックエンドごとに起動時に読み込むリソース（numpy では torch を読み込まない。
+# SimCSE は埋め込みキャッシュに当たらなかった場合にのみ初回使用時に読み込む）
+WARMUP_RESOURCES: Dict[str, Tuple[str, ...]] = {
+    "torch": ("fugashi", "simcse", "torch", "sklearn_tfidf"),
+    "numpy": ("fugashi", "sklearn_tfidf"),
+}
+
+def load_model(backend: str = "torch", weights: Optional[str] = None) -> ScoringModel:
+    """推論モデルを構築する。
+
+    Args:
+        backend: "torch"（IngratiationModel）または "numpy"（NumpyIngratiationModel、torch 不要）
+        weights: IngratiationModel.export_weights() / scripts.export_weights で書き出した重み (.npz)。
+            省略時は初期化直後の重みを用いる
+    """
+    if backend == "numpy":
+        return NumpyIngratiationModel.load(weights) if weights else NumpyIngratiationModel.random()
+    if backend != "torch":
+        raise ValueError(f"Unknown backend: {backend}")
+    from core.classifier.ingratiation_model import IngratiationModel
+    model = IngratiationModel()
+    if weights:
+        model.load_weights(weights)
+    return model
+
+def _model_spec(model: ScoringModel) -> Tuple[str, Dict[str, Any]]:
+    """ワーカープロセスへ渡すモデルの種類と重み（pickle 可能）。"""
+    if isinstance(model, NumpyIngratiationModel):
+        return "numpy", model.arrays()
+    return "torch", model.state_dict()
+
+def _restore_model(backend: str, state: Dict[str, Any]) -> ScoringModel:
+    if backend == "numpy":
+        return NumpyIngratiationModel(**state)
+    import torch
+    from core.classifier.ingratiation_model import IngratiationModel
+    # プロセス数 × スレッド数の過剰並列を避ける
+    torch.set_num_threads(1)
+    model = IngratiationModel()
+    model.load_state_dict(state)
+    return model
+
 # --- 入力検証 -------------------------------------------------------------
 
-def validate(text: str) -> None:
+# 1 テキストの最大文字数（これを超える応答は inference_documents で窓に分割して採点する）
+MAX_INPUT_CHARS = 10000
+
+def validate(text: str, max_chars: Optional[int] = MAX_INPUT_CHARS) -> None:
+    """入力テキストの長さを検証する。max_chars=None の場合は上限を設けない。"""
     if text == "":
         raise ValueError("Empty input text")
-    if len(text) < 5:
-        raise ValueError("Input too short (min 5 chars)")
-    if len(text) > 10000:
-        raise ValueError("Input too long (max 10000 chars)")
+    if len(text) < MIN_WINDOW_CHARS:
+        raise ValueError(f"Input too short (min {MIN_WINDOW_CHARS} chars)")
+    if max_chars is not None and len(text) > max_chars:
+        raise ValueError(f"Input too long (max {max_chars} chars)")
 
 # --- 特徴量抽出 -----------------------------------------------------------
 
-def extract_features(user: str, resp: str, matcher: LexiconMatcher, tfidf_calc: TFIDFNoveltyCalculator) -> Dict[str, float]:
+# 特徴量名 → 抽出関数 (user, resp, matcher, tfidf_calc)。辞書の順序が出力の特徴量順となる。
+FEATURE_FUNCS: Dict[str, Callable[[AnalyzedText, AnalyzedText, LexiconMatcher, TFIDFNoveltyCalculator], float]] = {
+    "semantic_congruence": lambda u, r, m, t: semantic_congruence(u, r),
+    "sentiment_emphasis_score": lambda u, r, m, t: sentiment_emphasis_score(r, m),
+    "user_repetition_ratio": lambda u, r, m, t: user_repetition_ratio(u, r),
+    "modal_expression_ratio": lambda u, r, m, t: modal_expression_ratio(r, m),
+    "response_dependency": lambda u, r, m, t: response_dependency(u, r),  # 修正版を使用
+    "assertiveness_score": lambda u, r, m, t: assertiveness_score(r, m),
+    "lexical_diversity_inverse": lambda u, r, m, t: lexical_diversity_inverse(r),
+    "template_match_rate": lambda u, r, m, t: template_match_rate(r, m),
+    "tfidf_novelty": lambda u, r, m, t: t.compute(u, r),  # corpus_basedから直接使用
+    "self_ref_pos_score": lambda u, r, m, t: self_ref_pos_score(r, m),
+    "ai_subject_ratio": lambda u, r, m, t: ai_subject_ratio(r, m),
+    "self_promotion_intensity": lambda u, r, m, t: self_promotion_intensity(r, m),
+}
+
+# inference_batch で lexicon_features_batch によりまとめて計算する特徴量
+LEXICON_BATCH_FEATURES = (
+    "modal_expression_ratio",
+    "assertiveness_score",
+    "template_match_rate",
+    "self_ref_pos_score",
+    "ai_subject_ratio",
+    "self_promotion_intensity",
+)
+
+def extract_features(user: TextLike, resp: TextLike, matcher: LexiconMatcher, tfidf_calc: TFIDFNoveltyCalculator,
+                     precomputed: Optional[Dict[str, float]] = None,
+                     timings: Optional[Dict[str, float]] = None) -> Dict[str, float]:
     """
     12次元特徴ベクトルを抽出する。
+    形態素解析・文分割はテキストごとに一度だけ行い、解析結果 (AnalyzedText) を全特徴量で共有する。
     tfidf_noveltyはcorpus_basedモジュールのTFIDFNoveltyCalculatorを使用。
+    precomputed に含まれる特徴量（バッチ計算済み・キャッシュ済みのもの）は再計算せず、
+    形態素に依存する特徴量がすべて含まれる場合は形態素解析も行わない。
+    辞書は呼び出し時点のスナップショットに固定し、途中で更新されても全特徴量で同じ版を用いる。
+    timings を渡した場合は、形態素解析と各特徴量の所要時間 [ms] を記録する。
     """
-    feats: Dict[str, float] = {
-        "semantic_congruence": semantic_congruence(user, resp),
-        "sentiment_emphasis_score": sentiment_emphasis_score(resp, matcher),
-        "user_repetition_ratio": user_repetition_ratio(user, resp),
-        "modal_expression_ratio": modal_expression_ratio(resp, matcher),
-        "response_dependency": response_dependency(user, resp),  # 修正版を使用
-        "assertiveness_score": assertiveness_score(resp, matcher),
-        "lexical_diversity_inverse": lexical_diversity_inverse(resp),
-        "template_match_rate": template_match_rate(resp, matcher),
-        "tfidf_novelty": tfidf_calc.compute(user, resp),  # corpus_basedから直接使用
-        "self_ref_pos_score": self_ref_pos_score(resp, matcher),
-        "ai_subject_ratio": ai_subject_ratio(resp, matcher),
-        "self_promotion_intensity": self_promotion_intensity(resp, matcher),
-    }
+    lexicon = matcher.snapshot
+    pre = precomputed or {}
+    prepare = analyze if any(name not in pre for name in TOKENIZER_FEATURES) else as_analyzed
+    if timings is None:
+        user_a = prepare(user)
+        resp_a = prepare(resp)
+        return {
+            name: pre[name] if name in pre else func(user_a, resp_a, lexicon, tfidf_calc)
+            for name, func in FEATURE_FUNCS.items()
+        }
+
+    t0 = time.perf_counter()
+    user_a = prepare(user)
+    resp_a = prepare(resp)
+    if prepare is analyze:
+        timings["tokenize"] = timings.get("tokenize", 0.0) + elapsed_ms(t0)
+    feats: Dict[str, float] = {}
+    for name, func in FEATURE_FUNCS.items():
+        if name in pre:
+            feats[name] = pre[name]
+            continue
+        t0 = time.perf_counter()
+        feats[name] = func(user_a, resp_a, lexicon, tfidf_calc)
+        timings[f"feature.{name}"] = elapsed_ms(t0)
     return feats
 
 # --- MCDropoutサンプリング ------------------------------------------------
 
-def sample_with_dropout(model: IngratiationModel, features: Dict[str, float], n_samples: int = 20) -> Tuple[Dict[str, float], float]:
+def _mc_forward(model: ScoringModel, features_list: Sequence[Dict[str, float]],
+                n_samples: int) -> Union["torch.Tensor", "np.ndarray"]:
+    """B ペア × N サンプルの MCDropout 推論を 1 回の forward で行い、shape (B, N, 4) を返す。
+
+    NumpyIngratiationModel の場合は torch を使わずに計算し、np.ndarray を返す。
+    """
+    return _mc_forward_matrix(model, features_to_array(features_list), n_samples)
+
+def _mc_forward_matrix(model: ScoringModel, x: np.ndarray, n_samples: int) -> Union["torch.Tensor", "np.ndarray"]:
+    """_mc_forward の特徴量行列 (B, 12) 版。"""
+    if isinstance(model, NumpyIngratiationModel):
+        return model.mc_forward(x, n_samples)
+    import torch
+    # モデルを訓練モードに設定（Dropoutを有効化するため）
+    # 注：通常の推論では model.eval() を使用するが、
+    # MCDropoutでは意図的に model.train() を使用する
+    model.train()
+    # 特徴量行列 (B, 12) をサンプル次元に複製して (B*N, 12) とする
+    x = torch.from_numpy(x).repeat_interleave(n_samples, dim=0)
+    with torch.no_grad():
+        out = model.forward_matrix(x)  # 行ごとに独立した Dropout マスク
+    return out.view(-1, n_samples, 4)
+
+def _summarize_samples(score_samples: Union["torch.Tensor", "np.ndarray"]) -> Tuple[Dict[str, float], float]:
+    """サンプル行列 (N, 4) から平均スコアと信頼度を求める。"""
+    # 信頼度計算（分散が小さいほど信頼度が高い）
+    confidence = compute_confidence(score_samples)
+    # 平均を最終スコアとする
+    mean_scores = score_samples.mean(0).tolist()
+    scores = {cat: float(v) for cat, v in zip(CATEGORIES, mean_scores)}
+    return scores, confidence
+
+def sample_with_dropout(model: ScoringModel, features: Dict[str, float], n_samples: int = 20) -> Tuple[Dict[str, float], float]:
     """MCDropoutによる不確実性推定を行う。
     
     モデルを訓練モードに設定し、Dropoutを有効化した状態で複数回推論を行うことで、
     予測の不確実性を推定する。これはBayesian近似の一種である。
+    入力をサンプル次元に複製し、n_samples 回分を 1 回の forward で計算する。
     
     Args:
-        model: IngratiationModel インスタンス
+        model: IngratiationModel または NumpyIngratiationModel インスタンス
         features: 特徴量辞書
         n_samples: サンプリング回数（デフォルト20回）
         
     Returns:
         Tuple[Dict[str, float], float]: 平均スコアと信頼度
     """
-    # モデルを訓練モードに設定（Dropoutを有効化するため）
-    # 注：通常の推論では model.eval() を使用するが、
-    # MCDropoutでは意図的に model.train() を使用する
-    model.train()
-    
-    samples = []
-    for _ in range(n_samples):
-        # Dropout有効状態で推論
-        out = model(features)
-        samples.append(torch.tensor([
-            out["social"], 
-            out["avoidant"], 
-            out["mechanical"], 
-            out["self"]
-        ]))
-    
-    # サンプルをスタック (shape: [n_samples, 4])
-    score_samples = torch.stack(samples)
-    
-    # 信頼度計算（分散が小さいほど信頼度が高い）
-    confidence = compute_confidence(score_samples)
-    
-    # 平均を最終スコアとする
-    mean_scores = torch.mean(score_samples, dim=0)
-    scores = {
-        "social": float(mean_scores[0]),
-        "avoidant": float(mean_scores[1]),
-        "mechanical": float(mean_scores[2]),
-        "self": float(mean_scores[3]),
-    }
-    
-    return scores, confidence
+    # サンプル行列 (shape: [n_samples, 4])
+    score_samples = _mc_forward(model, [features], n_samples)[0]
+    return _summarize_samples(score_samples)
+
+def sample_with_dropout_batch(model: ScoringModel, features_list: Sequence[Dict[str, float]],
+                              n_samples: int = 20) -> List[Tuple[Dict[str, float], float]]:
+    """sample_with_dropout のバッチ版。B ペア × N サンプルを 1 回の forward で計算する。
+
+    Returns:
+        List[Tuple[Dict[str, float], float]]: 入力順の (平均スコア, 信頼度)
+    """
+    if not features_list:
+        return []
+    score_samples = _mc_forward(model, features_list, n_samples)
+    return [_summarize_samples(score_samples[b]) for b in range(score_samples.shape[0])]
+
+def adaptive_sample_batch(model: ScoringModel, features_list: Sequence[Dict[str, float]],
+                          config: SamplingConfig = DEFAULT_SAMPLING) -> List[Tuple[Dict[str, float], float, int]]:
+    """分散の推定値が収束するまで MCDropout サンプルを追加する適応的サンプリング。
+
+    min_samples 回のサンプルから始め、compute_confidence が用いる平均分散の推定値の
+    標準誤差 (√(Σ_h (m4_h − var_h²) / n) / 4、m4 は 4 次中心モーメント) が tolerance を
+    上回るペアについてのみ block_size 回ずつ forward を追加する。
+    出力がほぼ確定しているペアは早く打ち切られ、分散の大きいペアは max_samples まで追加される。
+
+    Returns:
+        List[Tuple[Dict[str, float], float, int]]: 入力順の (平均スコア, 信頼度, 使用サンプル数)
+    """
+    if not features_list:
+        return []
+    x = features_to_array(features_list)
+    n_pairs = len(features_list)
+    samples = np.empty((n_pairs, config.max_samples, len(CATEGORIES)), dtype=np.float32)
+    # 打ち切り時点の平均・分散・サンプル数
+    means = np.empty((n_pairs, len(CATEGORIES)))
+    variances = np.empty((n_pairs, len(CATEGORIES)))
+    counts = np.zeros(n_pairs, dtype=np.int64)
+    # 未収束のペア（常に同じサンプル数 n を持つ）
+    active = np.arange(n_pairs)
+    n = 0
+    while active.size:
+        k = min(config.block_size if n else config.min_samples, config.max_samples - n)
+        samples[active, n:n + k] = np.asarray(_mc_forward_matrix(model, x[active], k))
+        n += k
+        drawn = samples[active, :n].astype(np.float64)
+        mean = drawn.mean(axis=1)
+        dev = drawn - mean[:, None]
+        var = (dev ** 2).mean(axis=1)
+        m4 = (dev ** 4).mean(axis=1)
+        std_err = np.sqrt(np.maximum(m4 - var ** 2, 0.0).sum(axis=1) / n) / len(CATEGORIES)
+        done = (std_err <= config.tolerance) | (n >= config.max_samples)
+        stopped = active[done]
+        means[stopped], variances[stopped], counts[stopped] = mean[done], var[done], n
+        active = active[~done]
+    return [
+        ({cat: float(v) for cat, v in zip(CATEGORIES, mean)}, confidence_from_variance(var), int(count))
+        for mean, var, count in zip(means, variances, counts)
+    ]
+
+def analytic_uncertainty_batch(model: ScoringModel,
+                               features_list: Sequence[Dict[str, float]]) -> List[Tuple[Dict[str, float], float]]:
+    """MCDropout サンプリングの代わりに、Dropout 下の出力の平均・分散を 1 回の計算で求める。
+
+    平均をスコア、分散から compute_confidence と同じ 1 − 平均分散 を信頼度とする。
+    乱数を使わないため、同じ特徴量に対して常に同じ結果を返す。
+    分散はサンプル分散の推定値ではなく期待値であり、20 サンプルの不偏でない分散より
+    僅かに大きい（(N-1)/N 倍の差）。
+
+    Returns:
+        List[Tuple[Dict[str, float], float]]: 入力順の (平均スコア, 信頼度)
+    """
+    if not features_list:
+        return []
+    if isinstance(model, NumpyIngratiationModel):
+        means, variances = model.moments(features_to_array(features_list))
+    else:
+        import torch
+        from core.classifier.ingratiation_model import features_to_tensor
+        with torch.no_grad():
+            means, variances = (t.numpy() for t in model.forward_moments(features_to_tensor(features_list)))
+    return [
+        ({cat: float(v) for cat, v in zip(CATEGORIES, mean)}, confidence_from_variance(var))
+        for mean, var in zip(means, variances)
+    ]
+
+def estimate_scores_batch(model: ScoringModel, features_list: Sequence[Dict[str, float]],
+                          uncertainty: str = "sampling",
+                          sampling: SamplingConfig = DEFAULT_SAMPLING) -> List[Tuple[Dict[str, float], float, int]]:
+    """uncertainty に応じた方式で (平均スコア, 信頼度, 使用サンプル数) を求める。
+
+    使用サンプル数は解析的モードでは 0 とする。
+    """
+    if uncertainty == "analytic":
+        return [(scores, confidence, 0) for scores, confidence in analytic_uncertainty_batch(model, features_list)]
+    if uncertainty == "adaptive":
+        return adaptive_sample_batch(model, features_list, sampling)
+    if uncertainty != "sampling":
+        raise ValueError(f"Unknown uncertainty mode: {uncertainty}")
+    return [(scores, confidence, sampling.n_samples)
+            for scores, confidence in sample_with_dropout_batch(model, features_list, n_samples=sampling.n_samples)]
 
 # --- 主カテゴリ決定 -------------------------------------------------------
 
@@ -125,27 +372,24 @@ def decide_category(scores: Dict[str, float]) -> str:
 
 # --- 推論処理 -------------------------------------------------------------
 
-def inference_pair(user: str, resp: str, matcher: LexiconMatcher, model: IngratiationModel, tfidf_calc: TFIDFNoveltyCalculator) -> Dict[str, Any]:
-    validate(user)
-    validate(resp)
-    start = time.perf_counter()
-
-    # 特徴量抽出
-    feats = extract_features(user, resp, matcher, tfidf_calc)
-
-    # MCDropoutサンプリング（20回）
-    scores, confidence = sample_with_dropout(model, feats, n_samples=20)
-    
+def _build_result(user: str, resp: str, feats: Dict[str, float], scores: Dict[str, float],
+                  confidence: float, processing_ms: float, lexicon_version: str,
+                  timings: Optional[Dict[str, float]] = None, n_samples: Optional[int] = None) -> Dict[str, Any]:
     # 迎合指数と主カテゴリ決定
     idx = sum(scores.values()) / 4.0
     cat = decide_category(scores)
 
-    elapsed = (time.perf_counter() - start) * 1000.0
     meta = {
         "token_length": len(resp),  # 文字数を簡易トークン長とする。
         "confidence": confidence,
-        "processing_time_ms": int(elapsed),
+        "processing_time_ms": int(processing_ms),
+        "lexicon_version": lexicon_version,
     }
+    if n_samples is not None:
+        meta["n_samples"] = n_samples  # MCDropout のサンプル数（解析的モードでは 0）
+    if timings is not None:
+        timings["total"] = processing_ms
+        meta["timings"] = {name: round(ms, 3) for name, ms in timings.items()}
 
     return {
         "input": {"user": user, "response": resp},
@@ -156,41 +400,780 @@ def inference_pair(user: str, resp: str, matcher: LexiconMatcher, model: Ingrati
         "meta": meta,
     }
 
-# --- バッチ処理 -----------------------------------------------------------
+def inference_pair(user: str, resp: str, matcher: LexiconMatcher, model: ScoringModel, tfidf_calc: TFIDFNoveltyCalculator,
+                   timings: bool = False, uncertainty: str = "sampling",
+                   sampling: SamplingConfig = DEFAULT_SAMPLING) -> Dict[str, Any]:
+    """1 ペアを推論する。timings=True の場合は区間ごとの所要時間を meta.timings に出力する。
+
+    uncertainty="analytic" の場合は MCDropout サンプリングの代わりに解析的モードを、
+    "adaptive" の場合は分散が収束するまでサンプルを追加する適応的サンプリングを用いる。
+    """
+    validate(user)
+    validate(resp)
+    start = time.perf_counter()
+    # 辞書の更新中でも、この要求は開始時点の版で最後まで処理する
+    lexicon = matcher.snapshot
+    sections: Optional[Dict[str, float]] = {} if timings else None
+
+    # 特徴量抽出
+    feats = extract_features(user, resp, lexicon, tfidf_calc, timings=sections)
+
+    # MCDropoutサンプリング（既定 20 回）または解析的モード
+    t0 = time.perf_counter()
+    scores, confidence, n_samples = estimate_scores_batch(model, [feats], uncertainty, sampling)[0]
+    if sections is not None:
+        sections["mc_dropout"] = elapsed_ms(t0)
+
+    return _build_result(user, resp, feats, scores, confidence, elapsed_ms(start), lexicon.version, sections,
+                         n_samples=n_samples)
+
+def inference_batch(pairs: Sequence[Tuple[str, str]], matcher: LexiconMatcher, model: ScoringModel,
+                    tfidf_calc: TFIDFNoveltyCalculator, batch_size: int = DEFAULT_BATCH_SIZE,
+                    timings: bool = False, uncertainty: str = "sampling",
+                    sampling: SamplingConfig = DEFAULT_SAMPLING,
+                    feature_cache: Optional[FeatureCache] = None) -> List[Dict[str, Any]]:
+    """複数ペアをまとめて推論する。
+
+    semantic_congruence の SimCSE 符号化、tfidf_novelty、辞書系の文単位特徴量、
+    MCDropout サンプリングをバッチ化し、
+    残りの特徴量抽出はペアごとに行う。
+    各ペアの processing_time_ms にはバッチ処理時間の按分を含める。
+
+    バッチ内で同一の (ユーザー発話, AI応答) ペアは一度だけ採点し、結果を入力順に複製する。
+    同一テキストの解析結果（形態素・内容語集合・文字集合・辞書照合）と
+    SimCSE 埋め込み・TF-IDF ベクトルはバッチ内のペア間で共有する。
 
-def process_file(input_path: Path, output_path: Path, matcher: LexiconMatcher, model: IngratiationModel, tfidf_calc: TFIDFNoveltyCalculator) -> None:
-    with input_path.open("r", encoding="utf-8") as fin, output_path.open("w", encoding="utf-8") as fout:
-        for line in fin:
+    timings=True の場合は meta.timings に区間ごとの所要時間 [ms] を出力する。
+    ペア単位の区間（形態素解析・辞書走査・個別特徴量）は実測値、バッチ単位の区間
+    （SimCSE・TF-IDF・辞書系特徴量の集約・MCDropout）はペア数で按分した値とする。
+
+    feature_cache を渡した場合は、依存資源の指紋が一致するキャッシュ済みの特徴量を再利用し、
+    不足する特徴量のみを計算して書き戻す（分類器は常に適用し直す）。
+
+    Args:
+        pairs: (ユーザー発話, AI応答) の列
+        batch_size: SimCSE 符号化のミニバッチサイズ
+        timings: 区間ごとの所要時間を記録する
+        uncertainty: "sampling"（MCDropout 固定回数）、"adaptive"（分散の収束まで）、
+            "analytic"（出力モーメントの解析的計算）
+        sampling: MCDropout のサンプル数の設定
+        feature_cache: 特徴量の永続キャッシュ
+
+    Returns:
+        List[Dict[str, Any]]: 入力順の推論結果
+    """
+    for user, resp in pairs:
+        validate(user)
+        validate(resp)
+    if not pairs:
+        return []
+    start = time.perf_counter()
+    # 同一ペアを集約する（以降は重複のないペアについて処理する）
+    unique: Dict[Tuple[str, str], int] = {}
+    positions = [unique.setdefault((user, resp), len(unique)) for user, resp in pairs]
+    n_records = len(pairs)
+    pairs = list(unique)
+    # 辞書の更新中でも、このバッチは開始時点の版で最後まで処理する
+    lexicon = matcher.snapshot
+    # ペア単位の区間 [ms]（timings=False の場合は記録しない）
+    sections: List[Optional[Dict[str, float]]] = [{} if timings else None for _ in pairs]
+    # バッチ単位の区間 [ms]（ペア数で按分する）
+    shared: Dict[str, float] = {}
+
+    # キャッシュ済みの特徴量（指紋が一致するもののみ）
+    keys: List[str] = []
+    fingerprints: Dict[str, str] = {}
+    cached: List[Dict[str, float]] = [{} for _ in pairs]
+    if feature_cache is not None:
+        t0 = time.perf_counter()
+        keys = [pair_key(user, resp) for user, resp in pairs]
+        fingerprints = feature_cache.fingerprints(lexicon, MODEL_NAME, tfidf_calc)
+        cached = feature_cache.get_many(keys, fingerprints)
+        shared["feature_cache"] = elapsed_ms(t0)
+
+    def missing(names: Sequence[str]) -> List[int]:
+        return [i for i, feats in enumerate(cached) if any(name not in feats for name in names)]
+
+    # 形態素解析は、形態素に依存する特徴量がキャッシュにないペアについてのみ行う
+    pending = set(missing(list(FEATURE_FUNCS)))
+    lexicon_pending = set(missing(LEXICON_BATCH_FEATURES))
+    tokenize_pending = set(missing(TOKENIZER_FEATURES))
+    # テキスト → 解析結果（同じ発話を含むペア間で共有する）
+    texts: Dict[str, AnalyzedText] = {}
+
+    def shared_text(text: str) -> AnalyzedText:
+        analyzed_text = texts.get(text)
+        if analyzed_text is None:
+            analyzed_text = texts[text] = as_analyzed(text)
+        return analyzed_text
+
+    analyzed: List[Tuple[AnalyzedText, AnalyzedText]] = []
+    for i, ((user, resp), own) in enumerate(zip(pairs, sections)):
+        t0 = time.perf_counter()
+        user_a, resp_a = shared_text(user), shared_text(resp)
+        analyzed.append((user_a, resp_a))
+        if i in tokenize_pending:
+            analyze(user_a)
+            analyze(resp_a)
+            if own is not None:
+                own["tokenize"] = elapsed_ms(t0)
+        if own is not None and i in lexicon_pending:
+            # 辞書走査（照合行列の構築）は辞書系特徴量の集約と分けて計測する
+            t0 = time.perf_counter()
+            hit_matrix(analyzed[-1][1], lexicon)
+            own["lexicon_scan"] = elapsed_ms(t0)
+
+    # バッチ計算する特徴量は、キャッシュにないペアだけを対象とする
+    precomputed: List[Dict[str, float]] = [dict(feats) for feats in cached]
+    todo = missing(["semantic_congruence"])
+    if todo:
+        t0 = time.perf_counter()
+        semantics = semantic_congruence_batch([analyzed[i][0] for i in todo], [analyzed[i][1] for i in todo],
+                                              batch_size=batch_size)
+        shared["feature.semantic_congruence"] = elapsed_ms(t0)
+        for i, value in zip(todo, semantics):
+            precomputed[i]["semantic_congruence"] = value
+    todo = missing(["tfidf_novelty"])
+    if todo:
+        t0 = time.perf_counter()
+        novelties = tfidf_calc.compute_batch([analyzed[i] for i in todo])
+        shared["feature.tfidf_novelty"] = elapsed_ms(t0)
+        for i, value in zip(todo, novelties):
+            precomputed[i]["tfidf_novelty"] = value
+    # 辞書系特徴量は 文 × カテゴリ 照合行列を連結してまとめて集約する
+    todo = sorted(lexicon_pending)
+    if todo:
+        t0 = time.perf_counter()
+        lexicon_feats = lexicon_features_batch([analyzed[i][1] for i in todo], lexicon)
+        lexicon_ms = elapsed_ms(t0)
+        for name, values in lexicon_feats.items():
+            shared[f"feature.{name}"] = lexicon_ms / len(lexicon_feats)
+            for i, value in zip(todo, values):
+                precomputed[i].setdefault(name, float(value))
+    shared_ms = elapsed_ms(start)
+
+    feats_list: List[Dict[str, float]] = []
+    feature_ms: List[float] = []
+    for i, (user_a, resp_a) in enumerate(analyzed):
+        t0 = time.perf_counter()
+        if i not in pending:
+            feats_list.append({name: precomputed[i][name] for name in FEATURE_FUNCS})
+            feature_ms.append(elapsed_ms(t0))
+            continue
+        feats_list.append(extract_features(user_a, resp_a, lexicon, tfidf_calc, precomputed=precomputed[i],
+                                           timings=sections[i]))
+        feature_ms.append(elapsed_ms(t0))
+
+    if feature_cache is not None:
+        t0 = time.perf_counter()
+        feature_cache.put_many(
+            keys,
+            [{name: value for name, value in feats.items() if name not in hit}
+             for feats, hit in zip(feats_list, cached)],
+            fingerprints,
+        )
+        shared["feature_cache"] += elapsed_ms(t0)
+        shared_ms += elapsed_ms(t0)
+
+    # MCDropoutサンプリング（B ペア × 20 回を一括）または解析的モード
+    t0 = time.perf_counter()
+    sampled = estimate_scores_batch(model, feats_list, uncertainty, sampling)
+    shared["mc_dropout"] = elapsed_ms(t0)
+    shared_ms += shared["mc_dropout"]
+    shared_ms /= n_records
+
+    for own in sections:
+        if own is not None:
+            own.update({name: ms / n_records for name, ms in shared.items()})
+    # 入力順に展開する（重複ペアには別の dict を割り当て、結果間で共有しない）
+    results: List[Dict[str, Any]] = []
+    for j in positions:
+        user, resp = pairs[j]
+        scores, confidence, n_samples = sampled[j]
+        own = sections[j]
+        results.append(_build_result(user, resp, dict(feats_list[j]), dict(scores), confidence,
+                                     feature_ms[j] + shared_ms, lexicon.version, None if own is None else dict(own),
+                                     n_samples=n_samples))
+    return results
+
+# --- 応答候補の順位付け ---------------------------------------------------
+
+# 順位付けの基準: 迎合指数（index）またはカテゴリ別の soft score
+RANK_KEYS = ("index",) + CATEGORIES
+
+def rank_responses(user: str, responses: Sequence[str], matcher: LexiconMatcher, model: ScoringModel,
+                   tfidf_calc: TFIDFNoveltyCalculator, by: str = "index", descending: bool = False,
+                   batch_size: int = DEFAULT_BATCH_SIZE, timings: bool = False, uncertainty: str = "sampling",
+                   sampling: SamplingConfig = DEFAULT_SAMPLING) -> List[Dict[str, Any]]:
+    """1 つのユーザー発話に対する N 件の応答候補を採点し、順位順に返す。
+
+    全候補を 1 回の inference_batch で処理するため、ユーザー発話の形態素解析・SimCSE 符号化・
+    TF-IDF 変換は 1 回で済み、応答は一括で符号化され、分類器は (N, 12) 行列に 1 回適用される。
+
+    Args:
+        user: ユーザー発話
+        responses: 応答候補の列
+        by: 順位付けの基準（"index" または CATEGORIES のいずれか）
+        descending: True なら基準値の大きい順（既定は迎合の小さい候補から）
+        batch_size: SimCSE 符号化のミニバッチサイズ
+
+    Returns:
+        List[Dict[str, Any]]: 推論結果に rank（1 始まり）と candidate（入力での位置）を加えたもの。
+            基準値が同じ候補は入力順に並ぶ。
+    """
+    if by not in RANK_KEYS:
+        raise ValueError(f"Unknown ranking key: {by}")
+    results = inference_batch([(user, resp) for resp in responses], matcher, model, tfidf_calc,
+                              batch_size=batch_size, timings=timings, uncertainty=uncertainty, sampling=sampling)
+
+    def key(i: int) -> float:
+        value = results[i]["index"] if by == "index" else results[i]["scores"][by]
+        return -value if descending else value
+
+    ranked: List[Dict[str, Any]] = []
+    for rank, i in enumerate(sorted(range(len(results)), key=key), start=1):
+        results[i]["rank"] = rank
+        results[i]["candidate"] = i
+        ranked.append(results[i])
+    return ranked
+
+def _read_responses(path: Path) -> List[str]:
+    """応答候補ファイル（1 行 1 候補の JSON Lines。文字列または "response" を持つオブジェクト）を読む。"""
+    responses: List[str] = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
             if not line.strip():
                 continue
             record = json.loads(line)
-            result = inference_pair(record["user"], record["response"], matcher, model, tfidf_calc)
-            fout.write(json.dumps(result, ensure_ascii=False) + "\n")
+            responses.append(record if isinstance(record, str) else record["response"])
+    return responses
+
+# --- 長文応答の窓分割採点 -------------------------------------------------
+
+def _aggregate_windows(user: str, resp: str, offsets: Sequence[int],
+                       windows: Sequence[Dict[str, Any]], window_chars: int) -> Dict[str, Any]:
+    """窓ごとの推論結果を、窓の文字数で重み付けした平均により文書単位の結果にまとめる。"""
+    weights = np.array([window["meta"]["token_length"] for window in windows], dtype=np.float64)
+    weights /= weights.sum()
+
+    def mean(values: Iterator[float]) -> float:
+        return float(np.dot(weights, np.fromiter(values, dtype=np.float64, count=len(windows))))
+
+    feats = {name: mean(window["features"][name] for window in windows) for name in FEATURE_FUNCS}
+    scores = {cat: mean(window["scores"][cat] for window in windows) for cat in CATEGORIES}
+    confidence = mean(window["meta"]["confidence"] for window in windows)
+    processing_ms = sum(window["meta"]["processing_time_ms"] for window in windows)
+    n_samples = None
+    if "n_samples" in windows[0]["meta"]:
+        n_samples = sum(window["meta"]["n_samples"] for window in windows)
+    sections: Optional[Dict[str, float]] = None
+    if "timings" in windows[0]["meta"]:
+        sections = {}
+        for window in windows:
+            for name, ms in window["meta"]["timings"].items():
+                if name != "total":
+                    sections[name] = sections.get(name, 0.0) + ms
+    result = _build_result(user, resp, feats, scores, confidence, processing_ms, windows[0]["meta"]["lexicon_version"],
+                           sections, n_samples=n_samples)
+    result["meta"]["window_chars"] = window_chars
+    result["windows"] = [
+        {
+            "offset": offset,
+            "length": window["meta"]["token_length"],
+            "scores": window["scores"],
+            "index": window["index"],
+            "predicted_category": window["predicted_category"],
+            "confidence": window["meta"]["confidence"],
+            "features": window["features"],
+        }
+        for offset, window in zip(offsets, windows)
+    ]
+    return result
+
+def inference_documents(pairs: Sequence[Tuple[str, str]], matcher: LexiconMatcher, model: ScoringModel,
+                        tfidf_calc: TFIDFNoveltyCalculator, window_chars: int = DEFAULT_WINDOW_CHARS,
+                        batch_size: int = DEFAULT_BATCH_SIZE, timings: bool = False, uncertainty: str = "sampling",
+                        sampling: SamplingConfig = DEFAULT_SAMPLING,
+                        feature_cache: Optional[FeatureCache] = None) -> List[Dict[str, Any]]:
+    """長文応答を文単位の窓に分割して採点する（応答の長さの上限を設けない）。
+
+    window_chars 文字を超える応答は split_windows で窓に分割し、全ペアの窓を 1 回の
+    inference_batch でまとめて採点する。ユーザー発話の解析・SimCSE 符号化は窓の間で共有される。
+    窓ごとの 1 回の処理量は window_chars で抑えられ、SimCSE の最大系列長による切り捨ても起きない。
+
+    文書単位の特徴量・スコア・信頼度は窓の文字数で重み付けした平均とし、迎合指数と主カテゴリは
+    そのスコアから求める。窓ごとの結果は "windows"（offset・length・scores・index・
+    predicted_category・confidence・features）に、meta.n_samples は全窓の合計とする。
+    window_chars 以下の応答の結果は inference_batch と同じである。
+
+    Args:
+        pairs: (ユーザー発話, AI応答) の列
+        window_chars: 窓の最大文字数
+        その他の引数は inference_batch と同じ
+
+    Returns:
+        List[Dict[str, Any]]: 入力順の推論結果
+    """
+    if window_chars > MAX_INPUT_CHARS:
+        raise ValueError(f"window_chars must be <= {MAX_INPUT_CHARS}")
+    flat: List[Tuple[str, str]] = []
+    spans: List[Tuple[int, List[int]]] = []
+    for user, resp in pairs:
+        validate(user)
+        validate(resp, max_chars=None)
+        windows = split_windows(resp, window_chars) if len(resp) > window_chars else [(0, resp)]
+        spans.append((len(flat), [offset for offset, _ in windows]))
+        flat.extend((user, window) for _, window in windows)
+    results = inference_batch(flat, matcher, model, tfidf_calc, batch_size=batch_size, timings=timings,
+                              uncertainty=uncertainty, sampling=sampling, feature_cache=feature_cache)
+    documents: List[Dict[str, Any]] = []
+    for (user, resp), (first, offsets) in zip(pairs, spans):
+        if len(offsets) == 1 and len(resp) <= window_chars:
+            documents.append(results[first])
+            continue
+        documents.append(_aggregate_windows(user, resp, offsets, results[first:first + len(offsets)], window_chars))
+    return documents
+
+# --- 生成途中の応答の逐次採点 ---------------------------------------------
+
+class StreamingScorer:
+    """生成途中の応答をチャンクの追加ごとに採点する。
+
+    特徴量は IncrementalFeatures で逐次更新し（追加分と未完の末尾文のみを解析する）、
+    semantic_congruence と tfidf_novelty は embed_interval 文字ごとに再計算する。分類器は更新のたびに適用する。
+
+    途中の結果の input には応答テキストを含めない（応答の長さは meta.streaming.chars）。
+    応答全体は finish() の結果にのみ含める。
+
+        scorer = StreamingScorer(user, matcher, model, tfidf_calc, uncertainty="analytic")
+        for chunk in stream:
+            result = scorer.append(chunk)
+        result = scorer.finish()
+
+    Args:
+        user: ユーザー発話
+        embed_interval: semantic_congruence と tfidf_novelty を再計算する間隔 [文字]（None なら finish() 時のみ）
+        uncertainty: 不確実性推定の方式（inference_pair と同じ）
+    """
+
+    def __init__(self, user: str, matcher: LexiconMatcher, model: ScoringModel, tfidf_calc: TFIDFNoveltyCalculator,
+                 embed_interval: Optional[int] = DEFAULT_EMBED_INTERVAL, batch_size: int = DEFAULT_BATCH_SIZE,
+                 uncertainty: str = "sampling", sampling: SamplingConfig = DEFAULT_SAMPLING):
+        validate(user)
+        self.user = user
+        self.model = model
+        self.uncertainty = uncertainty
+        self.sampling = sampling
+        self.state = IncrementalFeatures(user, matcher, tfidf_calc, embed_interval=embed_interval,
+                                         batch_size=batch_size)
+        self.elapsed_ms = 0.0
+
+    def append(self, chunk: str) -> Dict[str, Any]:
+        """チャンクを追加し、その時点の応答に対する推論結果を返す。"""
+        start = time.perf_counter()
+        self.state.append(chunk)
+        if self.state.refresh_due():
+            self.state.refresh()
+        return self._result(start, final=False)
+
+    def finish(self) -> Dict[str, Any]:
+        """応答の生成完了時に呼び出し、全特徴量を応答全体で確定させた推論結果を返す。"""
+        start = time.perf_counter()
+        text = self.state.text
+        validate(text)
+        if self.state.embedded_chars != len(self.state):
+            self.state.refresh()
+        return self._result(start, final=True, text=text)
+
+    def _result(self, start: float, final: bool, text: Optional[str] = None) -> Dict[str, Any]:
+        feats = self.state.features()
+        scores, confidence, n_samples = estimate_scores_batch(self.model, [feats], self.uncertainty, self.sampling)[0]
+        update_ms = elapsed_ms(start)
+        self.elapsed_ms += update_ms
+        result = _build_result(self.user, text or "", feats, scores, confidence, update_ms,
+                               self.state.lexicon.version, n_samples=n_samples)
+        if text is None:
+            # 更新のたびに応答全体を連結・出力しないよう、途中の結果は長さのみとする
+            result["input"] = {"user": self.user}
+            result["meta"]["token_length"] = len(self.state)
+        result["meta"]["streaming"] = {
+            "final": final,
+            "chars": len(self.state),
+            "embedded_chars": self.state.embedded_chars,
+            "total_ms": round(self.elapsed_ms, 3),
+        }
+        return result
+
+# --- バッチ処理 -----------------------------------------------------------
+
+# 入力チャンク: (レコード id の列, (user, response) ペアの列, チャンク末尾の入力位置)
+Chunk = Tuple[List[Any], List[Tuple[str, str]], InputPosition]
+
+# チェックポイントの既定の間隔 [レコード]
+DEFAULT_CHECKPOINT_EVERY = 10_000
+
+def _parse_record(line: bytes, max_response_chars: Optional[int]) -> Tuple[Dict[str, Any], str, str]:
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise TypeError("record must be a JSON object")
+    user, resp = record["user"], record["response"]
+    if not isinstance(user, str) or not isinstance(resp, str):
+        raise TypeError("user and response must be strings")
+    validate(user)
+    validate(resp, max_chars=max_response_chars)
+    return record, user, resp
+
+def _iter_chunks(fin: BinaryIO, chunk_size: int, position: InputPosition = InputPosition(),
+                 rejects: Optional[RejectsWriter] = None,
+                 max_response_chars: Optional[int] = MAX_INPUT_CHARS) -> Iterator[Chunk]:
+    """JSONL 入力を (user, response) ペアのチャンクに分割して順に返す。
+
+    各レコードの id は "id" フィールド、なければ入力中の 0 始まりの通し番号
+    （空行を除き、不正な行を含む）とする。position は fin の現在位置に対応する開始位置。
+
+    JSON として解釈できない行・user / response が文字列でない行・validate を通らない行は、
+    rejects を渡した場合はそこへ書き出して読み飛ばし、渡さない場合は例外を送出する。
+    末尾が不正な行のみの場合も最後の位置を返すよう、空のチャンクを返すことがある。
+    """
+    ids: List[Any] = []
+    pending: List[Tuple[str, str]] = []
+    offset, n_lines, n_records = position.offset, position.lines, position.records
+    yielded = position
+    for line in fin:
+        line_offset = offset
+        offset += len(line)
+        n_lines += 1
+        if not line.strip():
+            continue
+        try:
+            record, user, resp = _parse_record(line, max_response_chars)
+        except (ValueError, KeyError, TypeError) as exc:
+            if rejects is None:
+                raise
+            rejects.write(n_lines, line_offset, line, exc)
+        else:
+            ids.append(record.get("id", n_records))
+            pending.append((user, resp))
+        n_records += 1
+        if len(pending) >= chunk_size:
+            yielded = InputPosition(offset, n_lines, n_records, rejects.position if rejects else 0)
+            yield ids, pending, yielded
+            ids, pending = [], []
+    end = InputPosition(offset, n_lines, n_records, rejects.position if rejects else 0)
+    if pending or end != yielded:
+        yield ids, pending, end
+
+def _infer_chunk(pairs: List[Tuple[str, str]], matcher: LexiconMatcher, model: ScoringModel,
+                 tfidf_calc: TFIDFNoveltyCalculator, window_chars: Optional[int] = None,
+                 **kwargs: Any) -> List[Dict[str, Any]]:
+    """window_chars の指定に応じて inference_batch または inference_documents で 1 チャンクを推論する。"""
+    if window_chars is None:
+        return inference_batch(pairs, matcher, model, tfidf_calc, **kwargs)
+    return inference_documents(pairs, matcher, model, tfidf_calc, window_chars=window_chars, **kwargs)
+
+def _timings_of(results: List[Dict[str, Any]]) -> Iterator[Optional[Dict[str, float]]]:
+    return (result["meta"].get("timings") for result in results)
+
+def _checkpoint_meta(input_path: Union[str, Path], output_format: str) -> Dict[str, Any]:
+    """チェックポイントに記録し、再開時に照合する入力・出力形式の情報。
+
+    通常ファイルの入力は大きさと更新時刻も記録する（標準入力は照合できない）。
+    """
+    meta: Dict[str, Any] = {"input": str(input_path), "output_format": output_format}
+    if str(input_path) != "-":
+        stat = os.stat(input_path)
+        meta.update(input_size=stat.st_size, input_mtime_ns=stat.st_mtime_ns)
+    return meta
+
+def process_file(input_path: Union[str, Path], output_path: Path, matcher: LexiconMatcher, model: ScoringModel,
+                 tfidf_calc: TFIDFNoveltyCalculator, batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1,
+                 timings_summary: Optional[Path] = None, uncertainty: str = "sampling",
+                 sampling: SamplingConfig = DEFAULT_SAMPLING, output_format: str = "jsonl",
+                 feature_cache: Optional[FeatureCache] = None, window_chars: Optional[int] = None,
+                 checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY, resume: bool = False,
+                 rejects_path: Optional[Path] = None) -> None:
+    """JSONL 入力を推論し、入力順を保ったまま output_format の形式で書き出す。
+
+    input_path は JSONL ファイル（gzip / zstd 圧縮可）または "-"（標準入力）。
+    output_format は core.utils.result_writer.OUTPUT_FORMATS のいずれか
+    （jsonl: 従来形式、compact: 入力テキストを省いた JSONL、parquet / arrow: 列指向形式）。
+
+    workers > 1 の場合はプロセスプールでチャンク単位に並列処理する。
+    各ワーカーは起動時に辞書・SimCSE・推論モデルを一度だけ読み込み、
+    親プロセスのモデル重みを共有する（NumPy バックエンドではワーカーで torch を読み込まない）。
+
+    checkpoint_every 件の書き出しごとに出力を確定し、入力位置と出力位置を
+    <output>.checkpoint.json に記録する。resume=True の場合は最後に確定したレコードの
+    次から処理を再開する（チェックポイントがなければ最初から処理する）。resume=False の場合は
+    開始時に既存のチェックポイントを削除する。入力ファイルの大きさ・更新時刻、出力・不正行ファイルが
+    チェックポイントと一致しない場合は再開せずに ValueError を送出する。
+    解釈できない行・検証を通らない行は rejects_path（既定 <output>.rejects.jsonl）に書き出して読み飛ばす。
+
+    timings_summary を指定した場合は各結果に meta.timings を出力し、
+    区間ごとのヒストグラム集計（件数・平均・p50/p90/p99・最大）を処理の最後に JSON で書き出す
+    （再開した場合は再開後の分のみ）。
+
+    feature_cache を指定した場合は、以前の実行で計算した特徴量のうち依存資源が
+    変わっていないものを再利用する（並列処理では各ワーカーが同じファイルを開く）。
+
+    window_chars を指定した場合は inference_documents により、window_chars 文字を超える応答を
+    文単位の窓に分割して採点する（MAX_INPUT_CHARS を超える応答も受け付ける）。
+    """
+    timings = timings_summary is not None
+    aggregator = TimingAggregator() if timings else None
+    ckpt_path = checkpoint_path(output_path)
+    meta = _checkpoint_meta(input_path, output_format)
+    state = load_checkpoint(ckpt_path) if resume else None
+    if state is not None:
+        mismatch = [key for key, value in meta.items() if state.get(key) != value]
+        if mismatch:
+            raise ValueError(f"Checkpoint {ckpt_path} was written for a different {', '.join(mismatch)} "
+                             "(run without --resume to start over)")
+        if state["complete"]:
+            return
+    elif ckpt_path.exists():
+        # 以前の実行のチェックポイントが残っていると、最初の確定前に中断した後の再開で
+        # 新しい出力に古い位置を適用してしまうため、開始時に削除する
+        ckpt_path.unlink()
+    position = InputPosition(**state["position"]) if state else InputPosition()
+    rejects_path = rejects_path or output_path.with_name(output_path.name + ".rejects.jsonl")
+    max_response_chars = None if window_chars is not None else MAX_INPUT_CHARS
+
+    with open_input(input_path) as fin, \
+            ResultWriter(output_path, output_format, resume=state["output_position"] if state else None) as writer, \
+            RejectsWriter(rejects_path, resume=position.rejects if state else None) as rejects:
+        skip_input(fin, position.offset)
+        checkpointer = Checkpointer(ckpt_path, writer, rejects, checkpoint_every, meta, position)
+        chunks = _iter_chunks(fin, batch_size, position, rejects, max_response_chars)
+        if workers <= 1:
+            for ids, pairs, end in chunks:
+                results = _infer_chunk(pairs, matcher, model, tfidf_calc, batch_size=batch_size, timings=timings,
+                                       uncertainty=uncertainty, sampling=sampling, feature_cache=feature_cache,
+                                       window_chars=window_chars)
+                if aggregator is not None:
+                    aggregator.add_all(_timings_of(results))
+                writer.write(encode_results(results, ids, output_format))
+                checkpointer.written(len(ids), end)
+        else:
+            _process_parallel(chunks, writer, matcher, model, tfidf_calc, batch_size, workers, aggregator,
+                              uncertainty, sampling, None if feature_cache is None else feature_cache.path,
+                              window_chars, checkpointer)
+        checkpointer.commit()
+    checkpointer.commit(complete=True)
+    if aggregator is not None:
+        aggregator.write(timings_summary)
+
+# --- 並列バッチ処理 -------------------------------------------------------
+
+# ワーカープロセス内で保持する推論リソース
+_worker: Dict[str, Any] = {}
+
+def _init_worker(lexicon_path: str, model_spec: Tuple[str, Dict[str, Any]], batch_size: int,
+                 cache_config: Optional[Tuple[int, Optional[str]]], tfidf_model_path: Optional[str],
+                 lexicon_watch: Optional[float], timings: bool, uncertainty: str, sampling: SamplingConfig,
+                 output_format: str, feature_cache_path: Optional[str], window_chars: Optional[int]) -> None:
+    """ワーカー起動時に推論リソースを一度だけ構築する。"""
+    backend, model_state = model_spec
+    if cache_config is None:
+        set_embedding_cache(None)
+    else:
+        capacity, disk_dir = cache_config
+        set_embedding_cache(EmbeddingCache(MODEL_NAME, capacity=capacity, disk_dir=disk_dir))
+    model = _restore_model(backend, model_state)
+    # 最初のチャンクで読み込み待ちが発生しないよう事前に読み込む
+    resources.warmup(WARMUP_RESOURCES[backend])
+    matcher = LexiconMatcher(lexicon_path)
+    if lexicon_watch:
+        matcher.watch(lexicon_watch)
+    _worker.update(
+        matcher=matcher,
+        model=model,
+        tfidf_calc=TFIDFNoveltyCalculator(tfidf_model_path),
+        batch_size=batch_size,
+        timings=timings,
+        uncertainty=uncertainty,
+        sampling=sampling,
+        output_format=output_format,
+        feature_cache=None if feature_cache_path is None else FeatureCache(feature_cache_path),
+        window_chars=window_chars,
+    )
+
+def _run_chunk(ids: List[Any], pairs: List[Tuple[str, str]]) -> Tuple[Any, Optional[TimingAggregator]]:
+    results = _infer_chunk(pairs, _worker["matcher"], _worker["model"], _worker["tfidf_calc"],
+                           batch_size=_worker["batch_size"], timings=_worker["timings"],
+                           uncertainty=_worker["uncertainty"], sampling=_worker["sampling"],
+                           feature_cache=_worker["feature_cache"], window_chars=_worker["window_chars"])
+    aggregator = None
+    if _worker["timings"]:
+        # 区間ごとのヒストグラムに集約して返す（親プロセスでマージする）
+        aggregator = TimingAggregator()
+        aggregator.add_all(_timings_of(results))
+    # 書き出し形式への変換（JSON 化・列指向化）もワーカー側で行う
+    return encode_results(results, ids, _worker["output_format"]), aggregator
+
+def _process_parallel(chunks: Iterator[Chunk], writer: ResultWriter, matcher: LexiconMatcher,
+                      model: ScoringModel, tfidf_calc: TFIDFNoveltyCalculator, batch_size: int, workers: int,
+                      aggregator: Optional[TimingAggregator] = None, uncertainty: str = "sampling",
+                      sampling: SamplingConfig = DEFAULT_SAMPLING, feature_cache_path: Optional[str] = None,
+                      window_chars: Optional[int] = None, checkpointer: Optional[Checkpointer] = None) -> None:
+    """チャンクをプロセスプールに投入し、完了したものから入力順に書き出す。
+
+    投入済み未書き出しのチャンク数を workers の定数倍に制限し、
+    入力全体をメモリに載せずに処理する。checkpointer には書き出したチャンクを入力順に通知する。
+    """
+    ctx = mp.get_context("spawn")
+    max_in_flight = workers * 4
+    # 親プロセスと同じ埋め込みキャッシュ構成をワーカーに引き継ぐ（ディスク層は共有）
+    cache = get_embedding_cache()
+    cache_config = None if cache is None else (cache.capacity, cache.disk_dir)
+    with ctx.Pool(workers, initializer=_init_worker,
+                  initargs=(matcher.lexicon_path, _model_spec(model), batch_size, cache_config,
+                            tfidf_calc.model_path, matcher.watch_interval, aggregator is not None,
+                            uncertainty, sampling, writer.output_format, feature_cache_path,
+                            window_chars)) as pool:
+        in_flight: deque = deque()
+
+        def write_next() -> None:
+            pending, n_records, end = in_flight.popleft()
+            encoded, chunk_timings = pending.get()
+            writer.write(encoded)
+            if aggregator is not None and chunk_timings is not None:
+                aggregator.merge(chunk_timings)
+            if checkpointer is not None:
+                checkpointer.written(n_records, end)
+
+        for ids, pairs, end in chunks:
+            in_flight.append((pool.apply_async(_run_chunk, (ids, pairs)), len(ids), end))
+            # 先頭チャンクが完了していれば順に書き出す
+            while in_flight and (len(in_flight) >= max_in_flight or in_flight[0][0].ready()):
+                write_next()
+        while in_flight:
+            write_next()
 
 # --- エントリポイント -----------------------------------------------------
 
+def add_uncertainty_arguments(parser: argparse.ArgumentParser) -> None:
+    """不確実性推定の方式とサンプル数のオプションを追加する（serve と共用）。"""
+    parser.add_argument("--uncertainty", choices=UNCERTAINTY_MODES, default="sampling",
+                        help="Confidence estimation: fixed-count MC Dropout, MC Dropout until the variance "
+                             "estimate converges, or deterministic analytic moments")
+    parser.add_argument("--n-samples", type=int, default=DEFAULT_SAMPLING.n_samples,
+                        help="MC Dropout samples per pair (--uncertainty sampling)")
+    parser.add_argument("--min-samples", type=int, default=DEFAULT_SAMPLING.min_samples,
+                        help="Minimum MC Dropout samples per pair (--uncertainty adaptive)")
+    parser.add_argument("--max-samples", type=int, default=DEFAULT_SAMPLING.max_samples,
+                        help="Maximum MC Dropout samples per pair (--uncertainty adaptive)")
+    parser.add_argument("--sample-tolerance", type=float, default=DEFAULT_SAMPLING.tolerance,
+                        help="Stop sampling once the standard error of the mean variance (1 - confidence) "
+                             "is at most this (--uncertainty adaptive)")
+
+def sampling_config(parser: argparse.ArgumentParser, args: argparse.Namespace) -> SamplingConfig:
+    """add_uncertainty_arguments のオプションから SamplingConfig を構築する。"""
+    if not 0 < args.min_samples <= args.max_samples:
+        parser.error("--min-samples must be positive and not exceed --max-samples")
+    if args.n_samples <= 0:
+        parser.error("--n-samples must be positive")
+    return SamplingConfig(
+        n_samples=args.n_samples,
+        min_samples=args.min_samples,
+        max_samples=args.max_samples,
+        block_size=DEFAULT_SAMPLING.block_size,
+        tolerance=args.sample_tolerance,
+    )
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="JAIML v3.2 inference (SRS compliant)")
     mode = parser.add_mutually_exclusive_group(required=True)
-    mode.add_argument("--input", type=str, help="Input JSONL path")
+    mode.add_argument("--input", type=str,
+                      help="Input JSONL path, optionally gzip/zstd compressed, or - for stdin")
     mode.add_argument("--user", type=str, help="Single user utterance")
     parser.add_argument("--response", type=str, help="Single AI response (needed with --user)")
-    parser.add_argument("--output", type=str, help="Output JSON path (batch mode)")
+    parser.add_argument("--responses", type=str,
+                        help="Rank candidate responses to --user: JSONL of strings or {\"response\": ...} records")
+    parser.add_argument("--rank-by", choices=RANK_KEYS, default="index",
+                        help="Ranking key for --responses (ingratiation index or a category score)")
+    parser.add_argument("--descending", action="store_true",
+                        help="Rank the highest scores first (default: least ingratiating first)")
+    parser.add_argument("--output", type=str, help="Output path (batch mode)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted batch run from the last checkpoint in <output>.checkpoint.json")
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_CHECKPOINT_EVERY,
+                        help="Commit the output and write a checkpoint every N records (batch mode)")
+    parser.add_argument("--rejects", type=str,
+                        help="Where malformed or invalid input lines are written (default <output>.rejects.jsonl)")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="jsonl",
+                        help="Batch output format: full JSONL, compact JSONL (id instead of input texts), "
+                             "or columnar Parquet / Arrow IPC (requires pyarrow)")
     parser.add_argument("--lexicon", type=str, default=str(get_lexicon_path()))
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="SimCSE encoding batch size (batch mode)")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (batch mode)")
+    parser.add_argument("--embedding-cache", type=str, help="Directory of the persistent SimCSE embedding cache")
+    parser.add_argument("--embedding-cache-size", type=int, default=DEFAULT_CAPACITY,
+                        help="In-memory embedding cache entries per process (about 3 KB each for SimCSE)")
+    parser.add_argument("--feature-cache", type=str,
+                        help="SQLite file caching extracted features across runs (batch mode); only features whose "
+                             "lexicon categories, tokenizer, embedding or TF-IDF model changed are recomputed")
+    parser.add_argument("--tfidf-model", type=str, help="Pre-fitted TF-IDF model (.npz) from scripts.fit_tfidf")
+    parser.add_argument("--window-chars", type=int,
+                        help=f"Long-document mode: score responses longer than N characters as sentence-aligned "
+                             f"windows of at most N characters (default off; {DEFAULT_WINDOW_CHARS} fits the SimCSE "
+                             f"sequence length) and lift the {MAX_INPUT_CHARS}-character response limit")
+    parser.add_argument("--lexicon-watch", type=float, default=0.0,
+                        help="Reload the lexicon when the file changes, checking every N seconds (0 = off)")
+    parser.add_argument("--timings", action="store_true",
+                        help="Record per-section latencies in meta.timings (batch mode also writes <output>.timings.json)")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch",
+                        help="MLP head backend (numpy runs MC Dropout without importing torch)")
+    parser.add_argument("--weights", type=str, help="Model weights (.npz) from scripts.export_weights")
+    add_uncertainty_arguments(parser)
     args = parser.parse_args()
+    sampling = sampling_config(parser, args)
+    if args.window_chars is not None and not MIN_WINDOW_CHARS <= args.window_chars <= MAX_INPUT_CHARS:
+        parser.error(f"--window-chars must be between {MIN_WINDOW_CHARS} and {MAX_INPUT_CHARS}")
+
+    set_embedding_cache(EmbeddingCache(MODEL_NAME, capacity=args.embedding_cache_size, disk_dir=args.embedding_cache))
 
     matcher = LexiconMatcher(args.lexicon)
-    model = IngratiationModel()
-    tfidf_calc = TFIDFNoveltyCalculator()
+    if args.lexicon_watch > 0:
+        matcher.watch(args.lexicon_watch)
+    model = load_model(args.backend, args.weights)
+    tfidf_calc = TFIDFNoveltyCalculator(args.tfidf_model)
 
     if args.input:
         if not args.output:
             parser.error("--output is required when --input is specified")
-        process_file(Path(args.input), Path(args.output), matcher, model, tfidf_calc)
+        if args.output_format in ("parquet", "arrow") and importlib.util.find_spec("pyarrow") is None:
+            parser.error(f"--output-format {args.output_format} requires pyarrow (pip install pyarrow)")
+        if args.checkpoint_every < 1:
+            parser.error("--checkpoint-every must be positive")
+        output = Path(args.output)
+        timings_summary = output.with_name(output.name + ".timings.json") if args.timings else None
+        feature_cache = FeatureCache(args.feature_cache) if args.feature_cache else None
+        process_file(args.input if args.input == "-" else Path(args.input), output, matcher, model, tfidf_calc,
+                     batch_size=args.batch_size, workers=args.workers, timings_summary=timings_summary,
+                     uncertainty=args.uncertainty, sampling=sampling, output_format=args.output_format,
+                     feature_cache=feature_cache, window_chars=args.window_chars,
+                     checkpoint_every=args.checkpoint_every, resume=args.resume,
+                     rejects_path=Path(args.rejects) if args.rejects else None)
+        if feature_cache is not None:
+            feature_cache.close()
+    elif args.responses:
+        responses = _read_responses(Path(args.responses))
+        ranked = rank_responses(args.user, responses, matcher, model, tfidf_calc, by=args.rank_by,
+                                descending=args.descending, batch_size=args.batch_size, timings=args.timings,
+                                uncertainty=args.uncertainty, sampling=sampling)
+        print(json.dumps({"user": args.user, "rank_by": args.rank_by, "candidates": ranked},
+                         ensure_ascii=False, indent=2))
     else:
         if args.response is None:
-            parser.error("--response is required when --user is specified")
-        result = inference_pair(args.user, args.response, matcher, model, tfidf_calc)
+            parser.error("--response or --responses is required when --user is specified")
+        if args.window_chars is not None:
+            result = inference_documents([(args.user, args.response)], matcher, model, tfidf_calc,
+                                         window_chars=args.window_chars, batch_size=args.batch_size,
+                                         timings=args.timings, uncertainty=args.uncertainty, sampling=sampling)[0]
+        else:
+            result = inference_pair(args.user, args.response, matcher, model, tfidf_calc, timings=args.timings,
+                                    uncertainty=args.uncertainty, sampling=sampling)
         print(json.dumps(result, ensure_ascii=False, indent=2))
 
 if __name__ == "__main__":
@@ -0,0 +1,412 @@
+# src/model/jaiml_v3_3/scripts/serve.py
+"""常駐推論サービス。
+
+SimCSE・辞書・推論モデルを一度だけ読み込み、HTTP（TCP または Unix ソケット）で
+スコアリング要求を受け付ける。同時に到着した要求は数ミリ秒だけ待って
+マイクロバッチにまとめ、inference_batch で一括処理する。
+
+    python -m scripts.serve --port 8080
+    curl -X POST localhost:8080/score -d '{"user": "...", "response": "..."}'
+
+エンドポイント:
+    POST /score  : {"user": str, "response": str} → 推論結果 JSON
+    POST /rank   : {"user": str, "responses": [str], "by": "index", "descending": false}
+                   → 応答候補を順位順に並べた推論結果（rank_responses）。候補数は --max-candidates まで
+    GET  /stats  : キュー長・バッチサイズ・レイテンシ統計（--timings 指定時は区間ごとの統計も含む）
+    GET  /health : 死活確認
+    POST /reload-lexicon : 辞書ファイルを読み直す（内容が変わっていれば新しい版に切り替える）
+
+辞書は --lexicon-watch 秒ごとにファイル更新を確認し、変更があれば再起動なしで切り替える。
+切り替え前に受け付けたバッチは旧版で処理を終え、結果の meta.lexicon_version に版を記録する。
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from core.utils.paths import get_lexicon_path
+from core.features.semantic import DEFAULT_BATCH_SIZE, MODEL_NAME, set_embedding_cache
+from core.features.corpus_based import TFIDFNoveltyCalculator
+from core.utils import resources
+from core.utils.embedding_cache import DEFAULT_CAPACITY, EmbeddingCache
+from core.utils.timing import TimingAggregator
+from lexicons.matcher import LexiconMatcher
+from scripts.run_inference import (
+    BACKENDS,
+    RANK_KEYS,
+    DEFAULT_SAMPLING,
+    WARMUP_RESOURCES,
+    SamplingConfig,
+    ScoringModel,
+    add_uncertainty_arguments,
+    inference_batch,
+    load_model,
+    rank_responses,
+    sampling_config,
+    validate,
+)
+
+# --- レイテンシ統計 -------------------------------------------------------
+
+class LatencyStats:
+    """直近 window 件のレイテンシからパーセンタイルを算出する。"""
+
+    def __init__(self, window: int = 10000):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, ms: float) -> None:
+        self._samples.append(ms)
+        self.count += 1
+
+    def summary(self) -> Dict[str, float]:
+        if not self._samples:
+            return {"count": self.count}
+        ordered = sorted(self._samples)
+
+        def pct(p: float) -> float:
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+        return {
+            "count": self.count,
+            "mean_ms": sum(ordered) / len(ordered),
+            "p50_ms": pct(0.50),
+            "p90_ms": pct(0.90),
+            "p99_ms": pct(0.99),
+            "max_ms": ordered[-1],
+        }
+
+# --- マイクロバッチ -------------------------------------------------------
+
+# /rank の 1 要求あたりの候補数の既定の上限（推論スレッドを長く占有して /score を待たせないため）
+DEFAULT_MAX_CANDIDATES = 64
+
+# 要求本文の既定の上限 [バイト]（既定の候補数 × MAX_INPUT_CHARS 文字の /rank が収まる大きさ）
+DEFAULT_MAX_BODY_BYTES = 8 << 20
+
+class MicroBatcher:
+    """同時到着した要求を max_wait_ms の間まとめて inference_batch に渡す。
+
+    推論は単一スレッドの executor で実行し、イベントループを塞がない。
+    /rank の要求は max_candidates 件までに制限する。
+    """
+
+    def __init__(self, matcher: LexiconMatcher, model: ScoringModel, tfidf_calc: TFIDFNoveltyCalculator,
+                 max_batch: int = DEFAULT_BATCH_SIZE, max_wait_ms: float = 5.0, timings: bool = False,
+                 uncertainty: str = "sampling", sampling: SamplingConfig = DEFAULT_SAMPLING,
+                 max_candidates: int = DEFAULT_MAX_CANDIDATES):
+        self.matcher = matcher
+        self.max_candidates = max_candidates
+        self.model = model
+        self.tfidf_calc = tfidf_calc
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.uncertainty = uncertainty
+        self.sampling = sampling
+        self._queue: "asyncio.Queue[Tuple[Tuple[str, str], asyncio.Future, float]]" = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jaiml-infer")
+        self._task: Optional[asyncio.Task] = None
+        self.latency = LatencyStats()
+        self.queue_wait = LatencyStats()
+        self.rank_latency = LatencyStats()
+        self.batches = 0
+        self.batched_items = 0
+        # 区間ごとの所要時間（timings=True の場合のみ集計する）
+        self.timings: Optional[TimingAggregator] = TimingAggregator() if timings else None
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, user: str, resp: str) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((user, resp), future, time.perf_counter()))
+        return await future
+
+    async def rank(self, user: str, responses: List[str], by: str, descending: bool) -> List[Dict[str, Any]]:
+        """応答候補をまとめて 1 回で採点する（マイクロバッチを経由せず、推論スレッドで実行する）。"""
+        started = time.perf_counter()
+        ranked = await asyncio.get_running_loop().run_in_executor(
+            self._executor, lambda: rank_responses(
+                user, responses, self.matcher, self.model, self.tfidf_calc, by=by, descending=descending,
+                batch_size=self.max_batch, timings=self.timings is not None,
+                uncertainty=self.uncertainty, sampling=self.sampling,
+            ),
+        )
+        self.rank_latency.add((time.perf_counter() - started) * 1000.0)
+        if self.timings is not None:
+            self.timings.add_all(result["meta"].get("timings") for result in ranked)
+        return ranked
+
+    async def _collect(self) -> List[Tuple[Tuple[str, str], asyncio.Future, float]]:
+        """最初の要求到着から max_wait 秒、または max_batch 件まで要求を集める。"""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.queue_wait.add((started - enqueued) * 1000.0)
+            pairs = [pair for pair, _, _ in batch]
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, inference_batch, pairs, self.matcher, self.model, self.tfidf_calc, self.max_batch,
+                    self.timings is not None, self.uncertainty, self.sampling,
+                )
+            except Exception as exc:  # バッチ全体の失敗は各要求へ伝える
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            finished = time.perf_counter()
+            self.batches += 1
+            self.batched_items += len(batch)
+            if self.timings is not None:
+                self.timings.add_all(result["meta"].get("timings") for result in results)
+            for (_, future, enqueued), result in zip(batch, results):
+                self.latency.add((finished - enqueued) * 1000.0)
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "lexicon_version": self.matcher.version,
+            "lexicon_reloads": self.matcher.reloads,
+            "queue_depth": self._queue.qsize(),
+            "batches": self.batches,
+            "mean_batch_size": self.batched_items / self.batches if self.batches else 0.0,
+            "latency": self.latency.summary(),
+            "queue_wait": self.queue_wait.summary(),
+            "rank_latency": self.rank_latency.summary(),
+        }
+        if self.timings is not None:
+            stats["timings"] = self.timings.summary()
+        return stats
+
+# --- HTTP ハンドラ --------------------------------------------------------
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+            500: "Internal Server Error"}
+
+async def _write_response(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("ascii") + body)
+    await writer.drain()
+
+def _content_length(headers: Dict[str, str]) -> int:
+    """Content-Length ヘッダの値（整数でない・負の値は ValueError）。"""
+    value = headers.get("content-length", "").strip() or "0"
+    if not value.isdigit():
+        raise ValueError(f"Invalid Content-Length: {value!r}")
+    return int(value)
+
+def _require_str(value: Any, name: str) -> str:
+    # 文字列以外（リストなど）は validate を通っても推論で失敗し、同じバッチの要求を巻き込むため受け付けない
+    if not isinstance(value, str):
+        raise TypeError(f"{name} must be a string")
+    return value
+
+def make_handler(batcher: MicroBatcher, max_body_bytes: int = DEFAULT_MAX_BODY_BYTES):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await _write_response(writer, 400, {"error": "Malformed request line"}, False)
+                    break
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                # 不正な Content-Length では本文の終わりが分からないため、応答後に接続を閉じる
+                try:
+                    length = _content_length(headers)
+                except ValueError as exc:
+                    await _write_response(writer, 400, {"error": str(exc)}, False)
+                    break
+                if length > max_body_bytes:
+                    await _write_response(writer, 413, {
+                        "error": f"Request body too large: {length} bytes (max {max_body_bytes})",
+                    }, False)
+                    break
+                body = await reader.readexactly(length)
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                if path == "/health" and method == "GET":
+                    await _write_response(writer, 200, {"status": "ok"}, keep_alive)
+                elif path == "/stats" and method == "GET":
+                    await _write_response(writer, 200, batcher.stats(), keep_alive)
+                elif path == "/reload-lexicon":
+                    if method != "POST":
+                        await _write_response(writer, 405, {"error": "Use POST"}, keep_alive)
+                    else:
+                        status, payload = await _reload_lexicon(batcher)
+                        await _write_response(writer, status, payload, keep_alive)
+                elif path == "/score":
+                    if method != "POST":
+                        await _write_response(writer, 405, {"error": "Use POST"}, keep_alive)
+                    else:
+                        status, payload = await _score(batcher, body)
+                        await _write_response(writer, status, payload, keep_alive)
+                elif path == "/rank":
+                    if method != "POST":
+                        await _write_response(writer, 405, {"error": "Use POST"}, keep_alive)
+                    else:
+                        status, payload = await _rank(batcher, body)
+                        await _write_response(writer, status, payload, keep_alive)
+                else:
+                    await _write_response(writer, 404, {"error": f"Unknown path: {path}"}, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+async def _score(batcher: MicroBatcher, body: bytes) -> Tuple[int, Dict[str, Any]]:
+    try:
+        record = json.loads(body)
+        user = _require_str(record["user"], "user")
+        resp = _require_str(record["response"], "response")
+        validate(user)
+        validate(resp)
+    except (ValueError, KeyError, TypeError) as exc:
+        return 400, {"error": str(exc)}
+    try:
+        return 200, await batcher.submit(user, resp)
+    except Exception as exc:
+        return 500, {"error": str(exc)}
+
+async def _rank(batcher: MicroBatcher, body: bytes) -> Tuple[int, Dict[str, Any]]:
+    try:
+        record = json.loads(body)
+        user, responses = _require_str(record["user"], "user"), record["responses"]
+        by = record.get("by", "index")
+        if by not in RANK_KEYS:
+            raise ValueError(f"Unknown ranking key: {by}")
+        if not isinstance(responses, list) or not responses:
+            raise ValueError("responses must be a non-empty list")
+        if len(responses) > batcher.max_candidates:
+            raise ValueError(f"Too many responses: {len(responses)} (max {batcher.max_candidates})")
+        validate(user)
+        for i, resp in enumerate(responses):
+            validate(_require_str(resp, f"responses[{i}]"))
+    except (ValueError, KeyError, TypeError) as exc:
+        return 400, {"error": str(exc)}
+    try:
+        ranked = await batcher.rank(user, responses, by, bool(record.get("descending", False)))
+    except Exception as exc:
+        return 500, {"error": str(exc)}
+    return 200, {"user": user, "rank_by": by, "candidates": ranked}
+
+async def _reload_lexicon(batcher: MicroBatcher) -> Tuple[int, Dict[str, Any]]:
+    # 索引の再構築は推論とは別のスレッドで行い、イベントループと推論を止めない
+    try:
+        reloaded = await asyncio.get_running_loop().run_in_executor(None, batcher.matcher.reload)
+    except Exception as exc:
+        return 500, {"error": str(exc)}
+    return 200, {"reloaded": reloaded, "lexicon_version": batcher.matcher.version}
+
+# --- エントリポイント -----------------------------------------------------
+
+async def serve(args: argparse.Namespace, sampling: SamplingConfig = DEFAULT_SAMPLING) -> None:
+    set_embedding_cache(EmbeddingCache(MODEL_NAME, capacity=args.embedding_cache_size, disk_dir=args.embedding_cache))
+    # SimCSE・fugashi・torch を受付開始前に読み込み、初回要求の遅延を避ける
+    # （numpy バックエンドでは torch を読み込まない）
+    resources.warmup(WARMUP_RESOURCES[args.backend])
+    matcher = LexiconMatcher(args.lexicon)
+    if args.lexicon_watch > 0:
+        matcher.watch(args.lexicon_watch)
+    model = load_model(args.backend, args.weights)
+    tfidf_calc = TFIDFNoveltyCalculator(args.tfidf_model)
+    batcher = MicroBatcher(matcher, model, tfidf_calc, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms,
+                           timings=args.timings, uncertainty=args.uncertainty, sampling=sampling,
+                           max_candidates=args.max_candidates)
+    batcher.start()
+    handler = make_handler(batcher, args.max_body_bytes)
+    if args.unix_socket:
+        server = await asyncio.start_unix_server(handler, path=args.unix_socket)
+    else:
+        server = await asyncio.start_server(handler, host=args.host, port=args.port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        matcher.stop_watching()
+        await batcher.stop()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JAIML v3.3 scoring service (micro-batching)")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix-socket", type=str, help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--lexicon", type=str, default=str(get_lexicon_path()))
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_BATCH_SIZE, help="Maximum micro-batch size")
+    parser.add_argument("--max-candidates", type=int, default=DEFAULT_MAX_CANDIDATES,
+                        help="Maximum responses per /rank request (larger requests get 400)")
+    parser.add_argument("--max-body-bytes", type=int, default=DEFAULT_MAX_BODY_BYTES,
+                        help="Maximum request body size (larger requests get 413)")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Time to wait for more requests before scoring")
+    parser.add_argument("--embedding-cache", type=str, help="Directory of the persistent SimCSE embedding cache")
+    parser.add_argument("--embedding-cache-size", type=int, default=DEFAULT_CAPACITY,
+                        help="In-memory embedding cache entries per process (about 3 KB each for SimCSE)")
+    parser.add_argument("--tfidf-model", type=str, help="Pre-fitted TF-IDF model (.npz) from scripts.fit_tfidf")
+    parser.add_argument("--lexicon-watch", type=float, default=5.0,
+                        help="Check the lexicon file for changes every N seconds and reload it (0 = off)")
+    parser.add_argument("--timings", action="store_true",
+                        help="Record per-section latencies in meta.timings and aggregate them in /stats")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch",
+                        help="MLP head backend (numpy runs MC Dropout without importing torch)")
+    parser.add_argument("--weights", type=str, help="Model weights (.npz) from scripts.export_weights")
+    add_uncertainty_arguments(parser)
+    args = parser.parse_args()
+    sampling = sampling_config(parser, args)
+    if args.max_candidates < 1:
+        parser.error("--max-candidates must be positive")
+    if args.max_body_bytes < 1:
+        parser.error("--max-body-bytes must be positive")
+    try:
+        asyncio.run(serve(args, sampling))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# src/model/jaiml_v3_3/tests/test_batch_input.py
+import gzip
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from core.classifier.schema import CATEGORIES, FEATURE_ORDER
+from core.utils.batch_input import InputPosition, RejectsWriter, open_input, skip_input
+from core.utils.checkpoint import Checkpointer, checkpoint_path, load_checkpoint
+from core.utils.result_writer import ResultWriter, encode_results
+from scripts.run_inference import _iter_chunks
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+HAS_ZSTANDARD = importlib.util.find_spec("zstandard") is not None
+
+LINES = [
+    {"user": "ユーザー発話です", "response": "応答その1です。"},
+    "{broken",
+    {"user": "ユーザー発話です", "response": "短い"},
+    {"id": "x", "user": "ユーザー発話です", "response": "応答その2です。"},
+    [1, 2],
+    {"user": "ユーザー発話です", "response": "応答その3です。"},
+]
+
+class TestBatchInput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        text = "".join((line if isinstance(line, str) else json.dumps(line, ensure_ascii=False)) + "\n\n"
+                       for line in LINES)
+        self.data = text.encode("utf-8")
+        (self.dir / "in.jsonl").write_bytes(self.data)
+        with gzip.open(self.dir / "in.jsonl.gz", "wb") as f:
+            f.write(self.data)
+
+    def test_gzip_and_skip(self):
+        for name in ("in.jsonl", "in.jsonl.gz"):
+            with open_input(self.dir / name) as fin:
+                skip_input(fin, 10)
+                self.assertEqual(fin.read(), self.data[10:])
+
+    def test_rejects_and_resume_position(self):
+        with open_input(self.dir / "in.jsonl") as fin, RejectsWriter(self.dir / "rejects.jsonl") as rejects:
+            chunks = list(_iter_chunks(fin, 2, rejects=rejects))
+        ids = [record_id for chunk_ids, _, _ in chunks for record_id in chunk_ids]
+        self.assertEqual(ids, [0, "x", 5])
+        rejected = [json.loads(line) for line in (self.dir / "rejects.jsonl").read_text(encoding="utf-8").splitlines()]
+        self.assertEqual([r["line"] for r in rejected], [3, 5, 9])
+        self.assertEqual(rejected[0]["text"], "{broken")
+        self.assertTrue(rejected[1]["error"].startswith("ValueError"))
+
+        # 最初のチャンクの末尾から読み直すと残りのチャンクが得られる
+        first_end = chunks[0][2]
+        self.assertEqual(first_end, InputPosition(self.data.index(b"[1, 2]") - 1, 7, 4, first_end.rejects))
+        with open_input(self.dir / "in.jsonl.gz") as fin, \
+                RejectsWriter(self.dir / "rejects.jsonl", resume=first_end.rejects) as rejects:
+            skip_input(fin, first_end.offset)
+            rest = list(_iter_chunks(fin, 2, first_end, rejects))
+        self.assertEqual(rest, chunks[1:])
+        self.assertEqual(len((self.dir / "rejects.jsonl").read_text(encoding="utf-8").splitlines()), 3)
+        with open_input(self.dir / "in.jsonl") as fin, self.assertRaises(ValueError):
+            list(_iter_chunks(fin, 2))
+
+    def test_result_writer_resume_and_checkpoint(self):
+        out = self.dir / "out.jsonl"
+        ckpt = checkpoint_path(out)
+        with ResultWriter(out) as writer, RejectsWriter(self.dir / "rejects.jsonl") as rejects:
+            checkpointer = Checkpointer(ckpt, writer, rejects, 2, {"input": "in.jsonl"})
+            writer.write("a\n")
+            checkpointer.written(1, InputPosition(3, 1, 1, 0))
+            self.assertIsNone(load_checkpoint(ckpt))
+            writer.write("b\n")
+            checkpointer.written(1, InputPosition(6, 2, 2, 0))
+            writer.write("uncommitted\n")
+        state = load_checkpoint(ckpt)
+        self.assertEqual(state["position"]["offset"], 6)
+        self.assertFalse(state["complete"])
+
+        with ResultWriter(out, resume=state["output_position"]) as writer:
+            writer.write("c\n")
+        self.assertEqual(out.read_text(encoding="utf-8"), "a\nb\nc\n")
+
+    def test_resume_requires_committed_length(self):
+        out, rejects_path = self.dir / "out.jsonl", self.dir / "rejects.jsonl"
+        out.write_bytes(b"a\n")
+        with self.assertRaisesRegex(ValueError, "expects 4 bytes"):
+            ResultWriter(out, resume=4)
+        self.assertEqual(out.read_bytes(), b"a\n")
+        with self.assertRaisesRegex(ValueError, "missing"):
+            ResultWriter(self.dir / "deleted.jsonl", resume=2)
+        with self.assertRaisesRegex(ValueError, "missing"):
+            RejectsWriter(rejects_path, resume=10)
+        rejects_path.write_bytes(b"{}\n")
+        with self.assertRaisesRegex(ValueError, "expects 10 bytes"):
+            RejectsWriter(rejects_path, resume=10)
+        # 確定済みの位置が 0 なら出力がなくても最初から書き出す
+        with ResultWriter(self.dir / "empty.jsonl", resume=0) as writer:
+            writer.write("a\n")
+        self.assertEqual((self.dir / "empty.jsonl").read_text(encoding="utf-8"), "a\n")
+
+    @unittest.skipUnless(HAS_ZSTANDARD, "zstandard is not installed")
+    def test_zstd_input(self):
+        import zstandard
+        path = self.dir / "in.jsonl.zst"
+        # 複数フレームの連結も 1 つの入力として読む
+        compressor = zstandard.ZstdCompressor()
+        path.write_bytes(compressor.compress(self.data[:20]) + compressor.compress(self.data[20:]))
+        with open_input(path) as fin:
+            self.assertEqual(fin.read(), self.data)
+        with open_input(path) as fin, RejectsWriter(self.dir / "rejects.jsonl") as rejects:
+            skip_input(fin, 10)
+            chunks = list(_iter_chunks(fin, 2, InputPosition(10), rejects))
+        self.assertEqual(chunks[-1][2].offset, len(self.data))
+
+def _results(start: int, n: int):
+    return [
+        {
+            "predicted_category": CATEGORIES[i % len(CATEGORIES)],
+            "index": i / 100,
+            "scores": {cat: i / 100 for cat in CATEGORIES},
+            "features": {name: i / 1000 for name in FEATURE_ORDER},
+            "meta": {"confidence": 0.9, "token_length": i, "processing_time_ms": 1, "lexicon_version": "v",
+                     "n_samples": 0},
+        }
+        for i in range(start, start + n)
+    ]
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+class TestColumnarResultWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        # 小さな row group で、セグメントの境界によらず組み直されることを確かめる
+        patcher = mock.patch("core.utils.result_writer.ROWS_PER_GROUP", 4)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, path, output_format):
+        def chunk(start, n):
+            return encode_results(_results(start, n), list(range(start, start + n)), output_format)
+
+        # 3 行ごとに確定し、確定していない 2 行を残して中断する
+        with self.assertRaises(RuntimeError), ResultWriter(path, output_format) as writer:
+            for start in (0, 3, 6):
+                writer.write(chunk(start, 3))
+                position = writer.commit()
+            writer.write(chunk(9, 2))
+            raise RuntimeError("interrupted")
+        self.assertEqual(position, 3)
+        self.assertEqual(sorted(p.name for p in (path.parent / (path.name + ".segments")).iterdir()),
+                         ["part-000000.arrow", "part-000001.arrow", "part-000002.arrow"])
+        with ResultWriter(path, output_format, resume=position) as writer:
+            writer.write(chunk(9, 5))
+        self.assertFalse((path.parent / (path.name + ".segments")).exists())
+
+    def test_parquet_row_groups(self):
+        import pyarrow.parquet as pq
+        path = self.dir / "out.parquet"
+        self.write(path, "parquet")
+        parquet = pq.ParquetFile(str(path))
+        sizes = [parquet.metadata.row_group(i).num_rows for i in range(parquet.metadata.num_row_groups)]
+        self.assertEqual(sizes, [4, 4, 4, 2])
+        self.assertEqual(parquet.read(columns=["id"]).column("id").to_pylist(), [str(i) for i in range(14)])
+
+    def test_arrow_record_batches(self):
+        import pyarrow as pa
+        path = self.dir / "out.arrow"
+        self.write(path, "arrow")
+        with pa.OSFile(str(path), "rb") as source:
+            reader = pa.ipc.open_file(source)
+            batches = [reader.get_batch(i) for i in range(reader.num_record_batches)]
+        self.assertEqual([batch.num_rows for batch in batches], [4, 4, 4, 2])
+        ids = [value for batch in batches for value in batch.column(0).to_pylist()]
+        self.assertEqual(ids, [str(i) for i in range(14)])
+
+    def test_missing_segment(self):
+        path = self.dir / "out.parquet"
+        with ResultWriter(path, "parquet") as writer:
+            writer.write(encode_results(_results(0, 3), [0, 1, 2], "parquet"))
+            writer.commit()
+            writer.abort()
+        (path.parent / "out.parquet.segments" / "part-000000.arrow").unlink()
+        with self.assertRaisesRegex(ValueError, "part-000000.arrow"):
+            ResultWriter(path, "parquet", resume=1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+# src/model/jaiml_v3_3/tests/test_classifier.py
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from core.classifier.ingratiation_model import IngratiationModel, CATEGORIES, FEATURE_ORDER, features_to_tensor
+from core.classifier.numpy_backend import NumpyIngratiationModel, features_to_array
+from core.utils.metrics import compute_confidence
+from scripts.run_inference import SamplingConfig, adaptive_sample_batch, estimate_scores_batch
+
+FEATURES = {
+    "semantic_congruence": 0.8,
+    "sentiment_emphasis_score": 1.5,
+    "user_repetition_ratio": 0.3,
+    "modal_expression_ratio": 0.5,
+    "response_dependency": 0.2,
+    "assertiveness_score": 0.5,
+    "lexical_diversity_inverse": 0.1,
+    "template_match_rate": 0.0,
+    "tfidf_novelty": 0.6,
+    "self_ref_pos_score": 0.0,
+    "ai_subject_ratio": 1.0,
+    "self_promotion_intensity": 2.0,
+}
+
+class TestIngratiationModel(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.model = IngratiationModel()
+
+    def test_forward_dict(self):
+        self.model.eval()
+        with torch.no_grad():
+            out = self.model(FEATURES)
+        self.assertEqual(set(out.keys()), set(CATEGORIES))
+        for value in out.values():
+            self.assertTrue(0.0 <= float(value) <= 1.0)
+
+    def test_forward_matrix_matches_dict(self):
+        """(B, 12) 行列 API と辞書 API が同じスコアを返すこと"""
+        self.model.eval()
+        other = dict(FEATURES, semantic_congruence=0.1, self_promotion_intensity=0.4)
+        x = features_to_tensor([FEATURES, other])
+        self.assertEqual(tuple(x.shape), (2, len(FEATURE_ORDER)))
+        with torch.no_grad():
+            batched = self.model.forward_matrix(x)
+            self.assertEqual(tuple(batched.shape), (2, 4))
+            for row, feats in zip(batched, [FEATURES, other]):
+                out = self.model(feats)
+                expected = torch.stack([out[cat] for cat in CATEGORIES])
+                self.assertTrue(torch.allclose(row, expected))
+
+    def test_normalize(self):
+        x = IngratiationModel.normalize(features_to_tensor([FEATURES]))[0]
+        self.assertAlmostEqual(float(x[1]), 1.5 / 3.0, places=6)
+        self.assertAlmostEqual(float(x[5]), 1.0 - 0.5, places=6)
+        self.assertAlmostEqual(float(x[8]), 1.0 - 0.6, places=6)
+        self.assertAlmostEqual(float(x[11]), 1.0, places=6)
+
+    def test_forward_matrix_dropout_rows_independent(self):
+        """train モードでは行ごとに異なる Dropout マスクが適用されること"""
+        self.model.train()
+        x = features_to_tensor([FEATURES]).expand(20, len(FEATURE_ORDER))
+        with torch.no_grad():
+            batched = self.model.forward_matrix(x)
+        self.assertGreater(float(batched.var(dim=0).sum()), 0.0)
+
+class TestNumpyBackend(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.model = IngratiationModel()
+        self.np_model = self.model.to_numpy()
+        other = dict(FEATURES, semantic_congruence=0.1, self_promotion_intensity=0.4, assertiveness_score=0.9)
+        self.feats = [FEATURES, other]
+
+    def test_eval_matches_torch(self):
+        self.model.eval()
+        with torch.no_grad():
+            expected = self.model.forward_matrix(features_to_tensor(self.feats)).numpy()
+        actual = self.np_model.forward_matrix(features_to_array(self.feats))
+        np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-6)
+
+    def test_dropout_masks_match_torch(self):
+        """同じ Dropout マスクを適用すれば torch の各ヘッドと一致すること"""
+        masks = self.np_model.dropout_masks((2, 4, 128))
+        actual = self.np_model.forward_matrix(features_to_array(self.feats), masks=masks)
+        x = IngratiationModel.split_heads(IngratiationModel.normalize(features_to_tensor(self.feats)))
+        heads = [self.model.social_head, self.model.avoidant_head, self.model.mechanical_head, self.model.self_head]
+        with torch.no_grad():
+            for h, (head, head_in) in enumerate(zip(heads, x)):
+                hidden = torch.relu(head.model[0](head_in)) * torch.from_numpy(masks[:, h])
+                expected = torch.sigmoid(head.model[3](hidden))[:, 0].numpy()
+                np.testing.assert_allclose(actual[:, h], expected, rtol=1e-5, atol=1e-6)
+
+    def test_mc_forward(self):
+        samples = self.np_model.mc_forward(features_to_array(self.feats), n_samples=20)
+        self.assertEqual(samples.shape, (2, 20, 4))
+        self.assertTrue(((samples >= 0.0) & (samples <= 1.0)).all())
+        self.assertGreater(float(samples.var(axis=1).sum()), 0.0)
+        self.assertTrue(0.0 <= compute_confidence(samples[0]) <= 1.0)
+
+    def test_weights_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "weights.npz"
+            self.model.export_weights(path)
+            loaded = NumpyIngratiationModel.load(path)
+            restored = IngratiationModel()
+            restored.load_weights(path)
+        np.testing.assert_array_equal(loaded.w1, self.np_model.w1)
+        self.assertAlmostEqual(loaded.dropout_p, 0.3)
+        for a, b in zip(restored.state_dict().values(), self.model.state_dict().values()):
+            self.assertTrue(torch.equal(a, b))
+
+class TestAnalyticUncertainty(unittest.TestCase):
+    def setUp(self):
+        self.np_model = NumpyIngratiationModel.random(seed=1)
+        rng = np.random.default_rng(0)
+        self.x = rng.uniform(0.0, 1.0, (8, len(FEATURE_ORDER))).astype(np.float32)
+
+    def test_moments_match_sampling(self):
+        """解析的な平均・分散が多数サンプルの MCDropout 推定と一致すること"""
+        mean, var = self.np_model.moments(self.x)
+        samples = np.concatenate([self.np_model.mc_forward(self.x, 2000) for _ in range(5)], axis=1).astype(np.float64)
+        np.testing.assert_allclose(mean, samples.mean(axis=1), atol=2e-3)
+        np.testing.assert_allclose(var, samples.var(axis=1), rtol=0.1, atol=1e-5)
+
+    def test_torch_matches_numpy(self):
+        torch.manual_seed(0)
+        model = IngratiationModel()
+        with torch.no_grad():
+            mean, var = model.forward_moments(torch.from_numpy(self.x))
+        np_mean, np_var = model.to_numpy().moments(self.x)
+        np.testing.assert_allclose(mean.numpy(), np_mean, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(var.numpy(), np_var, rtol=1e-4, atol=1e-8)
+
+    def test_analytic_mode_is_deterministic(self):
+        feats = [FEATURES, dict(FEATURES, semantic_congruence=0.1)]
+        first = estimate_scores_batch(self.np_model, feats, uncertainty="analytic")
+        second = estimate_scores_batch(self.np_model, feats, uncertainty="analytic")
+        self.assertEqual(first, second)
+        for scores, confidence, n_samples in first:
+            self.assertEqual(set(scores), set(CATEGORIES))
+            self.assertTrue(0.0 <= confidence <= 1.0)
+            self.assertEqual(n_samples, 0)
+
+class TestAdaptiveSampling(unittest.TestCase):
+    def test_sample_counts_within_bounds(self):
+        model = NumpyIngratiationModel.random(seed=1)
+        feats = [FEATURES, dict(FEATURES, semantic_congruence=0.1)]
+        config = SamplingConfig(min_samples=8, max_samples=24, block_size=4, tolerance=1e-4)
+        for scores, confidence, n_samples in adaptive_sample_batch(model, feats, config):
+            self.assertEqual(set(scores), set(CATEGORIES))
+            self.assertTrue(0.0 <= confidence <= 1.0)
+            self.assertTrue(8 <= n_samples <= 24)
+            self.assertEqual((n_samples - 8) % 4, 0)
+
+    def test_uncertain_pairs_draw_more_samples(self):
+        """出力の分散が大きいペアほど多くのサンプルを使うこと"""
+        base = NumpyIngratiationModel.random(seed=1)
+        # 重みの縮小・拡大で Dropout による出力の揺らぎを小さく・大きくしたモデル
+        stable = NumpyIngratiationModel(base.w1 * 0.25, base.b1, base.w2 * 0.25, base.b2, seed=0)
+        noisy = NumpyIngratiationModel(base.w1 * 4, base.b1, base.w2 * 4, base.b2, seed=0)
+        config = SamplingConfig(min_samples=8, max_samples=64, block_size=4, tolerance=1e-4)
+        self.assertEqual(adaptive_sample_batch(stable, [FEATURES], config)[0][2], 8)
+        self.assertEqual(adaptive_sample_batch(noisy, [FEATURES], config)[0][2], 64)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+# src/model/jaiml_v3_3/tests/test_embedding_cache.py
+import tempfile
+import unittest
+
+import numpy as np
+
+from core.utils.embedding_cache import EmbeddingCache
+
+class TestEmbeddingCache(unittest.TestCase):
+    def test_memory_lru(self):
+        cache = EmbeddingCache("dummy-model", capacity=2)
+        cache.put_many(["a", "b", "c"], np.eye(3, dtype=np.float32))
+        hit_a, hit_b, hit_c = cache.get_many(["a", "b", "c"])
+        # 容量 2 のため最も古い "a" は追い出される
+        self.assertIsNone(hit_a)
+        np.testing.assert_array_equal(hit_c, np.array([0, 0, 1], dtype=np.float32))
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 1)
+
+    def test_model_name_in_key(self):
+        self.assertNotEqual(EmbeddingCache("model-a").key("text"), EmbeddingCache("model-b").key("text"))
+
+    def test_disk_tier_persists(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            emb = np.random.default_rng(0).standard_normal((3, 8)).astype(np.float32)
+            EmbeddingCache("dummy-model", disk_dir=tmp).put_many(["x", "y", "z"], emb)
+            EmbeddingCache("dummy-model", disk_dir=tmp).put_many(["w"], emb[:1])
+
+            reopened = EmbeddingCache("dummy-model", capacity=1, disk_dir=tmp)
+            self.assertEqual(len(reopened), 4)
+            got = reopened.get_many(["z", "x", "w", "missing"])
+            # ディスク層は float16 で保持される
+            np.testing.assert_allclose(got[0], emb[2], atol=1e-2)
+            np.testing.assert_allclose(got[1], emb[0], atol=1e-2)
+            np.testing.assert_allclose(got[2], emb[0], atol=1e-2)
+            self.assertIsNone(got[3])
+            # 別モデル名ではヒットしない
+            self.assertIsNone(EmbeddingCache("other-model", disk_dir=tmp).get_many(["x"])[0])
+
+    def test_torn_append_is_truncated(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            emb = np.random.default_rng(1).standard_normal((2, 8)).astype(np.float32)
+            cache = EmbeddingCache("dummy-model", disk_dir=tmp)
+            cache.put_many(["x"], emb[:1])
+            # 中断された追記（行の途中まで）を模擬する
+            with cache._matrix_path.open("ab") as f:
+                f.write(b"\0" * 5)
+            cache.put_many(["y"], emb[1:])
+            reopened = EmbeddingCache("dummy-model", disk_dir=tmp)
+            np.testing.assert_allclose(reopened.get_many(["y"])[0], emb[1], atol=1e-2)
+            self.assertEqual(cache._matrix_path.stat().st_size, 2 * 8 * 2)
+
+if __name__ == "__main__":
+    unittest.main()
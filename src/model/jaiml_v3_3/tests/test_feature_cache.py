@@ -0,0 +1,56 @@
+# src/model/jaiml_v3_3/tests/test_feature_cache.py
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.classifier.schema import FEATURE_ORDER
+from core.utils.feature_cache import FeatureCache, feature_fingerprints, pair_key
+
+LEXICONS = {
+    "self_reference_words": ["私", "当AI"],
+    "evaluative_adjectives": ["優れた"],
+    "modal_expressions": ["かもしれない"],
+    "template_phrases": ["ご質問ありがとうございます"],
+}
+
+class TestFeatureCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.fingerprints = feature_fingerprints(LEXICONS, "model-a", "per-pair")
+
+    def test_category_change_invalidates_dependent_features_only(self):
+        changed = feature_fingerprints(dict(LEXICONS, modal_expressions=["でしょう"]), "model-a", "per-pair")
+        stale = {name for name in FEATURE_ORDER if changed[name] != self.fingerprints[name]}
+        self.assertEqual(stale, {"modal_expression_ratio", "assertiveness_score"})
+        # 語の並び順・重複は指紋に影響しない
+        reordered = dict(LEXICONS, self_reference_words=["当AI", "私", "私"])
+        self.assertEqual(feature_fingerprints(reordered, "model-a", "per-pair"), self.fingerprints)
+        other_model = feature_fingerprints(LEXICONS, "model-b", "fitted")
+        self.assertEqual({name for name in FEATURE_ORDER if other_model[name] != self.fingerprints[name]},
+                         {"semantic_congruence", "tfidf_novelty"})
+
+    def test_roundtrip_and_fingerprint_mismatch(self):
+        path = Path(self.tmp.name) / "cache" / "features.sqlite"
+        keys = [pair_key("ユーザー発話", "応答その1"), pair_key("ユーザー発話", "応答その2")]
+        values = [{name: float(i) for i, name in enumerate(FEATURE_ORDER)}, {"semantic_congruence": 0.5}]
+        cache = FeatureCache(path)
+        cache.put_many(keys, values, self.fingerprints)
+        cache.close()
+
+        reopened = FeatureCache(path)
+        self.assertEqual(len(reopened), len(FEATURE_ORDER) + 1)
+        self.assertEqual(reopened.get_many(keys + ["missing"], self.fingerprints), values + [{}])
+        self.assertEqual(reopened.hits, len(FEATURE_ORDER) + 1)
+        self.assertEqual(reopened.misses, 3 * len(FEATURE_ORDER) - reopened.hits)
+
+        changed = feature_fingerprints(dict(LEXICONS, template_phrases=[]), "model-a", "per-pair")
+        first = reopened.get_many(keys[:1], changed)[0]
+        self.assertEqual(set(first), set(FEATURE_ORDER) - {"template_match_rate"})
+        reopened.close()
+
+    def test_pair_key_separates_fields(self):
+        self.assertNotEqual(pair_key("ab", "c"), pair_key("a", "bc"))
+
+if __name__ == "__main__":
+    unittest.main()
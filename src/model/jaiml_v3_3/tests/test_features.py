@@ -22,6 +22,52 @@ class TestFeatures(unittest.TestCase):
         self.assertIn("達成する", matches.get("achievement_verbs", []))
         self.assertIn("すばらしい", matches.get("evaluative_adjectives", []))
 
+    def test_lexicon_matcher_offsets(self):
+        """Aho-Corasick 照合: 全出現（重なり含む）をオフセット付きで返し、文境界をまたぐ照合は除外する"""
+        from lexicons.automaton import AhoCorasick
+        from core.utils.analysis import analyze
+        ac = AhoCorasick(["he", "she", "his", "hers", ""])
+        found = sorted(ac.iter_matches("ushers"))
+        self.assertEqual(found, [(1, 4, 1), (2, 4, 0), (2, 6, 3)])
+
+        text = "私は達成した。すばらしい。"
+        for hit in self.matcher.find_all(text):
+            self.assertEqual(text[hit.start:hit.end], hit.term)
+            self.assertIn(hit.term, self.matcher.lexicons[hit.category])
+        analyzed = analyze(text)
+        per_sentence = self.matcher.sentence_hits(analyzed)
+        self.assertEqual(len(per_sentence), analyzed.n_sentences)
+        self.assertIn("self_reference_words", per_sentence[0])
+        self.assertNotIn("self_reference_words", per_sentence[1])
+        # 2 回目以降は AnalyzedText のキャッシュを再利用する
+        self.assertIs(self.matcher.sentence_hits(analyzed), per_sentence)
+
+    def test_hit_matrix_batch_matches_single(self):
+        """文 × カテゴリ照合行列: バッチ集約が単体の特徴量関数と一致する"""
+        from core.features.hit_matrix import hit_matrix, lexicon_features_batch
+        responses = [
+            "まだまだ不完全ながら、私は多くの成果を達成しました。ご質問ありがとうございます。",
+            "かもしれません。私はすばらしい。",
+            "今日は良い天気です",
+            "",
+        ]
+        matrix = hit_matrix(responses[1], self.matcher)
+        self.assertEqual(matrix.counts.shape, (2, len(self.matcher.categories)))
+        self.assertTrue(matrix.has("self_reference_words")[1])
+        batch = lexicon_features_batch(responses, self.matcher)
+        singles = {
+            "template_match_rate": template_match_rate,
+            "self_ref_pos_score": self_ref_pos_score,
+            "self_promotion_intensity": self_promotion_intensity,
+            "modal_expression_ratio": modal_expression_ratio,
+            "assertiveness_score": assertiveness_score,
+            "ai_subject_ratio": ai_subject_ratio,
+        }
+        self.assertEqual(set(batch), set(singles))
+        for name, func in singles.items():
+            for i, resp in enumerate(responses):
+                self.assertAlmostEqual(batch[name][i], func(resp, self.matcher), msg=name)
+
     def test_fugashi_tokenize(self):
         """fugashiトークナイザの動作確認"""
         text = "今日は良い天気です。"
@@ -45,6 +91,40 @@ class TestFeatures(unittest.TestCase):
         self.assertNotIn("は", content_words)
         self.assertNotIn("です", content_words)
 
+    def test_analyzed_text(self):
+        """解析済みテキスト（文オフセット・品詞・内容語）の確認"""
+        from core.utils.analysis import analyze
+        analyzed = analyze("今日は良い天気です。散歩に行きます！")
+        self.assertEqual(analyzed.sentences, ["今日は良い天気です", "散歩に行きます"])
+        self.assertEqual(analyzed.sentence_spans[1], (10, 17))
+        self.assertEqual(len(analyzed.surfaces), len(analyzed.pos))
+        self.assertEqual(len(analyzed.surfaces), len(analyzed.lemmas))
+        self.assertIn("天気", analyzed.content_words)
+        self.assertNotIn("は", analyzed.content_words)
+
+    def test_features_accept_analyzed_text(self):
+        """str と解析済みテキストで同一の特徴量になることの確認"""
+        from core.utils.analysis import analyze
+        user = "今日は天気が良い"
+        resp = "私は天気が良いと思います。本当に素晴らしい。"
+        self.assertEqual(response_dependency(user, resp), response_dependency(analyze(user), analyze(resp)))
+        self.assertEqual(lexical_diversity_inverse(resp), lexical_diversity_inverse(analyze(resp)))
+        self.assertEqual(ai_subject_ratio(resp, self.matcher), ai_subject_ratio(analyze(resp), self.matcher))
+        self.assertEqual(
+            self_promotion_intensity(resp, self.matcher),
+            self_promotion_intensity(analyze(resp), self.matcher),
+        )
+
+    def test_shared_user_text(self):
+        """同一のユーザー発話の解析結果を複数の応答で共有しても特徴量が変わらないことの確認"""
+        from core.utils.analysis import analyze
+        user = analyze("今日は天気が良い")
+        resps = ["私は天気が良いと思います。", "散歩に行きましょう。"]
+        for resp in resps:
+            self.assertEqual(user_repetition_ratio(user, resp), user_repetition_ratio(user.text, resp))
+            self.assertEqual(response_dependency(user, resp), response_dependency(user.text, resp))
+        self.assertIs(user.char_set, user.cache["char_set"])
+
     def test_user_repetition_ratio_morpheme_based(self):
         """文字ベースのJaccard係数テスト（既存実装維持）"""
         user = "今日は良い天気ですね"
@@ -87,6 +167,36 @@ class TestFeatures(unittest.TestCase):
         novelty = calc.compute(user, resp)
         self.assertGreater(novelty, 0.5)
         
+    def test_tfidf_novelty_pretrained(self):
+        """事前学習済み TF-IDF モデル（transform のみ）の動作確認"""
+        import tempfile
+        from pathlib import Path
+        from core.features.corpus_based import TFIDFNoveltyCalculator
+        corpus = [
+            "天気について教えて", "天気について説明します", "今日は晴れです",
+            "気温は15度で晴れ、風速3メートル", "朝食を食べた", "昼ご飯を食べたんですね",
+        ]
+        calc = TFIDFNoveltyCalculator().fit(corpus)
+        self.assertTrue(calc.is_fitted)
+
+        # 応答語がすべてユーザー側に現れる場合は新規情報なし
+        self.assertEqual(calc.compute("天気について説明します", "天気について説明します"), 0.0)
+        # 共通語のない応答は新規情報のみ
+        self.assertEqual(calc.compute("朝食を食べた", "気温は15度で晴れ"), 1.0)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "tfidf.npz"
+            calc.save(path)
+            loaded = TFIDFNoveltyCalculator(path)
+            # 拡張子のないパスには .npz を付けて保存し、model_path から読み直せる
+            saved = calc.save(Path(tmp) / "tfidf")
+            self.assertEqual(saved, Path(tmp) / "tfidf.npz")
+            self.assertEqual(calc.model_path, str(saved))
+            self.assertEqual(TFIDFNoveltyCalculator(calc.model_path).fingerprint, calc.fingerprint)
+        self.assertEqual(loaded.fingerprint, calc.fingerprint)
+        pairs = [("天気について教えて", "天気について説明します"), ("今日", "気温は15度で晴れ、風速3メートル")]
+        self.assertEqual(loaded.compute_batch(pairs), [calc.compute(u, r) for u, r in pairs])
+
     def test_lexical_diversity_morpheme_based(self):
         """形態素ベースの語彙多様性テスト（fugashiベース）"""
         resp = "素晴らしい素晴らしい本当に素晴らしい成果です"
@@ -0,0 +1,114 @@
+# src/model/jaiml_v3_3/tests/test_incremental.py
+import random
+import unittest
+from unittest import mock
+
+import numpy as np
+import yaml
+
+from benchmarks.synthetic import DialogueGenerator
+from core.features.corpus_based import TFIDFNoveltyCalculator
+from core.features.incremental import IncrementalFeatures
+from core.features.lexical import (
+    lexical_diversity_inverse,
+    response_dependency,
+    self_promotion_intensity,
+    self_ref_pos_score,
+    sentiment_emphasis_score,
+    template_match_rate,
+    user_repetition_ratio,
+)
+from core.features.semantic import MODEL_NAME, get_embedding_cache, set_embedding_cache
+from core.features.syntactic import ai_subject_ratio, assertiveness_score, modal_expression_ratio
+from core.utils.analysis import AnalyzedText
+from core.utils.embedding_cache import EmbeddingCache
+from core.utils.paths import get_lexicon_path
+from lexicons.matcher import LexiconMatcher
+
+def _reference(user, resp, matcher):
+    """応答全体から計算した特徴量（refresh() で更新する semantic_congruence・tfidf_novelty を除く）。"""
+    return {
+        "sentiment_emphasis_score": sentiment_emphasis_score(resp, matcher),
+        "user_repetition_ratio": user_repetition_ratio(user, resp),
+        "modal_expression_ratio": modal_expression_ratio(resp, matcher),
+        "response_dependency": response_dependency(user, resp),
+        "assertiveness_score": assertiveness_score(resp, matcher),
+        "lexical_diversity_inverse": lexical_diversity_inverse(resp),
+        "template_match_rate": template_match_rate(resp, matcher),
+        "self_ref_pos_score": self_ref_pos_score(resp, matcher),
+        "ai_subject_ratio": ai_subject_ratio(resp, matcher),
+        "self_promotion_intensity": self_promotion_intensity(resp, matcher),
+    }
+
+class TestIncrementalFeatures(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.matcher = LexiconMatcher(str(get_lexicon_path()))
+        with open(get_lexicon_path(), encoding="utf-8") as f:
+            lexicons = yaml.safe_load(f)
+        generator = DialogueGenerator(lexicons, seed=11, response_sentences=(3, 12))
+        cls.pairs = generator.pairs(12)
+        cls.tfidf = TFIDFNoveltyCalculator().fit([text for pair in generator.pairs(200) for text in pair])
+
+    def test_matches_whole_text_at_every_prefix(self):
+        rng = random.Random(0)
+        for user, resp in self.pairs:
+            state = IncrementalFeatures(user, self.matcher, self.tfidf, embed_interval=None)
+            pos = 0
+            while pos < len(resp):
+                step = rng.randint(1, 15)
+                state.append(resp[pos:pos + step])
+                pos += step
+                prefix = resp[:pos]
+                features = state.features()
+                for name, expected in _reference(user, prefix, self.matcher).items():
+                    self.assertAlmostEqual(features[name], expected, places=9, msg=f"{name} at {pos}: {prefix!r}")
+            self.assertEqual(state.text, resp)
+
+    def test_refresh_updates_tfidf_novelty(self):
+        previous = get_embedding_cache()
+        self.addCleanup(set_embedding_cache, previous)
+        set_embedding_cache(EmbeddingCache(MODEL_NAME))
+        rng = np.random.default_rng(0)
+        for user, resp in self.pairs[:4]:
+            state = IncrementalFeatures(user, self.matcher, self.tfidf, embed_interval=None)
+            # 文の途中（末尾文が未完）と応答の末尾で再計算する
+            for end in (len(resp) // 2, len(resp)):
+                state.append(resp[len(state):end])
+                prefix = resp[:end]
+                get_embedding_cache().put_many([user, prefix], rng.standard_normal((2, 16)).astype(np.float32))
+                state.refresh()
+                self.assertEqual(state.embedded_chars, end)
+                self.assertAlmostEqual(state.features()["tfidf_novelty"], self.tfidf.compute(user, prefix), places=9)
+
+    def test_refresh_does_not_retokenize(self):
+        previous = get_embedding_cache()
+        self.addCleanup(set_embedding_cache, previous)
+        set_embedding_cache(EmbeddingCache(MODEL_NAME))
+        user, resp = self.pairs[1]
+        end = len(resp) - 3
+        get_embedding_cache().put_many([user, resp[:end]], np.ones((2, 16), dtype=np.float32))
+        state = IncrementalFeatures(user, self.matcher, self.tfidf, embed_interval=None)
+        state.append(resp[:end])
+        state.features()
+        # 確定部分・末尾文は解析済みのため、再計算で形態素解析は行わない
+        with mock.patch.object(AnalyzedText, "_tokenize", side_effect=AssertionError("re-tokenized")):
+            state.refresh()
+        self.assertEqual(state.embedded_chars, end)
+        self.assertAlmostEqual(state.features()["tfidf_novelty"], self.tfidf.compute(user, resp[:end]), places=9)
+
+    def test_refresh_cadence(self):
+        user, resp = self.pairs[0]
+        state = IncrementalFeatures(user, self.matcher, self.tfidf, embed_interval=10)
+        self.assertFalse(state.refresh_due())
+        state.append(resp[:5])
+        self.assertTrue(state.refresh_due())
+        state.embedded_chars = 5
+        state.append(resp[5:14])
+        self.assertFalse(state.refresh_due())
+        state.append(resp[14:15])
+        self.assertTrue(state.refresh_due())
+        self.assertFalse(IncrementalFeatures(user, self.matcher, self.tfidf, embed_interval=None).refresh_due())
+
+if __name__ == "__main__":
+    unittest.main()
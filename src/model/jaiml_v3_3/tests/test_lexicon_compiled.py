@@ -0,0 +1,107 @@
+# src/model/jaiml_v3_3/tests/test_lexicon_compiled.py
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import yaml
+
+from lexicons.compiled import artifact_path, compile_lexicon, load_lexicon_tables
+from lexicons.matcher import LexiconMatcher
+
+LEXICON = {
+    "self_reference_words": ["私", "私たち"],
+    "achievement_verbs": ["達成", "成功する"],
+    "intensifiers": ["とても", "私"],
+    "empty_category": None,
+}
+
+class TestCompiledLexicon(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.yaml_path = Path(self._tmp.name) / "lexicons.yaml"
+        with open(self.yaml_path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(LEXICON, f, allow_unicode=True)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_non_string_term_is_rejected(self):
+        with open(self.yaml_path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(dict(LEXICON, intensifiers=["とても", None]), f, allow_unicode=True)
+        with self.assertRaisesRegex(ValueError, "intensifiers"):
+            compile_lexicon(self.yaml_path)
+        with self.assertRaisesRegex(ValueError, "intensifiers"):
+            load_lexicon_tables(self.yaml_path)
+
+    def test_non_list_category_is_rejected(self):
+        # リストでないカテゴリは空のカテゴリとして読み飛ばさない
+        with open(self.yaml_path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(dict(LEXICON, intensifiers={"とても": 1}), f, allow_unicode=True)
+        with self.assertRaisesRegex(ValueError, "'intensifiers' must be a list"):
+            compile_lexicon(self.yaml_path)
+        with self.assertRaisesRegex(ValueError, "'intensifiers' must be a list"):
+            load_lexicon_tables(self.yaml_path)
+
+    def test_artifact_matches_yaml(self):
+        compile_lexicon(self.yaml_path)
+        self.assertTrue(artifact_path(self.yaml_path).exists())
+        compiled = LexiconMatcher(str(self.yaml_path))
+        parsed = LexiconMatcher(str(self.yaml_path), use_compiled=False)
+        self.assertEqual(compiled.source, "artifact")
+        self.assertEqual(parsed.source, "yaml")
+        self.assertEqual(compiled.lexicons, parsed.lexicons)
+        text = "私たちはとても早く目標を達成した。"
+        self.assertEqual(compiled.find_all(text), parsed.find_all(text))
+        self.assertEqual(compiled.match(text), parsed.match(text))
+
+    def test_stale_artifact_falls_back_to_yaml(self):
+        compile_lexicon(self.yaml_path)
+        with open(self.yaml_path, "a", encoding="utf-8") as f:
+            f.write("modal_expressions:\n- かもしれない\n")
+        tables = load_lexicon_tables(self.yaml_path)
+        self.assertEqual(tables.source, "yaml")
+        self.assertIn("modal_expressions", tables.lexicons)
+
+class TestLexiconReload(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.yaml_path = Path(self._tmp.name) / "lexicons.yaml"
+        self._write(LEXICON)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, lexicon):
+        with open(self.yaml_path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(lexicon, f, allow_unicode=True)
+
+    def test_reload_swaps_snapshot(self):
+        matcher = LexiconMatcher(str(self.yaml_path))
+        self.assertFalse(matcher.reload())
+        pinned = matcher.snapshot
+        self._write(dict(LEXICON, modal_expressions=["かもしれない"]))
+        self.assertTrue(matcher.reload())
+        self.assertNotEqual(matcher.version, pinned.version)
+        text = "雨かもしれない。"
+        # 切り替え前に取得したスナップショットは旧版のまま照合を続ける
+        self.assertEqual(pinned.match(text).get("modal_expressions"), None)
+        self.assertEqual(matcher.match(text)["modal_expressions"], ["かもしれない"])
+
+    def test_watch_reloads_on_file_change(self):
+        matcher = LexiconMatcher(str(self.yaml_path))
+        old_version = matcher.version
+        matcher.watch(interval=0.05)
+        try:
+            time.sleep(0.1)
+            self._write(dict(LEXICON, modal_expressions=["かもしれない"]))
+            deadline = time.time() + 5.0
+            while matcher.version == old_version and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            matcher.stop_watching()
+        self.assertNotEqual(matcher.version, old_version)
+        self.assertEqual(matcher.reloads, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+# src/model/jaiml_v3_3/tests/test_resources.py
+import sys
+import unittest
+
+from core.utils import resources
+
+class TestResources(unittest.TestCase):
+    def test_lazy_load_once(self):
+        calls = []
+        resources.register("test_dummy", lambda: calls.append(1) or object())
+        self.assertFalse(resources.is_loaded("test_dummy"))
+        first = resources.get("test_dummy")
+        second = resources.get("test_dummy")
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(resources.is_loaded("test_dummy"))
+
+    def test_warmup(self):
+        resources.register("test_warm", lambda: "ready")
+        timings = resources.warmup(["test_warm"])
+        self.assertIn("test_warm", timings)
+        self.assertTrue(resources.is_loaded("test_warm"))
+
+    def test_unknown_resource(self):
+        with self.assertRaises(KeyError):
+            resources.get("no_such_resource")
+
+    def test_feature_modules_do_not_load_models(self):
+        """特徴量モジュールの import だけではモデルを読み込まないこと"""
+        import core.features.lexical  # noqa: F401
+        import core.features.semantic  # noqa: F401
+        self.assertFalse(resources.is_loaded("simcse"))
+        self.assertNotIn("sentence_transformers", sys.modules)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# src/model/jaiml_v3_3/tests/test_result_writer.py
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.classifier.schema import CATEGORIES, FEATURE_ORDER
+from core.utils.result_writer import ResultWriter, encode_results
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+def _result(i: int, timings: bool = False):
+    meta = {"token_length": 10 + i, "confidence": 0.99, "processing_time_ms": 3,
+            "lexicon_version": "abc", "n_samples": 20}
+    if timings:
+        meta["timings"] = {"tokenize": 0.5, "total": 3.0}
+    return {
+        "input": {"user": "ユーザー発話です", "response": f"応答その{i}です。"},
+        "scores": {cat: 0.1 * (j + 1) for j, cat in enumerate(CATEGORIES)},
+        "index": 0.25,
+        "predicted_category": "self",
+        "features": {name: float(j) for j, name in enumerate(FEATURE_ORDER)},
+        "meta": meta,
+    }
+
+class TestResultWriter(unittest.TestCase):
+    def setUp(self):
+        self.results = [_result(0), _result(1, timings=True)]
+        self.ids = ["a", 7]
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _write(self, output_format: str) -> Path:
+        path = Path(self.tmp.name) / f"out.{output_format}"
+        with ResultWriter(path, output_format) as writer:
+            writer.write(encode_results(self.results, self.ids, output_format))
+        return path
+
+    def test_jsonl_is_unchanged(self):
+        lines = self._write("jsonl").read_text(encoding="utf-8").splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.results)
+
+    def test_compact_drops_input(self):
+        lines = self._write("compact").read_text(encoding="utf-8").splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual([r["id"] for r in records], self.ids)
+        for record, result in zip(records, self.results):
+            self.assertNotIn("input", record)
+            self.assertEqual(record["features"], result["features"])
+            self.assertEqual(record["meta"], result["meta"])
+        self.assertNotIn('": ', lines[0])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_columnar_formats(self):
+        import pyarrow.parquet as pq
+        tables = {
+            "parquet": pq.read_table(self._write("parquet"), columns=["id", "features", "timings"]),
+            "arrow": pyarrow.ipc.open_file(str(self._write("arrow"))).read_all(),
+        }
+        for table in tables.values():
+            self.assertEqual(table.num_rows, 2)
+            self.assertEqual(table.column("id").to_pylist(), ["a", "7"])
+            self.assertEqual(table.column("features").to_pylist(), [r["features"] for r in self.results])
+            self.assertEqual(table.column("timings").to_pylist(), [None, [("tokenize", 0.5), ("total", 3.0)]])
+
+if __name__ == "__main__":
+    unittest.main()
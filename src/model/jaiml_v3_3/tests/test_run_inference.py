@@ -0,0 +1,411 @@
+# src/model/jaiml_v3_3/tests/test_run_inference.py
+import asyncio
+import hashlib
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import yaml
+
+from benchmarks.synthetic import DialogueGenerator
+from core.classifier.numpy_backend import NumpyIngratiationModel
+from core.features.corpus_based import TFIDFNoveltyCalculator
+from core.features.semantic import MODEL_NAME, get_embedding_cache, set_embedding_cache
+from core.utils import checkpoint
+from core.utils.checkpoint import checkpoint_path, load_checkpoint
+from core.utils.embedding_cache import EmbeddingCache
+from core.utils.paths import get_lexicon_path
+from lexicons.matcher import LexiconMatcher
+from core.utils.windowing import split_windows
+from scripts.run_inference import (
+    MAX_INPUT_CHARS,
+    StreamingScorer,
+    _read_responses,
+    inference_batch,
+    inference_documents,
+    inference_pair,
+    process_file,
+    rank_responses,
+)
+import scripts.run_inference as run_inference
+from scripts.serve import MicroBatcher, _rank, _score, make_handler
+
+def _embedding(text: str) -> np.ndarray:
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    return np.random.default_rng(seed).standard_normal(16).astype(np.float32)
+
+class InferenceTestCase(unittest.TestCase):
+    """SimCSE を読み込まずに推論するため、使用するテキストの埋め込みを事前にキャッシュへ登録する。"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.matcher = LexiconMatcher(str(get_lexicon_path()))
+        with open(get_lexicon_path(), encoding="utf-8") as f:
+            cls.generator = DialogueGenerator(yaml.safe_load(f), seed=5)
+        cls.model = NumpyIngratiationModel.random(seed=0)
+        cls.tfidf = TFIDFNoveltyCalculator()
+
+    def setUp(self):
+        previous = get_embedding_cache()
+        self.addCleanup(set_embedding_cache, previous)
+        self.embeddings = EmbeddingCache(MODEL_NAME)
+        set_embedding_cache(self.embeddings)
+
+    def prime(self, *texts: str) -> None:
+        self.embeddings.put_many(list(texts), np.stack([_embedding(text) for text in texts]))
+
+    def infer(self, pairs):
+        return inference_batch(pairs, self.matcher, self.model, self.tfidf, uncertainty="analytic")
+
+class TestRankResponses(InferenceTestCase):
+    def setUp(self):
+        super().setUp()
+        pairs = self.generator.pairs(6)
+        self.user = pairs[0][0]
+        # 同一の候補（同点）を含める
+        self.responses = [resp for _, resp in pairs] + [pairs[2][1]]
+        self.prime(self.user, *self.responses)
+
+    def rank(self, **kwargs):
+        return rank_responses(self.user, self.responses, self.matcher, self.model, self.tfidf,
+                              uncertainty="analytic", **kwargs)
+
+    def test_order_and_fields(self):
+        scored = self.infer([(self.user, resp) for resp in self.responses])
+        for by in ("index", "social"):
+            for descending in (False, True):
+                ranked = self.rank(by=by, descending=descending)
+                self.assertEqual([r["rank"] for r in ranked], list(range(1, len(self.responses) + 1)))
+                values = [r["index"] if by == "index" else r["scores"][by] for r in ranked]
+                self.assertEqual(values, sorted(values, reverse=descending))
+                for r in ranked:
+                    self.assertEqual(r["input"]["response"], self.responses[r["candidate"]])
+                    self.assertEqual(r["scores"], scored[r["candidate"]]["scores"])
+                # 同点の候補は入力順に並ぶ
+                tied = [r["candidate"] for r in ranked if r["candidate"] in (2, len(self.responses) - 1)]
+                self.assertEqual(tied, [2, len(self.responses) - 1])
+
+    def test_unknown_key(self):
+        with self.assertRaises(ValueError):
+            self.rank(by="unknown")
+
+    def test_read_responses(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "candidates.jsonl"
+            path.write_text(json.dumps("文字列の候補です。", ensure_ascii=False) + "\n\n"
+                            + json.dumps({"response": "オブジェクトの候補です。", "id": 3}, ensure_ascii=False) + "\n",
+                            encoding="utf-8")
+            self.assertEqual(_read_responses(path), ["文字列の候補です。", "オブジェクトの候補です。"])
+
+    def test_serve_rejects_too_many_candidates(self):
+        batcher = MicroBatcher(self.matcher, self.model, self.tfidf, uncertainty="analytic", max_candidates=3)
+        body = json.dumps({"user": self.user, "responses": self.responses}, ensure_ascii=False).encode("utf-8")
+        status, payload = asyncio.run(_rank(batcher, body))
+        self.assertEqual(status, 400)
+        self.assertIn("max 3", payload["error"])
+
+class TestServe(InferenceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, self.resp = self.generator.pairs(1)[0]
+        self.prime(self.user, self.resp)
+
+    def test_bad_request_does_not_fail_its_batch(self):
+        async def run():
+            # 2 つの要求が同じマイクロバッチに入るよう待ち時間を長くとる
+            batcher = MicroBatcher(self.matcher, self.model, self.tfidf, max_wait_ms=200, uncertainty="analytic")
+            batcher.start()
+            try:
+                bodies = [
+                    {"user": list("あいうえお"), "response": self.resp},
+                    {"user": self.user, "response": self.resp},
+                ]
+                scored = await asyncio.gather(*(
+                    _score(batcher, json.dumps(body, ensure_ascii=False).encode("utf-8")) for body in bodies
+                ))
+                ranked = await _rank(batcher, json.dumps(
+                    {"user": self.user, "responses": [self.resp, ["リストの候補です"]]}, ensure_ascii=False,
+                ).encode("utf-8"))
+            finally:
+                await batcher.stop()
+            return scored, ranked
+
+        (bad, good), ranked = asyncio.run(run())
+        self.assertEqual(bad, (400, {"error": "user must be a string"}))
+        self.assertEqual(good[0], 200)
+        self.assertEqual(good[1]["input"], {"user": self.user, "response": self.resp})
+        self.assertEqual(ranked, (400, {"error": "responses[1] must be a string"}))
+
+    def test_content_length(self):
+        async def request(head: bytes, body: bytes):
+            batcher = MicroBatcher(self.matcher, self.model, self.tfidf, uncertainty="analytic")
+            server = await asyncio.start_server(make_handler(batcher, max_body_bytes=100), "127.0.0.1", 0)
+            try:
+                reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+                writer.write(b"POST /score HTTP/1.1\r\nConnection: close\r\n" + head + b"\r\n" + body)
+                await writer.drain()
+                response = await reader.read()
+                writer.close()
+            finally:
+                server.close()
+                await server.wait_closed()
+            return response.split(b"\r\n", 1)[0]
+
+        cases = [
+            (b"Content-Length: abc\r\n", b"", b"400"),
+            (b"Content-Length: -1\r\n", b"", b"400"),
+            (b"Content-Length: 101\r\n", b"{}", b"413"),
+            # 本文を読めた場合は検証まで進む（user がない）
+            (b"Content-Length: 2\r\n", b"{}", b"400"),
+        ]
+        for head, body, status in cases:
+            self.assertEqual(asyncio.run(request(head, body)).split()[1], status, head)
+
+class TestInferenceDocuments(InferenceTestCase):
+    WINDOW_CHARS = 100
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with open(get_lexicon_path(), encoding="utf-8") as f:
+            long_generator = DialogueGenerator(yaml.safe_load(f), seed=7, response_sentences=(12, 20))
+        cls.long_pairs = [pair for pair in long_generator.pairs(6) if len(pair[1]) > 2 * cls.WINDOW_CHARS][:2]
+        cls.short_pairs = [pair for pair in cls.generator.pairs(6) if len(pair[1]) <= cls.WINDOW_CHARS][:2]
+
+    def setUp(self):
+        super().setUp()
+        self.assertEqual((len(self.long_pairs), len(self.short_pairs)), (2, 2))
+        for user, resp in self.long_pairs + self.short_pairs:
+            self.prime(user, resp, *(window for _, window in split_windows(resp, self.WINDOW_CHARS)))
+
+    def documents(self, pairs):
+        return inference_documents(pairs, self.matcher, self.model, self.tfidf, window_chars=self.WINDOW_CHARS,
+                                   uncertainty="analytic")
+
+    def test_short_response_matches_inference_batch(self):
+        documents = self.documents(self.short_pairs)
+        for document, expected in zip(documents, self.infer(self.short_pairs)):
+            self.assertNotIn("windows", document)
+            self.assertEqual(document["input"], expected["input"])
+            self.assertEqual(document["scores"], expected["scores"])
+            self.assertEqual(document["features"], expected["features"])
+
+    def test_windows_and_weighted_mean(self):
+        user, resp = self.long_pairs[0]
+        document = self.documents([(user, resp)])[0]
+        windows = split_windows(resp, self.WINDOW_CHARS)
+        expected = self.infer([(user, window) for _, window in windows])
+        self.assertEqual(document["input"], {"user": user, "response": resp})
+        self.assertEqual(document["meta"]["token_length"], len(resp))
+        self.assertEqual(document["meta"]["window_chars"], self.WINDOW_CHARS)
+        self.assertEqual(len(document["windows"]), len(windows))
+        for detail, (offset, window), result in zip(document["windows"], windows, expected):
+            self.assertEqual(detail["offset"], offset)
+            self.assertEqual(resp[offset:offset + detail["length"]], window)
+            self.assertEqual(detail["scores"], result["scores"])
+            self.assertEqual(detail["index"], result["index"])
+            self.assertEqual(detail["predicted_category"], result["predicted_category"])
+            self.assertEqual(detail["confidence"], result["meta"]["confidence"])
+            self.assertEqual(detail["features"], result["features"])
+        # 文書単位の値は窓の文字数で重み付けした平均
+        weights = np.array([len(window) for _, window in windows], dtype=np.float64) / len(resp)
+        for name, value in document["scores"].items():
+            self.assertAlmostEqual(value, float(np.dot(weights, [r["scores"][name] for r in expected])), places=9)
+        for name, value in document["features"].items():
+            self.assertAlmostEqual(value, float(np.dot(weights, [r["features"][name] for r in expected])), places=9)
+        self.assertAlmostEqual(document["meta"]["confidence"],
+                               float(np.dot(weights, [r["meta"]["confidence"] for r in expected])), places=9)
+        self.assertAlmostEqual(document["index"], sum(document["scores"].values()) / 4.0, places=9)
+
+    def test_window_at_input_limit(self):
+        # 末尾の短い文を連結しても窓は MAX_INPUT_CHARS を超えない（validate で失敗しない）
+        user = self.short_pairs[0][0]
+        resp = "あ" * (MAX_INPUT_CHARS - 2) + "。はい。"
+        self.prime(resp, *(window for _, window in split_windows(resp, MAX_INPUT_CHARS)))
+        document = inference_documents([(user, resp)], self.matcher, self.model, self.tfidf,
+                                       window_chars=MAX_INPUT_CHARS, uncertainty="analytic")[0]
+        self.assertEqual(sum(window["length"] for window in document["windows"]), len(resp))
+        self.assertTrue(all(window["length"] <= MAX_INPUT_CHARS for window in document["windows"]))
+
+    def test_mixed_batch_keeps_input_order(self):
+        pairs = [self.long_pairs[0], self.short_pairs[0], self.long_pairs[1], self.short_pairs[1]]
+        documents = self.documents(pairs)
+        self.assertEqual([document["input"]["response"] for document in documents], [resp for _, resp in pairs])
+        self.assertEqual(["windows" in document for document in documents], [True, False, True, False])
+        # 単独で採点した場合と同じ結果になる
+        for document, pair in zip(documents, pairs):
+            alone = self.documents([pair])[0]
+            self.assertEqual(document["scores"], alone["scores"])
+            self.assertEqual(document.get("windows"), alone.get("windows"))
+
+class TestStreamingScorer(InferenceTestCase):
+    def test_chunks_match_whole_response(self):
+        for user, resp in self.generator.pairs(4):
+            self.prime(user, resp)
+            scorer = StreamingScorer(user, self.matcher, self.model, self.tfidf, embed_interval=None,
+                                     uncertainty="analytic")
+            for pos in range(0, len(resp), 7):
+                partial = scorer.append(resp[pos:pos + 7])
+                self.assertEqual(partial["input"], {"user": user})
+                self.assertEqual(partial["meta"]["token_length"], min(pos + 7, len(resp)))
+                streaming = partial["meta"]["streaming"]
+                self.assertFalse(streaming["final"])
+                self.assertEqual(streaming["chars"], min(pos + 7, len(resp)))
+                self.assertIsNone(streaming["embedded_chars"])
+            result = scorer.finish()
+            expected = inference_pair(user, resp, self.matcher, self.model, self.tfidf, uncertainty="analytic")
+            self.assertEqual(result["input"], expected["input"])
+            self.assertEqual(result["predicted_category"], expected["predicted_category"])
+            for name, value in expected["features"].items():
+                self.assertAlmostEqual(result["features"][name], value, places=6, msg=name)
+            for name, value in expected["scores"].items():
+                self.assertAlmostEqual(result["scores"][name], value, places=6, msg=name)
+            self.assertAlmostEqual(result["index"], expected["index"], places=6)
+            streaming = result["meta"]["streaming"]
+            self.assertTrue(streaming["final"])
+            self.assertEqual(streaming["chars"], len(resp))
+            self.assertEqual(streaming["embedded_chars"], len(resp))
+            self.assertGreaterEqual(streaming["total_ms"], partial["meta"]["streaming"]["total_ms"])
+
+    def test_embed_interval(self):
+        user, resp = self.generator.pairs(1)[0]
+        self.prime(user, resp[:5], resp[:15])
+        scorer = StreamingScorer(user, self.matcher, self.model, self.tfidf, embed_interval=10,
+                                 uncertainty="analytic")
+        # 最初の更新で埋め込み、以後は embed_interval 文字ごとに再計算する
+        embedded = [scorer.append(resp[end - 5:end])["meta"]["streaming"]["embedded_chars"] for end in (5, 10, 15)]
+        self.assertEqual(embedded, [5, 5, 15])
+
+class TestProcessFile(InferenceTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        # 並列処理のワーカーもディスク層から埋め込みを読めるようにする
+        self.embeddings = EmbeddingCache(MODEL_NAME, disk_dir=self.dir / "embeddings")
+        set_embedding_cache(self.embeddings)
+        pairs = self.generator.pairs(12)
+        self.prime(*{text for pair in pairs for text in pair})
+        lines = [json.dumps({"user": user, "response": resp}, ensure_ascii=False) for user, resp in pairs]
+        lines[1:1] = ["{broken"]
+        lines[8:8] = [json.dumps({"user": pairs[0][0], "response": "短い"}, ensure_ascii=False), ""]
+        self.input = self.dir / "in.jsonl"
+        self.input.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        self.reference = self.run_file(self.dir / "reference.jsonl")
+
+    def prime(self, *texts: str) -> None:
+        # ディスク層は float16 で保持するため、並列処理と逐次処理で同じ値になるよう丸めておく
+        self.embeddings.put_many(list(texts), np.stack([_embedding(text) for text in texts])
+                                 .astype(np.float16).astype(np.float32))
+
+    def run_file(self, output, **kwargs):
+        kwargs.setdefault("batch_size", 2)
+        kwargs.setdefault("checkpoint_every", 3)
+        process_file(self.input, output, self.matcher, self.model, self.tfidf, uncertainty="analytic", **kwargs)
+        return output
+
+    def crash_at(self, output, n_chunks, **kwargs):
+        """n_chunks 番目のチャンクの推論中に中断した実行を再現する。"""
+        infer_chunk = run_inference._infer_chunk
+        calls = []
+
+        def interrupt(*args, **kw):
+            calls.append(None)
+            if len(calls) == n_chunks:
+                raise KeyboardInterrupt
+            return infer_chunk(*args, **kw)
+
+        with mock.patch.object(run_inference, "_infer_chunk", side_effect=interrupt), \
+                self.assertRaises(KeyboardInterrupt):
+            self.run_file(output, **kwargs)
+
+    def assertSameOutput(self, output, reference):
+        def load(path):
+            results = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+            for result in results:
+                del result["meta"]["processing_time_ms"]
+            return results
+
+        self.assertEqual(load(output), load(reference))
+        rejects = output.with_name(output.name + ".rejects.jsonl")
+        self.assertEqual(rejects.read_bytes(), reference.with_name(reference.name + ".rejects.jsonl").read_bytes())
+
+    def test_interrupted_run_resumes_to_same_output(self):
+        self.assertEqual(len(self.reference.read_text(encoding="utf-8").splitlines()), 12)
+        output = self.dir / "out.jsonl"
+        self.crash_at(output, 4)
+        state = load_checkpoint(checkpoint_path(output))
+        self.assertFalse(state["complete"])
+        # 2 チャンク目（4 件）の書き出しで確定し、3 チャンク目は破棄される
+        self.assertEqual(state["position"]["records"], 5)
+        self.assertEqual(state["input_size"], self.input.stat().st_size)
+        self.run_file(output, resume=True)
+        self.assertSameOutput(output, self.reference)
+        self.assertTrue(load_checkpoint(checkpoint_path(output))["complete"])
+        # 完了済みなら何もしない
+        with mock.patch.object(run_inference, "_infer_chunk") as infer_chunk:
+            self.run_file(output, resume=True)
+        infer_chunk.assert_not_called()
+
+    def test_fresh_run_discards_stale_checkpoint(self):
+        output = self.dir / "out.jsonl"
+        self.crash_at(output, 4)
+        # 最初の確定前に中断した新規実行の後は、古いチェックポイントから再開しない
+        self.crash_at(output, 1)
+        self.assertFalse(checkpoint_path(output).exists())
+        self.run_file(output, resume=True)
+        self.assertSameOutput(output, self.reference)
+
+    def test_resume_refuses_inconsistent_files(self):
+        output = self.dir / "out.jsonl"
+        rejects = output.with_name(output.name + ".rejects.jsonl")
+        self.crash_at(output, 4)
+        committed = load_checkpoint(checkpoint_path(output))["output_position"]
+        with output.open("r+b") as f:
+            f.truncate(committed - 1)
+        with self.assertRaisesRegex(ValueError, "output"):
+            self.run_file(output, resume=True)
+
+        self.crash_at(output, 4)
+        rejects.unlink()
+        with self.assertRaisesRegex(ValueError, "rejects"):
+            self.run_file(output, resume=True)
+
+        self.crash_at(output, 4)
+        with self.input.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"user": "追加", "response": "追加された応答です。"}, ensure_ascii=False) + "\n")
+        with self.assertRaisesRegex(ValueError, "input_size"):
+            self.run_file(output, resume=True)
+
+    def test_parallel_checkpoints_follow_input_order(self):
+        output = self.dir / "parallel.jsonl"
+        states = []
+        save = checkpoint.save_checkpoint
+
+        def record(path, state):
+            states.append(state)
+            save(path, state)
+
+        with mock.patch.object(checkpoint, "save_checkpoint", side_effect=record):
+            self.run_file(output, workers=2, checkpoint_every=2)
+        self.assertSameOutput(output, self.reference)
+        data = self.input.read_bytes()
+        text = output.read_bytes()
+        offsets = [state["position"]["offset"] for state in states]
+        self.assertEqual(offsets, sorted(offsets))
+        self.assertEqual(offsets[-1], len(data))
+        for state in states:
+            # 確定済みの出力は、確定済みの入力位置までの有効なレコードと過不足なく対応する
+            position = state["position"]
+            n_written = text[:state["output_position"]].count(b"\n")
+            n_rejected = output.with_name(output.name + ".rejects.jsonl").read_bytes()[:position["rejects"]].count(b"\n")
+            self.assertEqual(n_written + n_rejected, position["records"])
+            self.assertEqual(data[:position["offset"]].count(b"\n"), position["lines"])
+        self.assertTrue(states[-1]["complete"])
+
+if __name__ == "__main__":
+    unittest.main()
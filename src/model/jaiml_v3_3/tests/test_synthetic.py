@@ -0,0 +1,37 @@
+# src/model/jaiml_v3_3/tests/test_synthetic.py
+import unittest
+
+from benchmarks.synthetic import DialogueGenerator, expand_lexicon
+
+LEXICON = {
+    "self_reference_words": ["私", "当AI"],
+    "modal_expressions": ["かもしれません", "と思います"],
+    "intensifiers": ["とても"],
+}
+
+class TestSyntheticDialogue(unittest.TestCase):
+    def test_seeded_generation_is_reproducible(self):
+        a = DialogueGenerator(LEXICON, seed=42).pairs(20)
+        b = DialogueGenerator(LEXICON, seed=42).pairs(20)
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, DialogueGenerator(LEXICON, seed=43).pairs(20))
+
+    def test_density_controls_lexicon_phrases(self):
+        terms = [t for ts in LEXICON.values() for t in ts]
+
+        def phrase_count(density: float) -> int:
+            pairs = DialogueGenerator(LEXICON, seed=0, density=density).pairs(50)
+            return sum(resp.count(t) for _, resp in pairs for t in terms)
+
+        self.assertEqual(phrase_count(0.0), 0)
+        self.assertGreater(phrase_count(0.8), phrase_count(0.2))
+
+    def test_expand_lexicon(self):
+        expanded = expand_lexicon(LEXICON, 500, seed=0)
+        self.assertEqual(sum(len(t) for t in expanded.values()), 500)
+        self.assertEqual(list(expanded), list(LEXICON))
+        for category, terms in LEXICON.items():
+            self.assertEqual(expanded[category][:len(terms)], terms)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+# src/model/jaiml_v3_3/tests/test_timing.py
+import unittest
+
+from core.utils.timing import TimingAggregator, TimingHistogram
+
+class TestTiming(unittest.TestCase):
+    def test_histogram_percentiles(self):
+        hist = TimingHistogram()
+        for ms in range(1, 101):
+            hist.add(float(ms))
+        summary = hist.summary()
+        self.assertEqual(summary["count"], 100)
+        self.assertAlmostEqual(summary["mean_ms"], 50.5)
+        self.assertEqual(summary["max_ms"], 100.0)
+        # バケット上限による近似（相対誤差 26% 以内）
+        self.assertLessEqual(abs(summary["p50_ms"] - 50.0) / 50.0, 0.26)
+        self.assertLessEqual(summary["p99_ms"], 100.0)
+
+    def test_aggregator_merge(self):
+        a, b = TimingAggregator(), TimingAggregator()
+        a.add_all([{"tokenize": 1.0, "mc_dropout": 2.0}, None])
+        b.add({"tokenize": 3.0})
+        a.merge(b)
+        summary = a.summary()
+        self.assertEqual(summary["tokenize"]["count"], 2)
+        self.assertEqual(summary["tokenize"]["total_ms"], 4.0)
+        self.assertEqual(summary["mc_dropout"]["count"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+# src/model/jaiml_v3_3/tests/test_windowing.py
+import unittest
+
+from core.utils.windowing import MIN_WINDOW_CHARS, split_windows
+
+class TestSplitWindows(unittest.TestCase):
+    def assertCovers(self, text, windows):
+        self.assertEqual("".join(window for _, window in windows), text)
+        for offset, window in windows:
+            self.assertEqual(text[offset:offset + len(window)], window)
+
+    def test_sentence_aligned_and_bounded(self):
+        text = "".join(f"これは{i}番目の文です。" for i in range(40)) + "\n末尾の文"
+        windows = split_windows(text, 60)
+        self.assertCovers(text, windows)
+        self.assertGreater(len(windows), 1)
+        for _, window in windows[:-1]:
+            self.assertLessEqual(len(window), 60)
+            self.assertTrue(window.endswith("。"))
+
+    def test_long_sentence_is_split_at_comma(self):
+        text = "あ" * 40 + "、" + "い" * 40 + "。"
+        windows = split_windows(text, 50)
+        self.assertCovers(text, windows)
+        self.assertEqual(windows[0][1], "あ" * 40 + "、")
+        self.assertTrue(all(len(window) <= 50 for _, window in windows))
+
+    def test_short_windows_are_merged(self):
+        text = "あ" * 20 + "。はい。"
+        windows = split_windows(text, 30)
+        self.assertCovers(text, windows)
+        self.assertEqual(len(windows), 1)
+        self.assertTrue(all(len(window) >= MIN_WINDOW_CHARS for _, window in split_windows("はい。" + "あ" * 30, 10)))
+        with self.assertRaises(ValueError):
+            split_windows(text, MIN_WINDOW_CHARS - 1)
+
+    def test_merge_never_exceeds_max_chars(self):
+        cases = [
+            ("あ" * 9998 + "。" + "はい。", 10000),
+            ("はい。" + "あ" * 9999 + "。", 10000),
+            ("あ" * 20 + "。はい。", 21),
+            ("はい。" + "あ" * 30, 10),
+            ("あ。い。う。" * 4, MIN_WINDOW_CHARS),
+        ]
+        for text, max_chars in cases:
+            windows = split_windows(text, max_chars)
+            self.assertCovers(text, windows)
+            self.assertTrue(all(len(window) <= max_chars for _, window in windows), (text[-10:], max_chars))
+            if max_chars > 2 * MIN_WINDOW_CHARS:
+                self.assertTrue(all(len(window) >= MIN_WINDOW_CHARS for _, window in windows))
+        # 末尾の短い窓は直前の窓から MIN_WINDOW_CHARS 文字になるまで文字を移す
+        windows = split_windows("あ" * 9998 + "。" + "はい。", 10000)
+        self.assertEqual([len(window) for _, window in windows], [10000 + 2 - MIN_WINDOW_CHARS, MIN_WINDOW_CHARS])
+
+if __name__ == "__main__":
+    unittest.main()